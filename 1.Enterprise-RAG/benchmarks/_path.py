@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# scripts use flat imports (from cache import ...), hence the scripts folder is put on the path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
@@ -0,0 +1,64 @@
+## ingestion indexing throughput, streaming bulk requests vs one index request per chunk
+## against a stub opensearch client with a fixed round trip latency
+## usage: python benchmarks/bench_bulk_ingestion.py [chunks] [round_trip_ms]
+import json
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from opensearchpy.serializer import JSONSerializer
+
+# ingestion lambda is not part of the scripts folder
+sys.path.insert(
+    0, str(Path(__file__).resolve().parent.parent / "deployment-package" / "lambda-package" / "ingestion_service")
+)
+from ingestion_service_lambda import BulkConfig, build_document, bulk_load_docs  # noqa: E402
+
+## opensearch client, every request costs one round trip ##
+class StubOpenSearch:
+    def __init__(self, round_trip: float):
+        self.round_trip = round_trip
+        self.requests = 0
+        self.transport = SimpleNamespace(serializer=JSONSerializer())
+
+    def index(self, index, body):
+        self.requests += 1
+        json.dumps(body)
+        time.sleep(self.round_trip)
+        return {"result": "created"}
+
+    def bulk(self, body, **kwargs):
+        self.requests += 1
+        lines = body.splitlines()
+        time.sleep(self.round_trip)
+        return {"errors": False, "items": [{"index": {"status": 201}} for _ in lines[::2]]}
+
+def documents(chunks: int):
+    return (
+        build_document(f"doc_{i}", f"chunk {i} " + "text " * 80, [0.01] * 512, "handbook.pdf")
+        for i in range(chunks)
+    )
+
+def main():
+    chunks = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    round_trip = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.02
+
+    client = StubOpenSearch(round_trip)
+    started = time.perf_counter()
+    for document in documents(chunks):
+        client.index(index="enterprise-rag-index", body=document)
+    per_doc = chunks / (time.perf_counter() - started)
+    per_doc_requests = client.requests
+
+    client = StubOpenSearch(round_trip)
+    started = time.perf_counter()
+    result = bulk_load_docs(documents(chunks), client, "enterprise-rag-index", BulkConfig())
+    bulk = chunks / (time.perf_counter() - started)
+    assert result.indexed == chunks
+
+    print(f"chunks={chunks}, round_trip={round_trip * 1000:.0f} ms")
+    print(f"index per chunk: {per_doc:8.1f} docs/s, requests={per_doc_requests}")
+    print(f"streaming bulk : {bulk:8.1f} docs/s, requests={client.requests}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+## bytes stored and encode/decode time of cached responses per codec configuration
+## usage: python benchmarks/bench_cache_codec.py
+import json
+import time
+import _path  # noqa: F401
+import cache_codec
+from cache_codec import CacheCodec
+
+ITERATIONS = 2000
+
+## representative gen_structured_resp payloads, short answer and long markdown answer
+def payloads() -> dict:
+    short = {"answer": "Employees get 20 days of annual leave per year.", "sources": ["leave-policy.pdf"]}
+    long = {
+        "answer": "\n".join(
+            f"- **Section {i}**: employees are entitled to {i} days of leave. Requests are approved "
+            f"by the line manager and recorded in the HR portal within 5 working days."
+            for i in range(40)
+        ),
+        "sources": ["leave-policy.pdf", "hr-handbook.docx", "benefits-2025.pdf"],
+    }
+    return {"short": short, "long": long}
+
+def configurations() -> dict:
+    configs = {"json (orjson)" if cache_codec.orjson else "json": CacheCodec("json")}
+    if cache_codec.msgpack is not None:
+        configs["msgpack"] = CacheCodec("msgpack")
+    if cache_codec.zstandard is not None:
+        configs["json + zstd"] = CacheCodec("json", compression_threshold=1024)
+        if cache_codec.msgpack is not None:
+            configs["msgpack + zstd"] = CacheCodec("msgpack", compression_threshold=1024)
+    return configs
+
+def timeit(fn, value) -> float:
+    started = time.perf_counter()
+    for _ in range(ITERATIONS):
+        fn(value)
+    return (time.perf_counter() - started) / ITERATIONS * 1e6
+
+def main():
+    print(f"{'payload':8} {'codec':18} {'bytes':>7} {'encode us':>10} {'decode us':>10}")
+    for name, value in payloads().items():
+        # baseline, plain json text as stored before the codec
+        raw = json.dumps(value).encode()
+        print(
+            f"{name:8} {'baseline json':18} {len(raw):7} "
+            f"{timeit(lambda v: json.dumps(v).encode(), value):10.1f} {timeit(json.loads, raw):10.1f}"
+        )
+        for label, codec in configurations().items():
+            raw = codec.encode(value)
+            assert codec.decode(raw) == value
+            print(
+                f"{name:8} {label:18} {len(raw):7} "
+                f"{timeit(codec.encode, value):10.1f} {timeit(codec.decode, raw):10.1f}"
+            )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+## recall@k and latency of knn vs hybrid (knn + BM25 fused with RRF) retrieval
+## on a synthetic corpus. Chunks of the same topic have close embeddings and differ
+## by a policy identifier, which (like with real embedding models) barely moves the
+## vector. Identifier queries therefore need BM25, paraphrased queries need knn.
+## knn and BM25 run in memory as stand-ins for opensearch, fusion is the service code
+## usage: python benchmarks/bench_hybrid_recall.py [chunks] [queries]
+import math
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+import numpy as np
+import _path  # noqa: F401
+from hybrid_search import fuse_hybrid
+
+TOPICS = 200
+DIMENSIONS = 64
+TOP_K = (1, 5, 10)
+
+## in-memory BM25 over whitespace tokens ##
+class BM25:
+    def __init__(self, texts: list[str], k1: float = 1.2, b: float = 0.75):
+        self.k1, self.b = k1, b
+        self.lengths = []
+        self.postings = defaultdict(list)  #term -> [(doc, tf)]
+        for doc, text in enumerate(texts):
+            terms = Counter(text.lower().split())
+            self.lengths.append(sum(terms.values()))
+            for term, tf in terms.items():
+                self.postings[term].append((doc, tf))
+        self.avg_length = sum(self.lengths) / len(self.lengths)
+
+    def search(self, query: str, size: int) -> list[int]:
+        scores = defaultdict(float)
+        for term in set(query.lower().split()):
+            postings = self.postings.get(term, [])
+            if not postings:
+                continue
+            idf = math.log(1 + (len(self.lengths) - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc, tf in postings:
+                norm = 1 - self.b + self.b * self.lengths[doc] / self.avg_length
+                scores[doc] += idf * tf * (self.k1 + 1) / (tf + self.k1 * norm)
+        return sorted(scores, key=scores.get, reverse=True)[:size]
+
+## opensearch style response of ranked doc ids ##
+def response(ranked) -> dict:
+    return {"hits": {"hits": [{"_id": str(doc), "_score": 0.0} for doc in ranked]}}
+
+def build_corpus(chunks: int, queries: int, rng: random.Random):
+    np_rng = np.random.default_rng(0)
+    topic_vectors = np_rng.normal(size=(TOPICS, DIMENSIONS))
+    topic_words = [[f"term{t}x{w}" for w in range(5)] for t in range(TOPICS)]
+
+    texts, vectors, ids = [], [], []
+    for doc in range(chunks):
+        topic = doc % TOPICS
+        policy_id = f"pol-{rng.randrange(10**6):06d}"
+        words = rng.sample(topic_words[topic], 3)
+        texts.append(f"policy {policy_id} covers {' '.join(words)} for employees")
+        vectors.append(topic_vectors[topic] + 0.3 * np_rng.normal(size=DIMENSIONS))
+        ids.append(policy_id)
+    matrix = np.array(vectors)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+
+    # (kind, text, embedding, relevant doc)
+    workload = []
+    for i in range(queries):
+        doc = rng.randrange(chunks)
+        if i % 2:
+            # identifier query, embedding only carries the generic intent
+            text = f"what does {ids[doc]} cover"
+            embedding = topic_vectors[doc % TOPICS] * 0.2 + np_rng.normal(size=DIMENSIONS)
+            workload.append(("identifier", text, embedding, doc))
+        else:
+            # paraphrase, no topic word of the chunk is used
+            text = "which policy applies to employees in this situation"
+            embedding = matrix[doc] + 0.05 * np_rng.normal(size=DIMENSIONS)
+            workload.append(("paraphrase", text, embedding, doc))
+    return texts, matrix, workload
+
+def main():
+    chunks = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 400
+    rng = random.Random(0)
+    texts, matrix, workload = build_corpus(chunks, queries, rng)
+    bm25 = BM25(texts)
+    size = max(TOP_K)
+
+    print(f"chunks={chunks}, queries={queries}")
+    # ms/query is search + fusion with the in-memory stand-ins, fusion ms is the service overhead
+    print(f"{'mode':7} {'query kind':11} " + " ".join(f"recall@{k:<3}" for k in TOP_K) + "  ms/query  fusion ms")
+    for mode in ("knn", "hybrid"):
+        hits = defaultdict(lambda: Counter())
+        totals = Counter()
+        elapsed = fusion = 0.0
+        for kind, text, embedding, relevant in workload:
+            started = time.perf_counter()
+            knn = np.argsort(-(matrix @ (embedding / np.linalg.norm(embedding))))[:size]
+            if mode == "hybrid":
+                bm25_ranked = bm25.search(text, size)
+                fusion_started = time.perf_counter()
+                fused = fuse_hybrid(response(knn), response(bm25_ranked), size=size)
+                ranked = [int(hit["_id"]) for hit in fused["hits"]["hits"]]
+                fusion += time.perf_counter() - fusion_started
+            else:
+                ranked = list(knn)
+            elapsed += time.perf_counter() - started
+
+            totals[kind] += 1
+            for k in TOP_K:
+                hits[kind][k] += relevant in ranked[:k]
+
+        for kind in sorted(totals):
+            recalls = " ".join(f"{hits[kind][k] / totals[kind]:9.2f}" for k in TOP_K)
+            print(f"{mode:7} {kind:11} {recalls}  {elapsed / queries * 1000:8.2f}  {fusion / queries * 1000:9.3f}")
+
+if __name__ == "__main__":
+    main()
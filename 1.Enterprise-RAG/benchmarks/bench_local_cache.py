@@ -0,0 +1,75 @@
+## local cache throughput and memory, bounded LRU vs the previous unbounded dict
+## memory is the process RSS before and after filling the cache, each cache is
+## measured in a fresh process so that memory kept by the allocator after one
+## run does not count for the next
+## usage: python benchmarks/bench_local_cache.py [writes] [max_entries]
+import multiprocessing
+import resource
+import sys
+import time
+import _path  # noqa: F401
+from cache import LocalCache
+
+RESPONSE = {"answer": "Employees get 20 days of paid leave per year. " * 10, "sources": ["hr-policy.pdf"]}
+
+## previous implementation, plain dict without bounds or sweep ##
+class DictCache(LocalCache):
+    def __init__(self):
+        super().__init__()
+        self._store = {}
+
+    def get(self, key: str):
+        item = self._store.get(key)
+        if item is None:
+            return None
+        value, expiry = item
+        if expiry and expiry < time.time():
+            del self._store[key]
+            return None
+        return value
+
+    def set(self, key: str, value, ex: int | None = 86400):
+        self._store[key] = (self.codec.encode(value), time.time() + ex if ex else None)
+
+## current RSS in MB, peak RSS where /proc is not available ##
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024  #bytes on macOS, KB elsewhere
+
+## writes unique keys then reads them back, returns (set/s, get/s, RSS growth MB, entries) ##
+def measure(name: str, writes: int, max_entries: int):
+    cache = DictCache() if name == "dict" else LocalCache(max_entries=max_entries)
+    keys = [f"query-{i}" for i in range(writes)]
+
+    rss_before = rss_mb()
+    started = time.perf_counter()
+    for key in keys:
+        cache.set(key, RESPONSE)
+    set_rate = writes / (time.perf_counter() - started)
+    rss_after = rss_mb()
+
+    started = time.perf_counter()
+    for key in keys:
+        cache.get(key)
+    get_rate = writes / (time.perf_counter() - started)
+    return set_rate, get_rate, rss_after - rss_before, len(cache._store)
+
+def main():
+    writes = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    max_entries = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+
+    print(f"writes={writes}, max_entries={max_entries}")
+    with multiprocessing.get_context("spawn").Pool(1, maxtasksperchild=1) as pool:
+        for name, label in (("dict", "dict (unbounded)"), ("lru", "LRU (bounded)")):
+            set_rate, get_rate, rss_growth, entries = pool.apply(measure, (name, writes, max_entries))
+            print(f"{label:17}: {set_rate:10.0f} set/s {get_rate:10.0f} get/s {rss_growth:8.1f} MB RSS growth, entries={entries}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+## semantic cache lookup latency, matrix scan vs the previous per-entry python loop
+## usage: python benchmarks/bench_semantic_index.py [entries] [dimensions]
+import math
+import random
+import sys
+import time
+import _path  # noqa: F401
+from cache import SemanticIndex
+
+SEARCHES = 50
+
+## previous implementation, dot product per entry in python ##
+def python_search(vectors: dict, query: list[float]):
+    norm = math.sqrt(sum(x * x for x in query)) or 1.0
+    query = [x / norm for x in query]
+    best_key, best_score = None, -1.0
+    for key, vector in vectors.items():
+        score = sum(a * b for a, b in zip(query, vector))
+        if score > best_score:
+            best_key, best_score = key, score
+    return best_key, best_score
+
+def main():
+    entries = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    dimensions = int(sys.argv[2]) if len(sys.argv) > 2 else 512
+    random.seed(0)
+
+    index = SemanticIndex(max_entries=entries)
+    vectors = {}
+    for i in range(entries):
+        vector = [random.gauss(0, 1) for _ in range(dimensions)]
+        norm = math.sqrt(sum(x * x for x in vector))
+        vectors[str(i)] = [x / norm for x in vector]
+        index.add(str(i), vector, "v1")
+    queries = [[random.gauss(0, 1) for _ in range(dimensions)] for _ in range(SEARCHES)]
+
+    started = time.perf_counter()
+    expected = [python_search(vectors, query)[0] for query in queries]
+    python_ms = (time.perf_counter() - started) / SEARCHES * 1000
+
+    started = time.perf_counter()
+    found = [index.search(query, "v1")[0] for query in queries]
+    matrix_ms = (time.perf_counter() - started) / SEARCHES * 1000
+
+    assert found == expected
+    print(f"entries={entries}, dimensions={dimensions}")
+    print(f"python loop  : {python_ms:8.2f} ms/search")
+    print(f"matrix scan  : {matrix_ms:8.2f} ms/search")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+## per-request setup cost, settings and retrieval service built per request vs shared
+## usage: python benchmarks/bench_service_setup.py [requests]
+import logging
+import sys
+import time
+import _path  # noqa: F401
+from retrieval_service import RetrievalService
+from settings import Settings
+
+## previous request path, env is read and services are built for every request ##
+def per_request():
+    settings = Settings.from_env()
+    return RetrievalService(None, None, None, None, None, settings)
+
+## current request path, service is built once at startup ##
+def shared(service):
+    return service
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    logging.disable(logging.INFO)  #from_env logs the resolved settings
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        per_request()
+    per_request_us = (time.perf_counter() - started) / requests * 1e6
+
+    service = per_request()
+    started = time.perf_counter()
+    for _ in range(requests):
+        shared(service)
+    shared_us = (time.perf_counter() - started) / requests * 1e6
+
+    print(f"requests={requests}")
+    print(f"built per request: {per_request_us:8.2f} us/request")
+    print(f"shared service   : {shared_us:8.2f} us/request")
+
+if __name__ == "__main__":
+    main()
@@ -831,6 +831,13 @@ create_k8s_resources(){
                 exit 1
             fi
 
+            if kubectl apply -f ./k8s-manifests/hpa.yaml;then
+                echo "✅ k8s manifests (hpa) successfully created."  
+            else
+                echo "❌ Error: Creating k8s manifests (hpa) failed."
+                exit 1
+            fi
+
             echo "DEL_ENTERPRISE_RAG_NAMESPACE=true" >> "$DEL_CHECKPOINT_LOGGER"
             echo "EKS Cluser(enterprise-rag) resources:" >> "$RESOURCE_FILE"
             echo "      ✅ArgoCD" >> "$RESOURCE_FILE"
@@ -842,6 +849,7 @@ create_k8s_resources(){
             echo "      ✅Pod-Identity-Association: ESOServiceRole<->external-secrets account" >> "$RESOURCE_FILE"
             echo "      ✅Pod-Identity-Association: RetrievalServiceRole<->enterprise-rag-service-account" >> "$RESOURCE_FILE"   
             echo "      ✅Deployment: enterprise-rag-deployment" >> "$RESOURCE_FILE"
+            echo "      ✅HorizontalPodAutoscaler: enterprise-rag-hpa" >> "$RESOURCE_FILE"
             next_step
         else
 
@@ -1,9 +1,14 @@
 #import packages
-from io import BytesIO      # To load s3 file content locally
+import tempfile             # To spool s3 file content to local disk
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from botocore.config import Config
+import threading
 import urllib.parse
+import hashlib
 import boto3
 import json
-import uuid
+import time
 import os
 from pathlib import Path
 from dataclasses import dataclass
@@ -16,6 +21,7 @@ try:
     import PyPDF2               # For reading PDF documents
     from docx import Document   # For reading Word documents
     from opensearchpy import OpenSearch, RequestsHttpConnection
+    from opensearchpy.helpers import streaming_bulk
     from requests_aws4auth import AWS4Auth    
     import_success = True
     logger.info("✅Required packages are loaded.")
@@ -23,138 +29,296 @@ except ImportError as e:
     logger.error(f"❌ FAILURE: Missing package -> {e}")
     import_success = False
 
+EMBEDDING_DIMENSIONS = 512
+
+# embedding cache, module scope so it survives across warm invocations
+# key format is same as EmbeddingCache of retrieval service (model id + dimensions + text)
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "1000"))
+embedding_cache = OrderedDict()
+embedding_cache_lock = threading.Lock()   # embeddings are generated by a thread pool
+
+# chunks of one document read per manifest page, manifest is paged with search_after
+MANIFEST_PAGE_SIZE = 1000
+
+# SQS batches: no new message is started with less time left than this, so that a
+# message is not cut by the lambda timeout (which would fail and re-deliver the whole batch)
+MESSAGE_TIME_RESERVE_MS = int(os.getenv("MESSAGE_TIME_RESERVE_SECONDS", "120")) * 1000
+
+# ingestion service with its aws/opensearch clients, created on first invocation
+# and reused by warm invocations
+ingestion_service = None
+
 ########### class definition ######
 @dataclass
 class VectorDBInfo:
     os_host: str
     index_name: str
+    meta_index_name: str
 ## end ##    
 
+## bulk indexing configuration, batches are bounded by number of docs and bytes
+@dataclass
+class BulkConfig:
+    chunk_size: int = 100                       # max docs per bulk request
+    max_chunk_bytes: int = 5 * 1024 * 1024      # max bytes per bulk request
+    max_retries: int = 5                        # retries of docs rejected with 429
+    initial_backoff: float = 1.0                # seconds, doubled on every retry
+    max_backoff: float = 30.0                   # seconds
+## end ##
+
+## result of bulk indexing
+@dataclass
+class BulkResult:
+    indexed: int
+    failed: int
+    errors: dict    # (status, error type) -> count
+## end ##
+
+## embedding generation configuration
+@dataclass
+class EmbeddingConfig:
+    concurrency: int = 8        # concurrent bedrock calls
+    max_attempts: int = 8       # attempts per call, throttled calls are retried with client side rate limiting
+## end ##
+
 ########### Ingestion service definition #################
 class KnowledgeIngestionService:
+
+    def __init__(
+            self,
+            db_info: VectorDBInfo,
+            bulk_config: BulkConfig,
+            embedding_config: EmbeddingConfig
+        ):
+        self.db_info = db_info
+        self.bulk_config = bulk_config
+        self.embedding_config = embedding_config
+
+        #get aws session
+        assumed_session = boto3.Session()
+        logger.info("✅boto3.Session created")
+        #get s3 client
+        self.s3_client = assumed_session.client("s3")
+        #get vector db client
+        self.db_client = get_opensearch_client(assumed_session, db_info.os_host)
+        #get bedrock client, shared by embedding threads
+        self.bedrock_client = get_bedrock_client(assumed_session, embedding_config)
+
     def doc_ingestion(
             self,
             bucket_name,
-            object_key,
-            db_info: VectorDBInfo 
+            object_key
         ) -> None :
         
+        db_info = self.db_info
+        db_client = self.db_client
         try:
 
-            #get aws session
-            assumed_session = boto3.Session()
-            logger.info("✅boto3.Session created")
-            #get vector db client
-            db_client = get_opensearch_client(assumed_session, db_info.os_host)
             #read doc content
             (
                 file_processed,
-                doc,
-                doc_id,
+                pages,
                 filename            
             ) = read_s3_docs(
-                assumed_session,
+                self.s3_client,
                 bucket_name,
                 object_key
             )
             
             if not file_processed:
                 raise ValueError(f"Unsupported file: {object_key}")
-            
-            if doc.strip():
-                #chunking
-                chunks = chunk_text(doc, chunk_size = 500, overlap = 40)
-                logger.info("Generating embedding and loading doc to db")
-                for i, chunk in enumerate(chunks):
-                    #embedding
-                    emb = generate_embedding(assumed_session, chunk)
-                    chunk_id = f"{doc_id}_chunk_{i}"
-                    #store document
-                    load_doc_to_db(
-                        chunk_id,
-                        chunk,
-                        emb,
-                        filename,
-                        db_client,
-                        db_info.index_name
-                    )
-            
-            logger.info(f"✅Processing document completed. Total {i+1} documents are added to opensearch Index")
+
+            #chunk ids are derived from object key + chunk content, manifest holds
+            #the chunk ids of the previous ingestion of this document and their copies
+            key_id = get_source_key_id(object_key)
+            manifest = load_manifest(db_client, db_info.index_name, key_id)
+            seen = set()
+
+            #only new or changed chunks are embedded and indexed
+            def changed_chunks(chunks):
+                for chunk in chunks:
+                    chunk_id = get_chunk_id(key_id, chunk)
+                    if chunk_id in seen:
+                        continue
+                    seen.add(chunk_id)
+                    if chunk_id not in manifest:
+                        yield chunk
+
+            #pages are extracted and chunked lazily, so that memory does not grow with document size
+            chunks = chunk_text(pages, chunk_size = 500, overlap = 40)
+            logger.info("Generating embedding and loading doc to db")
+            #embeddings are generated concurrently and streamed to bulk writer,
+            #so that embedding of next chunks overlaps with indexing
+            documents = (
+                build_document(get_chunk_id(key_id, chunk), chunk, emb, filename)
+                for chunk, emb in embed_chunks(
+                    self.bedrock_client, changed_chunks(chunks), self.embedding_config.concurrency
+                )
+            )
+            result = bulk_load_docs(documents, db_client, db_info.index_name, self.bulk_config)
+
+            #chunks which are no longer part of the document
+            deleted = delete_chunks(db_client, db_info.index_name, manifest.keys() - seen)
+
+            #extra copies of kept chunks, a re-delivery before the index was refreshed
+            #does not see the chunks of the previous delivery and indexes them again
+            copies = [
+                _id for chunk_id in seen & manifest.keys() for _id in manifest[chunk_id][1:]
+            ]
+            deleted += delete_chunk_copies(db_client, db_info.index_name, copies)
+
+            logger.info(
+                f"✅Processing document completed. Total {result.indexed} documents are added to opensearch Index, "
+                f"unchanged={len(seen & manifest.keys())}, deleted={deleted}, duplicates={len(copies)}"
+            )
+
+            #knowledge base has changed, invalidates cached answers of retrieval service
+            if result.indexed or deleted:
+                bump_kb_version(db_client, db_info.meta_index_name, filename)
+
+            #partial failure, invocation fails so that it is reported (and retried by lambda)
+            if result.failed:
+                raise RuntimeError(
+                    f"{result.failed} of {result.indexed + result.failed} chunks failed to index: {result.errors}"
+                )
 
         except Exception as e:
             logger.info(f"❌Ingestion failed for {object_key}: {str(e)}")
             raise            
+
+    ## purge all chunks of a removed document ##
+    def doc_removal(
+            self,
+            object_key
+        ) -> None :
+
+        db_info = self.db_info
+        db_client = self.db_client
+        try:
+            key_id = get_source_key_id(object_key)
+            response = db_client.delete_by_query(
+                index=db_info.index_name,
+                body={"query": {"prefix": {"doc_id": f"{key_id}_"}}}
+            )
+            deleted = response.get("deleted", 0)
+            logger.info(f"✅Document removed. Total {deleted} documents are deleted from opensearch Index")
+
+            if deleted:
+                bump_kb_version(db_client, db_info.meta_index_name, Path(object_key).name)
+
+        except Exception as e:
+            logger.info(f"❌Removal failed for {object_key}: {str(e)}")
+            raise
+    ## end ##
 ############### Service Definition END #############
 
 ########### Functions block BEGIN ###################
 
-# read document from s3 bucket
-def read_s3_docs(assumed_session, bucket_name, object_key):
+# read document from s3 bucket, returns a generator of page texts
+def read_s3_docs(s3, bucket_name, object_key):
 
     logger.info("Reading S3 doc")
-    #get s3 client 
-    s3 = assumed_session.client("s3")
-    logger.info("S3 client created")    
-    # Read file from S3 into memory
-    doc_content = s3.get_object(Bucket=bucket_name, Key=object_key)
-    file_bytes = doc_content["Body"].read()
     filename = Path(object_key).name
     filename_lower = filename.lower()
-    logger.info(f"Reading contents of file={filename_lower}, file_bytes={len(file_bytes)}")
 
-    doc_id = str(uuid.uuid4())
-    text = ""
-    # Pass bytes stream to fileReader
-    file_processed = False
-    with BytesIO(file_bytes) as f:
+    file_processed = filename_lower.endswith((".pdf", ".docx"))
+    if not file_processed:
+        logger.info(f"File processed={file_processed}")
+        return file_processed, iter(()), filename
+
+    # Download file from S3 in parts to local disk (pdf/docx readers need a seekable file)
+    f = tempfile.TemporaryFile()
+    try:
+        s3.download_fileobj(bucket_name, object_key, f)
+    except Exception:
+        f.close()
+        raise
+    logger.info(f"Reading contents of file={filename_lower}, file_bytes={f.tell()}")
+    f.seek(0)
+
+    logger.info(f"File processed={file_processed}")
+    return file_processed, extract_pages(f, filename_lower), filename
+###### END #####
+
+# extract text page by page, temporary file is closed (deleted) when done
+def extract_pages(f, filename_lower):
 
+    with f:
         # Handle PDF documents 
         if filename_lower.endswith(".pdf"):
             reader = PyPDF2.PdfReader(f)
             for page in reader.pages:
                 page_text = page.extract_text()
                 if page_text:
-                    text += page_text + "\n"
-            file_processed = True
-        # Handle word documents 
+                    yield page_text
+        # Handle word documents, paragraphs are yielded as pages
         elif filename_lower.endswith(".docx"):
             doc = Document(f)
-            text = "\n".join([p.text for p in doc.paragraphs if p.text.strip() != ""])
-            file_processed = True       
-        else:
-            file_processed = False                    
-
-    logger.info(f"File processed={file_processed}")
-    return file_processed, text, doc_id, filename
+            for p in doc.paragraphs:
+                if p.text.strip() != "":
+                    yield p.text
 ###### END #####
 
-#chunking
-def chunk_text(text, chunk_size=500, overlap=50):
+#chunking, rolling word window across pages, chunks are yielded as they fill
+def chunk_text(pages, chunk_size=500, overlap=50):
 
     logger.info("Creating chunks...")
-    words = text.split()
-    chunks = []
-    for i in range(0, len(words), chunk_size - overlap):
-        chunk = " ".join(words[i:i + chunk_size])
-        chunks.append(chunk)
-    return chunks
+    step = chunk_size - overlap
+    window = []
+    chunked = False
+    for page in pages:
+        window.extend(page.split())
+        while len(window) >= chunk_size:
+            yield " ".join(window[:chunk_size])
+            del window[:step]
+            chunked = True
+
+    # last chunk, unless it only holds the overlap of the previous one
+    if window and (not chunked or len(window) > overlap):
+        yield " ".join(window)
+###### END #####
+
+#Generate embeddings of chunks concurrently, yields (chunk, embedding) in chunk order
+def embed_chunks(bedrock_client, chunks, concurrency):
+
+    # in-flight requests are bounded, chunks are consumed as the bulk writer progresses
+    max_pending = concurrency * 2
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append((chunk, executor.submit(generate_embedding, bedrock_client, chunk)))
+            if len(pending) >= max_pending:
+                chunk, future = pending.popleft()
+                yield chunk, future.result()
+        while pending:
+            chunk, future = pending.popleft()
+            yield chunk, future.result()
 ###### END #####
 
 #Generate embeddings
-def generate_embedding(assumed_session, chunk):
+def generate_embedding(bedrock, chunk):
     
-    # Create Bedrock Runtime client
-    bedrock = assumed_session.client("bedrock-runtime")
+    model_id = os.getenv("EMBEDDING_MODEL_ID", "amazon.titan-embed-text-v2:0")
+
+    # identical chunks (for e.g. re-uploaded documents) are not embedded again
+    cache_key = get_embedding_cache_key(model_id, EMBEDDING_DIMENSIONS, chunk)
+    with embedding_cache_lock:
+        embedding = embedding_cache.get(cache_key)
+        if embedding is not None:
+            embedding_cache.move_to_end(cache_key)
+    if embedding is not None:
+        logger.info("Embedding found in cache for chunk")
+        return embedding
 
     # Titan Embeddings V2 request body
     request_body = {
         "inputText": chunk, 
-        "dimensions": 512
+        "dimensions": EMBEDDING_DIMENSIONS
         }
     
     # Invoke Titan embedding model
     response = bedrock.invoke_model(
-        modelId=os.getenv("EMBEDDING_MODEL_ID", "amazon.titan-embed-text-v2:0"),
+        modelId=model_id,
         body=json.dumps(request_body),
         contentType="application/json",
         accept="application/json"
@@ -165,33 +329,195 @@ def generate_embedding(assumed_session, chunk):
 
     embedding = response_body["embedding"]
     logger.info("Embedding generated for chunk")
+
+    # store in cache, least recently used entry is evicted when full
+    if EMBEDDING_CACHE_SIZE > 0:
+        with embedding_cache_lock:
+            embedding_cache[cache_key] = embedding
+            if len(embedding_cache) > EMBEDDING_CACHE_SIZE:
+                embedding_cache.popitem(last=False)
     
     return embedding
 ###### END #####
 
-#load docs to vector db
-def load_doc_to_db(
+#id of a source document, prefix of the ids of its chunks
+def get_source_key_id(object_key):
+    return hashlib.sha256(object_key.encode()).hexdigest()[:16]
+###### END #####
+
+#deterministic chunk id, same content of the same document gives the same id
+def get_chunk_id(key_id, chunk):
+
+    normalized = " ".join(chunk.split())
+    return f"{key_id}_{hashlib.sha256(normalized.encode()).hexdigest()[:32]}"
+###### END #####
+
+#manifest of a document, chunk id -> opensearch _ids of the chunks currently indexed for it
+#a chunk id with more than one _id is indexed more than once
+def load_manifest(db_client, index_name, key_id, page_size=MANIFEST_PAGE_SIZE):
+
+    # opensearch serverless vector collections generate the document _id,
+    # hence chunks are found by the doc_id prefix instead of by _id.
+    # Index refresh is near real time, chunks indexed in the last seconds may be missing
+    manifest = {}
+    search_after = None
+    while True:
+        body = {
+            "size": page_size,
+            "_source": ["doc_id"],
+            "query": {"prefix": {"doc_id": f"{key_id}_"}},
+            "sort": [{"doc_id": "asc"}]
+        }
+        if search_after is not None:
+            body["search_after"] = [search_after]
+        hits = db_client.search(index=index_name, body=body)["hits"]["hits"]
+
+        page = {}
+        for hit in hits:
+            page.setdefault(hit["_source"]["doc_id"], []).append(hit["_id"])
+
+        if len(hits) < page_size:
+            manifest.update(page)
+            break
+
+        # copies of a chunk share its doc_id, copies of the last chunk id of a full
+        # page may continue on the next page, hence it is read again by the next page
+        last = hits[-1]["_source"]["doc_id"]
+        if len(page) > 1:
+            del page[last]
+        else:
+            logger.warning(f"Chunk {last} has more copies than manifest page size, extra copies are not read")
+        manifest.update(page)
+        search_after = next(reversed(page))
+
+    logger.info(f"Manifest loaded, chunks={len(manifest)}, indexed docs={sum(map(len, manifest.values()))}")
+    return manifest
+######### End #########
+
+#delete chunks by chunk id
+def delete_chunks(db_client, index_name, chunk_ids, batch_size=1000):
+
+    chunk_ids = sorted(chunk_ids)
+    deleted = 0
+    for i in range(0, len(chunk_ids), batch_size):
+        response = db_client.delete_by_query(
+            index=index_name,
+            body={"query": {"terms": {"doc_id": chunk_ids[i:i + batch_size]}}}
+        )
+        deleted += response.get("deleted", 0)
+    return deleted
+######### End #########
+
+#delete chunk copies by opensearch _id
+def delete_chunk_copies(db_client, index_name, ids, batch_size=1000):
+
+    deleted = 0
+    for i in range(0, len(ids), batch_size):
+        response = db_client.delete_by_query(
+            index=index_name,
+            body={"query": {"ids": {"values": ids[i:i + batch_size]}}}
+        )
+        deleted += response.get("deleted", 0)
+    return deleted
+######### End #########
+
+#embedding cache key
+def get_embedding_cache_key(model_id, dimensions, text):
+
+    # only whitespace is normalized since embedding models are case sensitive
+    normalized = " ".join(text.split())
+    return hashlib.sha256(
+        f"{model_id}:{dimensions}:{normalized}".encode()
+    ).hexdigest()
+###### END #####
+
+#create document with chunk, embedding
+def build_document(
         chunk_id,       #chunk id
         chunk,          #chunk
         emb,            #generated embedding
-        filename,       #filename
-        db_client,      #db client 
-        index_name      #index name 
+        filename        #filename
     ):
 
-    # create document with chunk, embedding
-    document = {
+    return {
         "doc_id": chunk_id,
         "text": chunk,
         "source": filename,
         "embedding": emb
     }
-    
-    # insert document
-    response = db_client.index(index=index_name,body=document)
-    logger.info(f"Chunk={chunk_id} stored in db")
 ######### End #########
 
+#load docs to vector db with bulk requests
+def bulk_load_docs(
+        documents,                  #iterable of documents, consumed lazily
+        db_client,                  #db client
+        index_name,                 #index name
+        bulk_config: BulkConfig
+    ) -> BulkResult:
+
+    actions = ({"_index": index_name, "_source": document} for document in documents)
+
+    indexed = failed = 0
+    errors = {}
+    # docs rejected with 429 are retried by streaming_bulk with exponential backoff,
+    # other failures are reported per doc instead of failing the whole batch
+    for ok, item in streaming_bulk(
+            db_client,
+            actions,
+            chunk_size=bulk_config.chunk_size,
+            max_chunk_bytes=bulk_config.max_chunk_bytes,
+            max_retries=bulk_config.max_retries,
+            initial_backoff=bulk_config.initial_backoff,
+            max_backoff=bulk_config.max_backoff,
+            raise_on_error=False,
+            raise_on_exception=False
+        ):
+        if ok:
+            indexed += 1
+            continue
+
+        failed += 1
+        info = next(iter(item.values()))
+        error = info.get("error")
+        error_type = error.get("type") if isinstance(error, dict) else str(error)
+        key = f"{info.get('status')}:{error_type}"
+        errors[key] = errors.get(key, 0) + 1
+        if failed <= 10:
+            logger.error(f"❌ Indexing chunk failed: status={info.get('status')}, error={error}")
+
+    logger.info(f"Bulk indexing completed, indexed={indexed}, failed={failed}")
+    return BulkResult(indexed=indexed, failed=failed, errors=errors)
+######### End #########
+
+#bump knowledge base version
+def bump_kb_version(db_client, meta_index_name, filename):
+
+    # retrieval service uses latest "updated_at" as kb version in its cache keys
+    marker = {
+        "updated_at": int(time.time() * 1000),
+        "source": filename
+    }
+
+    try:
+        db_client.index(index=meta_index_name, body=marker)
+        logger.info(f"Knowledge base version bumped to v{marker['updated_at']}")
+    except Exception as e:
+        # documents are already ingested, cached answers will expire with cache ttl
+        logger.error(f"❌ FAILURE: Bumping kb version failed -> {e}")
+######### End #########
+
+#create bedrock runtime client
+def get_bedrock_client(assumed_session, embedding_config: EmbeddingConfig):
+
+    # adaptive retry mode retries throttled calls and rate limits the client,
+    # connection pool is sized for the embedding threads
+    config = Config(
+        retries={"max_attempts": embedding_config.max_attempts, "mode": "adaptive"},
+        max_pool_connections=max(10, embedding_config.concurrency)
+    )
+    return assumed_session.client("bedrock-runtime", config=config)
+#### END #######
+
 #create opensearch client
 def get_opensearch_client(assumed_session, os_host):
     
@@ -234,25 +560,93 @@ def lambda_handler(event, context):
        raise Exception("Deployment package is missing required dependencies.")
     
     logger.info("Lambda started")
-        
-    # Get bucket name and file key from S3 event
-    record = event["Records"][0]
+    service = get_ingestion_service()
+    records = event.get("Records", [])
+
+    # SQS trigger, messages hold S3 event notifications.
+    # Failed messages are reported so that only they are retried (ReportBatchItemFailures),
+    # messages left when the time runs short are reported too and re-delivered
+    if records and records[0].get("eventSource") == "aws:sqs":
+        failures = []
+        for position, message in enumerate(records):
+            if context.get_remaining_time_in_millis() < MESSAGE_TIME_RESERVE_MS:
+                logger.warning(f"Lambda is running out of time, returning {len(records) - position} unprocessed messages")
+                failures += [{"itemIdentifier": message["messageId"]} for message in records[position:]]
+                break
+            try:
+                for record in json.loads(message["body"]).get("Records", []):
+                    process_s3_record(service, record)
+            except Exception:
+                logger.exception(f"❌ Processing message={message['messageId']} failed")
+                failures.append({"itemIdentifier": message["messageId"]})
+        logger.info(f"Processed {len(records)} messages, failed={len(failures)}")
+        return {"batchItemFailures": failures}
+
+    # S3 trigger, every record of the event is processed
+    failed = 0
+    for record in records:
+        try:
+            process_s3_record(service, record)
+        except Exception:
+            failed += 1
+            s3 = record.get("s3", {})
+            logger.exception(
+                f"❌ Processing record failed, bucket={s3.get('bucket', {}).get('name')}, "
+                f"key={s3.get('object', {}).get('key')}"
+            )
+    logger.info(f"Processed {len(records)} records, failed={failed}")
+    # already indexed chunks are skipped, hence a retry of the whole event mostly redoes failed documents
+    if failed:
+        raise RuntimeError(f"Ingestion failed for {failed} of {len(records)} records")
+## end ##
+
+# process one S3 event record, ingests created documents and purges removed ones
+def process_s3_record(service: KnowledgeIngestionService, record):
 
+    event_name = record.get("eventName", "")
     bucket_name = record["s3"]["bucket"]["name"]
     object_key = urllib.parse.unquote_plus(
         record["s3"]["object"]["key"]
     )
-    logger.info(f"Bucket name: {bucket_name}, Object key: {object_key}")
+    logger.info(f"Event: {event_name}, Bucket name: {bucket_name}, Object key: {object_key}")
+
+    #document deleted from bucket
+    if event_name.startswith("ObjectRemoved"):
+        service.doc_removal(object_key)
+        return
+
+    #execute the service
+    service.doc_ingestion(bucket_name, object_key)
+## end ##
+
+# ingestion service, created once per lambda execution environment
+def get_ingestion_service() -> KnowledgeIngestionService:
 
+    global ingestion_service
+    if ingestion_service is not None:
+        return ingestion_service
+
+    index_name = os.getenv("INDEX_NAME", "enterprise-rag-index")
     db_info = VectorDBInfo(
         os_host=os.environ["VECTOR_DB_HOSTNAME"].replace("https://", ""),
-        index_name=os.getenv("INDEX_NAME", "enterprise-rag-index")
+        index_name=index_name,
+        meta_index_name=os.getenv("KB_META_INDEX_NAME", f"{index_name}-meta")
+    )
+
+    bulk_config = BulkConfig(
+        chunk_size=int(os.getenv("BULK_CHUNK_SIZE", "100")),
+        max_chunk_bytes=int(os.getenv("BULK_MAX_CHUNK_BYTES", str(5 * 1024 * 1024))),
+        max_retries=int(os.getenv("BULK_MAX_RETRIES", "5")),
+        initial_backoff=float(os.getenv("BULK_INITIAL_BACKOFF", "1.0"))
+    )
+    embedding_config = EmbeddingConfig(
+        concurrency=int(os.getenv("EMBEDDING_CONCURRENCY", "8")),
+        max_attempts=int(os.getenv("EMBEDDING_MAX_ATTEMPTS", "8"))
     )
 
     #create ingestion service
-    service = KnowledgeIngestionService()
-    #execute the service
-    service.doc_ingestion(bucket_name, object_key, db_info)
+    ingestion_service = KnowledgeIngestionService(db_info, bulk_config, embedding_config)
+    return ingestion_service
 ## end ##
 
 ########### Functions block End ###################        
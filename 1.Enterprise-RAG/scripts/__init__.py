@@ -1,12 +1,25 @@
 from .aws_utilities import get_tempSession_assumeRole, get_opensearch_client
 from .aws_utilities import AwsCredentials, VectorDBInfo
-from .gen_embedding import generate_embedding
+from .gen_embedding import generate_embedding, agenerate_embedding
 from .init_llm import init_llm
-from .graph import execute_graph, create_graph
+from .graph import execute_graph, aexecute_graph, create_graph
 from .startup import startup
 from .retrieval_service import RetrievalService
-from .create_index import create_index
+from .create_index import create_index, create_meta_index
 from .ui_layout import ui_login, ui_logout, ui_access_denied
 from .guardrails_classes import ClaimsStatus, GuardrailResult
 from .guardrails_service import GuardrailService
 from .cache import Cache, LocalCache, RedisCache, CacheType
+from .cache import SemanticIndex, RedisSemanticIndex, EmbeddingCache, CircuitBreaker
+from .kb_version import KnowledgeBaseVersion
+from .cache_codec import CacheCodec
+from .single_flight import SingleFlight, RedisSingleFlight
+from .settings import Settings
+from .cache_warmer import QueryFrequency, CacheWarmer
+from .metrics import stage, track_request, start_metrics_server
+from .session_store import SessionStore, LocalSessionStore, RedisSessionStore, SessionSummarizer
+from .hybrid_search import bm25_query, reciprocal_rank_fusion, fuse_hybrid
+from .reranker import Reranker, LexicalReranker, CrossEncoderReranker, create_reranker
+from .context_packer import pack_context
+from .tokens import estimate_tokens, context_token_budget
+from .faithfulness import lexical_faithfulness
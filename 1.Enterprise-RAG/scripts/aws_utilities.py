@@ -57,7 +57,7 @@ def get_tempSession_assumeRole(awsCreds: AwsCredentials):
     return assumed_session
 
 #create opensearch client
-def get_opensearch_client(assumed_session, os_host):
+def get_opensearch_client(assumed_session, os_host, pool_maxsize=10):
     
     service = "aoss" #service name for serverless opensearch collections
     
@@ -84,7 +84,8 @@ def get_opensearch_client(assumed_session, os_host):
         http_auth=awsauth,
         use_ssl=True,
         verify_certs=True,
-        connection_class=RequestsHttpConnection
+        connection_class=RequestsHttpConnection,
+        pool_maxsize=pool_maxsize #connections kept per host, one per worker thread
     )
 
     return client
@@ -1,12 +1,22 @@
 from abc import ABC, abstractmethod
 from typing import Optional
+from array import array
+from collections import OrderedDict
+import base64
+import math
+import threading
 import time
 import hashlib
+import asyncio
 import redis
+from redis import asyncio as aioredis
+import numpy as np
 import logging
 from enum import Enum
 import json
 from typing import Any
+from cache_codec import CacheCodec
+from metrics import record_cache
 
 logger = logging.getLogger(__name__)
 
@@ -22,14 +32,47 @@ class CacheType(Enum):
 #makes it easier to move to redis later
 class Cache(ABC):
 
+    def __init__(
+            self,
+            semantic_index: Optional["SemanticIndex"] = None,
+            ttl: int = 86400,
+            codec: CacheCodec | None = None
+        ):
+        #semantic tier, None when semantic cache is disabled
+        self.semantic_index = semantic_index
+        #expiry of cached responses, entries are also invalidated by kb version
+        self.ttl = ttl
+        #serializer for cached values
+        self.codec = codec or CacheCodec()
+
     @abstractmethod
-    def get(self, key: str) -> Optional[str]:
+    def get(self, key: str) -> Optional[bytes]:
         pass
 
     @abstractmethod
     def set(self, key: str, value: Any, ex: int | None = None):
         pass
 
+    ## get multiple items, backends override this to use a single round trip ##
+    def mget(self, keys: list[str]) -> list[Optional[bytes]]:
+        return [self.get(key) for key in keys]
+
+    ## put multiple items, backends override this to use a single round trip ##
+    def mset(self, items: dict[str, Any], ex: int | None = None):
+        for key, value in items.items():
+            self.set(key, value, ex)
+
+    ## async variants, by default offloaded to the worker pool ##
+    async def aget(self, key: str) -> Optional[bytes]:
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: Any, ex: int | None = None):
+        return await asyncio.to_thread(self.set, key, value, ex)
+
+    async def amget(self, keys: list[str]) -> list[Optional[bytes]]:
+        return await asyncio.to_thread(self.mget, keys)
+    ## end ##
+
     ## helper functions ##
 
     ## normalize the input query ##
@@ -48,105 +91,673 @@ class Cache(ABC):
     ## end ##
 
     ## query cache ##
-    def query_cache(self, query: str):
+    def query_cache(self, query: str, kb_version: str):
 
         ## generate the query key ##
-        key = self.generate_cache_key(query=query, kb_version="v1")
+        key = self.generate_cache_key(query=query, kb_version=kb_version)
 
-        logger.info("calling redis")
         cached_response = self.get(key)
-        logger.info("redis call done")
 
-        if cached_response is not None:
-            data = json.loads(cached_response)
-            logger.info("CACHE HIT")
-        else:
-            data = cached_response
+        return self.decode_response(cached_response)
+    ## end ##
+
+    ## query cache without blocking the event loop ##
+    async def aquery_cache(self, query: str, kb_version: str):
+
+        ## generate the query key ##
+        key = self.generate_cache_key(query=query, kb_version=kb_version)
+
+        cached_response = await self.aget(key)
+
+        return self.decode_response(cached_response)
+    ## end ##
+
+    ## query cache for several queries in one round trip ##
+    def query_cache_many(self, queries: list[str], kb_version: str) -> list[dict | None]:
+
+        keys = [self.generate_cache_key(query=query, kb_version=kb_version) for query in queries]
+
+        return [self.decode_response(cached) for cached in self.mget(keys)]
+    ## end ##
+
+    ## decode cached response, None on miss ##
+    def decode_response(self, cached_response: Optional[bytes]):
+
+        if cached_response is None:
             logger.info("CACHE MISS")
+            return None
+
+        try:
+            data = self.codec.decode(cached_response)
+        except Exception as e:
+            # unreadable entry (for e.g. codec package missing), served as a miss
+            logger.error(f"❌ Decoding cached response failed, serving as cache miss: {e}")
+            return None
 
+        logger.info("CACHE HIT")
         return data
     ## end ##
 
+    ## query semantic cache, returns response of the most similar cached query ##
+    ## lookups are recorded as hit, near_miss (similarity within the margin below threshold) or miss
+    def semantic_query_cache(self, embedding: list[float], kb_version: str):
+
+        if self.semantic_index is None:
+            return None
+
+        try:
+            key, score = self.semantic_index.search(embedding, kb_version)
+        except Exception as e:
+            # semantic tier is best effort, failure is treated as a miss
+            logger.error(f"❌ Semantic cache search failed: {e}")
+            record_cache("semantic", "miss")
+            return None
+        threshold = self.semantic_index.threshold
+
+        if key is not None and score >= threshold:
+            cached_response = self.get(key)
+            if cached_response is not None:
+                record_cache("semantic", "hit")
+                logger.info(f"SEMANTIC CACHE HIT, similarity={score:.4f}")
+                return self.decode_response(cached_response)
+            # response has expired, drop the stale vector
+            self.semantic_index.remove(key)
+
+        if key is not None and score >= threshold - self.semantic_index.near_miss_margin:
+            record_cache("semantic", "near_miss")
+            logger.info(f"SEMANTIC CACHE NEAR MISS, similarity={score:.4f}, threshold={threshold}")
+        else:
+            record_cache("semantic", "miss")
+            logger.info("SEMANTIC CACHE MISS")
+
+        return None
+    ## end ##
+
     ## update cache ##
     def update_cache(
             self, 
             query: str,
-            response: dict
+            response: dict,
+            kb_version: str,
+            embedding: list[float] | None = None
         ):
 
         ## generate the query key ##
-        key = self.generate_cache_key(query=query, kb_version="v1")
+        key = self.generate_cache_key(query=query, kb_version=kb_version)
     
         logger.info("Cache missed, loading response in cache...")
         self.set(
             key=key,
             value=response,
-            ex=86400  # 1 day
+            ex=self.ttl
         )
+
+        ## store query embedding so that paraphrased queries can hit this entry ##
+        if self.semantic_index is not None and embedding is not None:
+            try:
+                self.semantic_index.add(key, embedding, kb_version, ex=self.ttl)
+            except Exception as e:
+                logger.error(f"❌ Semantic cache update failed: {e}")
+    ## end ##
 ## end ##        
 
 ## redis cache
+## uses a bounded connection pool with socket timeouts for sync and async clients.
+## redis failures trip a circuit breaker and are served as cache misses so that a
+## slow or unreachable redis does not add latency to the request path
 class RedisCache(Cache):
 
-    def __init__(self, host, port = 6379):
+    def __init__(
+            self,
+            host,
+            port = 6379,
+            semantic_cache: dict | None = None,
+            ttl: int = 86400,
+            codec: CacheCodec | None = None,
+            max_connections: int = 50,
+            socket_timeout: float = 0.5,
+            socket_connect_timeout: float = 0.5,
+            health_check_interval: int = 30,
+            breaker: Optional["CircuitBreaker"] = None
+        ):
+        pool_settings = {
+            "host": host,
+            "port": port,
+            "decode_responses": False,  #values are binary, encoded by codec
+            "max_connections": max_connections,
+            "socket_timeout": socket_timeout,
+            "socket_connect_timeout": socket_connect_timeout,
+            "health_check_interval": health_check_interval,
+        }
         self.client = redis.Redis(
-            host=host,
-            port=port,
-            ssl=True,
-            decode_responses=True
-    )
+            connection_pool=redis.ConnectionPool(
+                connection_class=redis.SSLConnection, **pool_settings
+            )
+        )
+        self.async_client = aioredis.Redis(
+            connection_pool=aioredis.ConnectionPool(
+                connection_class=aioredis.SSLConnection, **pool_settings
+            )
+        )
+        self.breaker = breaker or CircuitBreaker()  #shared by all redis backed components
+        super().__init__(
+            RedisSemanticIndex(self.client, breaker=self.breaker, **semantic_cache) if semantic_cache else None,
+            ttl,
+            codec
+        )
 
     ## get the item from cache ##
     def get(self, key: str):
         logger.info("trying to get key from redis")
-        return self.client.get(key)
+        return self.breaker.call(self.client.get, key)
     ## end ##
 
     ## put item into cache ##
     def set(self, key: str, value: Any, ex: int | None = 86400):
-        self.client.set(key, json.dumps(value), ex=ex)
+        self.breaker.call(self.client.set, key, self.codec.encode(value), ex=ex)
+    ## end ##
+
+    ## get multiple items in one round trip ##
+    def mget(self, keys: list[str]) -> list[Optional[bytes]]:
+        if not keys:
+            return []
+        return self.breaker.call(self.client.mget, keys, default=[None] * len(keys))
+    ## end ##
+
+    ## put multiple items in one pipelined round trip ##
+    def mset(self, items: dict[str, Any], ex: int | None = 86400):
+        pipe = self.client.pipeline(transaction=False)
+        for key, value in items.items():
+            pipe.set(key, self.codec.encode(value), ex=ex)
+        self.breaker.call(pipe.execute)
+    ## end ##
+
+    ## async variants using redis.asyncio client ##
+    async def aget(self, key: str) -> Optional[bytes]:
+        return await self.breaker.acall(self.async_client.get, key)
+
+    async def aset(self, key: str, value: Any, ex: int | None = 86400):
+        await self.breaker.acall(self.async_client.set, key, self.codec.encode(value), ex=ex)
+
+    async def amget(self, keys: list[str]) -> list[Optional[bytes]]:
+        if not keys:
+            return []
+        return await self.breaker.acall(self.async_client.mget, keys, default=[None] * len(keys))
     ## end ##
 
 ## end ##        
 
+## circuit breaker, opens after failure_threshold consecutive failures.
+## while open all calls are short-circuited, after reset_timeout one probe call
+## is let through (half-open) and its result closes or re-opens the breaker.
+## one instance is shared by all components using the same redis, so that an
+## outage detected by one of them short-circuits the others as well
+class CircuitBreaker:
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: int = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    ## check if call is allowed ##
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._probing or time.time() - self._opened_at < self.reset_timeout:
+                return False
+            # half-open, let one probe call through
+            self._probing = True
+            return True
+    ## end ##
+
+    def record_success(self):
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info("Circuit breaker closed, redis is reachable again")
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    logger.error("⛔ Circuit breaker opened, redis calls are short-circuited")
+                self._opened_at = time.time()
+
+    ## execute redis call guarded by circuit breaker, returns default on failure ##
+    def call(self, func, *args, default=None, **kwargs):
+        if not self.allow():
+            return default
+        try:
+            result = func(*args, **kwargs)
+        except (redis.RedisError, OSError) as e:
+            self.record_failure()
+            logger.error(f"❌ Redis call failed, serving default: {e}")
+            return default
+        self.record_success()
+        return result
+
+    async def acall(self, func, *args, default=None, **kwargs):
+        if not self.allow():
+            return default
+        try:
+            result = await func(*args, **kwargs)
+        except (redis.RedisError, OSError) as e:
+            self.record_failure()
+            logger.error(f"❌ Redis call failed, serving default: {e}")
+            return default
+        self.record_success()
+        return result
+    ## end ##
+
+## end ##
+
 
 ## local cache to test before moving to redis
+## bounded LRU cache, least recently used entries are evicted when max_entries
+## or max_bytes is exceeded. Expired entries are dropped on read and by a periodic
+## sweep, so entries which are never read again do not stay in memory
 class LocalCache(Cache):
 
-    def __init__(self):
-        self._store = {}
+    def __init__(
+            self,
+            semantic_cache: dict | None = None,
+            max_entries: int = 10000,
+            max_bytes: int = 64 * 1024 * 1024,
+            sweep_interval: int = 60,
+            ttl: int = 86400,
+            codec: CacheCodec | None = None
+        ):
+        self._store = OrderedDict()  #key -> (value, expiry, size in bytes)
+        self._lock = threading.Lock()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+        self._last_sweep = time.time()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        super().__init__(
+            SemanticIndex(**semantic_cache) if semantic_cache else None,
+            ttl,
+            codec
+        )
 
     ## get the item from cache ##
     def get(self, key: str):
-        item = self._store.get(key)
+        with self._lock:
+            item = self._store.get(key)
+
+            if item is None:
+                self._misses += 1
+                return None
+
+            #item is a tuple, value = item[0], expiry = item[1], size = item[2]
+            value, expiry, _ = item
+
+            #check if key is expired
+            if expiry and expiry < time.time():
+                #if expired then delete expired item
+                self._delete(key)
+                self._expirations += 1
+                self._misses += 1
+                return None
+
+            #mark as most recently used
+            self._store.move_to_end(key)
+            self._hits += 1
+            return value
+    ## end ##
 
-        if item is None:
-            return None
+    ## put item into cache ##
+    def set(self, key: str, value: Any, ex: int | None = 86400):
+        
+        #set expiry time
+        now = time.time()
+        expiry = now + ex if ex else None
+
+        #serialized like redis so query_cache can decode it
+        value = self.codec.encode(value)
+        size = len(key) + len(value)
+
+        if size > self.max_bytes:
+            logger.info("Item is larger than LOCAL_CACHE_MAX_BYTES, skipping cache update")
+            return
+
+        with self._lock:
+            #amortized expiry sweep
+            if now - self._last_sweep > self.sweep_interval:
+                self._sweep(now)
+
+            #store the item
+            if key in self._store:
+                self._delete(key)
+            self._store[key] = (value, expiry, size)
+            self._bytes += size
+
+            #evict least recently used items
+            while len(self._store) > self.max_entries or self._bytes > self.max_bytes:
+                self._delete(next(iter(self._store)))
+                self._evictions += 1
+    ## end ##
 
-        #item is a tuple, with two items, value = item[0], expiry = item[1]
-        # below line unpacks both fields of tuple in one line
-        # upack items 
-        value, expiry = item
+    ## cache statistics ##
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._store),
+                "bytes": self._bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+            }
+    ## end ##
 
-        #check if key is expired
-        if expiry and expiry < time.time():
-            #if expired then delete expired item
-            del self._store[key]
-            return None
+    ## delete item, caller must hold the lock ##
+    def _delete(self, key: str):
+        _, _, size = self._store.pop(key)
+        self._bytes -= size
+    ## end ##
 
-        return value
+    ## drop all expired items, caller must hold the lock ##
+    def _sweep(self, now: float):
+        expired = [
+            key for key, (_, expiry, _) in self._store.items()
+            if expiry and expiry < now
+        ]
+        for key in expired:
+            self._delete(key)
+        self._expirations += len(expired)
+        self._last_sweep = now
+        if expired:
+            logger.info(f"Local cache sweep removed {len(expired)} expired items")
     ## end ##
 
-    ## put item into cache ##
-    def set(self, key: str, value: str, ex: int | None = 86400):
-        
-        #set expiry time
+## end ##
+
+## in-memory vector index over cached query embeddings
+## vectors are stored unit-normalized, one row per entry of a preallocated float32
+## matrix, so the closest entry is found with one matrix-vector product
+class SemanticIndex:
+
+    def __init__(self, threshold: float = 0.92, near_miss_margin: float = 0.05, max_entries: int = 5000):
+        self.threshold = threshold
+        self.near_miss_margin = near_miss_margin
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._reset(0)
+
+    ## empty index for vectors of the given dimensions ##
+    def _reset(self, dimensions: int):
+        self._rows: OrderedDict[str, int] = OrderedDict()  #key -> row, oldest first
+        self._keys: list[str | None] = [None] * self.max_entries
+        self._free = list(range(self.max_entries - 1, -1, -1))
+        self._matrix = np.zeros((self.max_entries, dimensions), dtype=np.float32)
+        self._expiry = np.full(self.max_entries, np.inf)
+        self._versions = np.full(self.max_entries, -1, dtype=np.int32)  #-1: empty row
+        self._version_ids: dict[str, int] = {}
+    ## end ##
+
+    ## return (key, similarity) of the closest non-expired vector of the given kb version ##
+    def search(self, embedding: list[float], kb_version: str):
+        query = normalize_vector(embedding)
+
+        with self._lock:
+            version = self._version_ids.get(kb_version)
+            if version is None or len(query) != self._matrix.shape[1]:
+                return None, -1.0
+
+            for row in np.flatnonzero((self._versions >= 0) & (self._expiry < time.time())):
+                self._remove_row(int(row))
+
+            scores = self._matrix @ query
+            scores[self._versions != version] = -np.inf
+            row = int(np.argmax(scores))
+            if scores[row] == -np.inf:
+                return None, -1.0
+            return self._keys[row], float(scores[row])
+    ## end ##
+
+    ## add vector, oldest entry is evicted when index is full ##
+    def add(self, key: str, embedding: list[float], kb_version: str, ex: int | None = 86400):
+        self._insert(key, normalize_vector(embedding), time.time() + ex if ex else None, kb_version)
+    ## end ##
+
+    ## remove vector ##
+    def remove(self, key: str):
+        with self._lock:
+            row = self._rows.get(key)
+            if row is not None:
+                self._remove_row(row)
+    ## end ##
+
+    ## helper functions, callers hold the lock except for _insert ##
+    def _insert(self, key: str, vector, expiry: float | None, kb_version: str):
+        with self._lock:
+            if len(vector) != self._matrix.shape[1]:
+                # embedding model (dimensions) changed, previous vectors are not comparable
+                self._reset(len(vector))
+            row = self._rows.pop(key, None)
+            if row is None:
+                if not self._free:
+                    self._remove_row(next(iter(self._rows.values())))
+                row = self._free.pop()
+            self._rows[key] = row
+            self._keys[row] = key
+            self._matrix[row] = vector
+            self._expiry[row] = expiry or np.inf
+            self._versions[row] = self._version_ids.setdefault(kb_version, len(self._version_ids))
+
+    def _remove_row(self, row: int):
+        del self._rows[self._keys[row]]
+        self._keys[row] = None
+        self._versions[row] = -1
+        self._free.append(row)
+    ## end ##
+
+## end ##
+
+## redis backed vector index, vectors are shared by all pods through a redis hash
+## search runs on a local snapshot of the hash which is refreshed by a background
+## task (run), so that the request path never waits for the hash to be read
+class RedisSemanticIndex(SemanticIndex):
+
+    INDEX_KEY = "semantic-cache:index"
+
+    def __init__(
+            self,
+            client,
+            refresh_interval: int = 30,
+            max_backoff: int = 300,
+            breaker: CircuitBreaker | None = None,
+            **kwargs
+        ):
+        super().__init__(**kwargs)
+        self.client = client
+        self.breaker = breaker or CircuitBreaker()
+        self.refresh_interval = refresh_interval
+        self.max_backoff = max_backoff  #seconds, max delay between failed refreshes
+
+    ## add vector to local snapshot and redis ##
+    def add(self, key: str, embedding: list[float], kb_version: str, ex: int | None = 86400):
+        vector = normalize_vector(embedding)
         expiry = time.time() + ex if ex else None
+        self._insert(key, vector, expiry, kb_version)
+        self.breaker.call(self.client.hset, self.INDEX_KEY, key, json.dumps({
+            "e": expiry,
+            "k": kb_version,
+            "v": encode_vector(vector)
+        }))
+    ## end ##
+
+    ## remove vector from local snapshot and redis ##
+    def remove(self, key: str):
+        super().remove(key)
+        self.breaker.call(self.client.hdel, self.INDEX_KEY, key)
+    ## end ##
+
+    ## refresh snapshot periodically, failed refreshes back off exponentially ##
+    async def run(self):
+        delay = 0
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                await asyncio.to_thread(self.refresh)
+                delay = self.refresh_interval
+            except Exception as e:
+                delay = min(max(delay, self.refresh_interval) * 2, self.max_backoff)
+                logger.error(f"❌ Semantic cache index refresh failed, retrying in {delay}s: {e}")
+    ## end ##
+
+    ## reload local snapshot from redis, expired vectors are purged ##
+    def refresh(self):
+        logger.info("Refreshing semantic cache index from redis...")
+        now = time.time()
+        entries, expired = [], []
+
+        # hash is read incrementally so that redis is not blocked by one large reply
+        items = self.breaker.call(lambda: list(self.client.hscan_iter(self.INDEX_KEY, count=1000)))
+        if items is None:
+            # keep the current snapshot, run() retries with backoff
+            raise RuntimeError("redis is unavailable")
+
+        for key, raw in items:
+            key = key.decode() if isinstance(key, bytes) else key
+            item = json.loads(raw)
+            if item["e"] and item["e"] < now:
+                expired.append(key)
+                continue
+            entries.append((key, item["e"], item.get("k"), item["v"]))
+
+        if expired:
+            self.breaker.call(self.client.hdel, self.INDEX_KEY, *expired)
+
+        # keep the most recently expiring entries when redis holds more than max_entries
+        entries.sort(key=lambda entry: entry[1] or math.inf)
+        entries = entries[-self.max_entries:]
+
+        # snapshot is built aside and swapped in, searches are not blocked meanwhile
+        snapshot = SemanticIndex(self.threshold, self.near_miss_margin, self.max_entries)
+        for key, expiry, kb_version, raw in entries:
+            snapshot._insert(key, np.frombuffer(base64.b64decode(raw), dtype=np.float32), expiry, kb_version)
+
+        with self._lock:
+            (
+                self._rows, self._keys, self._free, self._matrix,
+                self._expiry, self._versions, self._version_ids
+            ) = (
+                snapshot._rows, snapshot._keys, snapshot._free, snapshot._matrix,
+                snapshot._expiry, snapshot._versions, snapshot._version_ids
+            )
+        logger.info(f"Semantic cache index refreshed, entries={len(entries)}")
+    ## end ##
+
+## end ##
+
+## embedding cache, avoids a bedrock round trip for text which is already embedded
+## in-process LRU bounded by max_entries, optionally backed by redis to share across pods
+class EmbeddingCache:
 
-        #store the item
-        self._store[key] = (value, expiry)
+    KEY_PREFIX = "embedding:"
+
+    def __init__(
+            self,
+            max_entries: int = 10000,
+            client=None,
+            ex: int | None = 604800,
+            breaker: CircuitBreaker | None = None
+        ):
+        self.max_entries = max_entries
+        self.client = client  #redis client, None for in-process only
+        self.ex = ex          #redis expiry, 7 days by default
+        self.breaker = breaker or CircuitBreaker()
+        self._store = OrderedDict()
+        self._lock = threading.Lock()
+
+    ## generate key ##
+    def generate_key(self, model_id: str, dimensions: int, text: str) -> str:
+        # only whitespace is normalized since embedding models are case sensitive
+        normalized = " ".join(text.split())
+        return self.KEY_PREFIX + hashlib.sha256(
+            f"{model_id}:{dimensions}:{normalized}".encode()
+        ).hexdigest()
+    ## end ##
+
+    ## get embedding, None on miss ##
+    def get(self, model_id: str, dimensions: int, text: str) -> list[float] | None:
+        key = self.generate_key(model_id, dimensions, text)
+
+        with self._lock:
+            embedding = self._store.get(key)
+            if embedding is not None:
+                self._store.move_to_end(key)
+                return embedding
+
+        if self.client is None:
+            return None
+
+        raw = self.breaker.call(self.client.get, key)
+        if raw is None:
+            return None
+
+        embedding = decode_vector(raw)
+        self._put_local(key, embedding)
+        return embedding
+    ## end ##
+
+    ## put embedding ##
+    def set(self, model_id: str, dimensions: int, text: str, embedding: list[float]):
+        key = self.generate_key(model_id, dimensions, text)
+        self._put_local(key, embedding)
+
+        if self.client is None:
+            return
+
+        self.breaker.call(self.client.set, key, encode_vector(embedding), ex=self.ex)
+    ## end ##
+
+    ## put embedding in local LRU, least recently used entry is evicted when full ##
+    def _put_local(self, key: str, embedding: list[float]):
+        with self._lock:
+            self._store[key] = embedding
+            self._store.move_to_end(key)
+            if len(self._store) > self.max_entries:
+                self._store.popitem(last=False)
     ## end ##
 
 ## end ##
         
-########## Class definition END ##########        
+########## Class definition END ##########
+
+########## Functions BEGIN ##########
+
+## scale vector to unit length, float32 array ##
+def normalize_vector(embedding) -> np.ndarray:
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = float(np.linalg.norm(vector)) or 1.0
+    return vector / norm
+## end ##
+
+## pack float vector as base64 encoded float32 bytes ##
+def encode_vector(vector) -> str:
+    return base64.b64encode(np.asarray(vector, dtype=np.float32).tobytes()).decode()
+## end ##
+
+## unpack base64 encoded float32 bytes ##
+def decode_vector(raw: str | bytes) -> list[float]:
+    return array("f", base64.b64decode(raw)).tolist()
+## end ##
+
+########## Functions END ##########        
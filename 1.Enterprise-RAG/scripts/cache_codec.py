@@ -0,0 +1,111 @@
+import json
+import threading
+import logging
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+## optional packages, codec falls back to stdlib json when not installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+########## Class definition BEGIN ##########
+
+## serializes cached values into compact bytes
+## format: 1 header byte + payload. Lower bits of the header select the
+## serializer, high bit marks zstd compressed payload. Header values never
+## collide with the first byte of json text, entries written before the codec
+## existed (plain json) are still readable.
+class CacheCodec:
+
+    JSON = 0x01
+    MSGPACK = 0x02
+    COMPRESSED = 0x80
+
+    def __init__(self, codec: str = "json", compression_threshold: int = 0, compression_level: int = 3):
+
+        self.format = self.MSGPACK if codec == "msgpack" else self.JSON
+        if self.format == self.MSGPACK and msgpack is None:
+            logger.warning("msgpack is not installed, falling back to json cache codec")
+            self.format = self.JSON
+
+        #payloads larger than threshold (bytes) are compressed, 0 disables compression
+        self.compression_threshold = compression_threshold
+        if self.compression_threshold and zstandard is None:
+            logger.warning("zstandard is not installed, cache compression is disabled")
+            self.compression_threshold = 0
+
+        self.compression_level = compression_level
+        #zstd compressor/decompressor objects are not thread safe
+        self._local = threading.local()
+
+    ## encode value ##
+    def encode(self, value: Any) -> bytes:
+
+        if self.format == self.MSGPACK:
+            payload = msgpack.packb(value, use_bin_type=True)
+        elif orjson is not None:
+            payload = orjson.dumps(value)
+        else:
+            payload = json.dumps(value).encode()
+
+        header = self.format
+        if self.compression_threshold and len(payload) > self.compression_threshold:
+            payload = self._compressor().compress(payload)
+            header |= self.COMPRESSED
+
+        return bytes([header]) + payload
+    ## end ##
+
+    ## decode value ##
+    def decode(self, raw: bytes | str) -> Any:
+
+        # plain json text, written before the codec existed
+        if isinstance(raw, str):
+            return json.loads(raw)
+        if not raw or (raw[0] & ~self.COMPRESSED) not in (self.JSON, self.MSGPACK):
+            return json.loads(raw)
+
+        header, payload = raw[0], raw[1:]
+
+        if header & self.COMPRESSED:
+            if zstandard is None:
+                raise ValueError("cached value is zstd compressed but zstandard is not installed")
+            payload = self._decompressor().decompress(payload)
+
+        match header & ~self.COMPRESSED:
+            case self.MSGPACK:
+                if msgpack is None:
+                    raise ValueError("cached value is msgpack encoded but msgpack is not installed")
+                return msgpack.unpackb(payload, raw=False)
+            case self.JSON:
+                return orjson.loads(payload) if orjson is not None else json.loads(payload)
+            case _:
+                raise ValueError(f"unknown cache codec header={header}")
+    ## end ##
+
+    def _compressor(self):
+        if not hasattr(self._local, "compressor"):
+            self._local.compressor = zstandard.ZstdCompressor(level=self.compression_level)
+        return self._local.compressor
+
+    def _decompressor(self):
+        if not hasattr(self._local, "decompressor"):
+            self._local.decompressor = zstandard.ZstdDecompressor()
+        return self._local.decompressor
+
+## end ##
+
+########## Class definition END ##########
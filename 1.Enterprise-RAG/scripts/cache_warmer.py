@@ -0,0 +1,216 @@
+from collections import Counter
+import asyncio
+import threading
+import logging
+from cache import CircuitBreaker
+logger = logging.getLogger(__name__)
+
+########## Class definition BEGIN ##########
+
+## frequency of normalized user queries, source of the queries to warm.
+## counts are kept in memory and, when a redis client is given, merged into a
+## sorted set shared by all pods so that warming uses the traffic of the whole fleet.
+## pending increments are merged every flush_interval seconds by run() and are
+## capped at max_pending distinct queries, the least frequent ones are dropped.
+## The sorted set is trimmed to max_entries on every merge and expires ttl
+## seconds after the last merge, so counts of an idle deployment do not linger
+class QueryFrequency:
+
+    KEY = "query-frequency"
+
+    def __init__(
+            self,
+            client=None,
+            max_entries: int = 10000,
+            max_pending: int = 1000,
+            flush_interval: int = 60,
+            ttl: int = 7 * 86400,
+            breaker: CircuitBreaker | None = None
+        ):
+        self.client = client  #sync redis client
+        self.max_entries = max_entries
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval
+        self.ttl = ttl  #seconds, 0: no expiry
+        self.breaker = breaker or CircuitBreaker()
+        self._counts: Counter = Counter()
+        self._pending: Counter = Counter()  #increments not yet merged into redis
+        self._lock = threading.Lock()
+
+    ## normalize the input query, same as cache keys ##
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        return " ".join(query.lower().strip().split())
+    ## end ##
+
+    ## count a query ##
+    def record(self, query: str, count: int = 1):
+
+        normalized = self.normalize_query(query)
+        if not normalized:
+            return
+
+        with self._lock:
+            self._counts[normalized] += count
+            if self.client is not None:
+                self._pending[normalized] += count
+                # bounded between flushes, same amortized trimming as local counts
+                if len(self._pending) > 2 * self.max_pending:
+                    self._pending = Counter(dict(self._pending.most_common(self.max_pending)))
+
+            # amortized trimming, long tail of one-off queries is dropped
+            if len(self._counts) > 2 * self.max_entries:
+                self._counts = Counter(dict(self._counts.most_common(self.max_entries)))
+    ## end ##
+
+    ## count queries from a log file, one query per line ##
+    def load_log(self, path: str):
+
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                self.record(line)
+        logger.info(f"Query log loaded from {path}, distinct queries={len(self._counts)}")
+    ## end ##
+
+    ## merge pending counts into redis ##
+    def flush(self):
+
+        if self.client is None:
+            return
+
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+        if not pending:
+            return
+
+        pipe = self.client.pipeline(transaction=False)
+        for query, count in pending.items():
+            pipe.zincrby(self.KEY, count, query)
+        # keep only the most frequent queries
+        pipe.zremrangebyrank(self.KEY, 0, -(self.max_entries + 1))
+        if self.ttl:
+            pipe.expire(self.KEY, self.ttl)
+        if self.breaker.call(pipe.execute) is None:
+            logger.error("❌ Merging query frequency into redis failed, pending counts are dropped")
+    ## end ##
+
+    ## merge pending counts periodically, runs as a background task ##
+    async def run(self):
+
+        while self.client is not None:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception as e:
+                logger.error(f"❌ Merging query frequency failed: {e}")
+    ## end ##
+
+    ## most frequent queries, returns [(query, count)] ##
+    def top(self, n: int, min_count: int = 1) -> list[tuple[str, int]]:
+
+        if self.client is not None:
+            self.flush()
+            entries = self.breaker.call(self.client.zrevrange, self.KEY, 0, n - 1, withscores=True)
+            if entries is not None:
+                top = [
+                    (query.decode() if isinstance(query, bytes) else query, int(count))
+                    for query, count in entries
+                ]
+                return [(query, count) for query, count in top if count >= min_count]
+            logger.error("❌ Reading query frequency from redis failed, using local counts")
+
+        with self._lock:
+            top = self._counts.most_common(n)
+        return [(query, count) for query, count in top if count >= min_count]
+    ## end ##
+
+## end ##
+
+## pre-runs the most frequent queries through the retrieval service so that
+## their responses are cached before traffic arrives. Responses are cached by
+## the regular pipeline, hence for the current kb version and only when the
+## answer has sources. Queries already cached for the current version are skipped
+class CacheWarmer:
+
+    def __init__(
+            self,
+            service,
+            frequency: QueryFrequency,
+            top_n: int = 100,
+            min_count: int = 2,
+            concurrency: int = 4,
+            interval: int = 0
+        ):
+        self.service = service  #RetrievalService
+        self.frequency = frequency
+        self.top_n = top_n
+        self.min_count = min_count
+        self.concurrency = concurrency
+        self.interval = interval  #seconds between runs, 0: only at startup
+        self.stats = {"runs": 0, "warmed": 0, "cached": 0, "no_sources": 0}
+
+    ## warm cache once, returns stats of the run ##
+    async def warm(self) -> dict:
+
+        cache = self.service.cache
+        if cache is None:
+            logger.info("Cache is disabled, skipping cache warming")
+            return {}
+
+        top = await asyncio.to_thread(self.frequency.top, self.top_n, self.min_count)
+        queries = [query for query, _ in top]
+        run_stats = {"warmed": 0, "cached": 0, "no_sources": 0}
+        if not queries:
+            logger.info("No frequent queries found, skipping cache warming")
+            return run_stats
+
+        # skip queries already cached for current kb version (one round trip)
+        kb_version = await self.service.get_kb_version()
+        cached = await asyncio.to_thread(cache.query_cache_many, queries, kb_version)
+        to_warm = [query for query, response in zip(queries, cached) if response is None]
+        run_stats["cached"] = len(queries) - len(to_warm)
+
+        logger.info(
+            f"Warming cache for kb_version={kb_version}, queries={len(to_warm)}, "
+            f"already cached={run_stats['cached']}"
+        )
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        # warm queries have no conversation history, session is discarded
+        # and they are not counted as user traffic
+        async def warm_query(query):
+            async with semaphore:
+                response = await self.service.retrieve(query, [], count_query=False)
+            # answers without sources are not cached by the pipeline
+            if response.get("sources"):
+                run_stats["warmed"] += 1
+            else:
+                run_stats["no_sources"] += 1
+
+        await asyncio.gather(*(warm_query(query) for query in to_warm))
+
+        self.stats["runs"] += 1
+        for key, value in run_stats.items():
+            self.stats[key] += value
+        logger.info(f"Cache warming completed: {run_stats}")
+        return run_stats
+    ## end ##
+
+    ## warm cache every interval seconds, runs as a background task ##
+    ## first run is done at startup, see lifespan
+    async def run(self):
+
+        while self.interval > 0:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.warm()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Cache warming failed: {e}")
+    ## end ##
+
+## end ##
+
+########## Class definition END ##########
@@ -0,0 +1,111 @@
+from tokens import estimate_tokens
+import logging
+logger = logging.getLogger(__name__)
+
+########## Function definition BEGIN ##########
+
+## pack ranked chunks into the context of the prompt ##
+## chunks are taken in rank order until max_chunks or the token budget is reached:
+## - overlapping windows of the same source (ingestion chunks overlap by 40 words)
+##   are merged into one chunk without repeating the overlap
+## - near-duplicates (word set similarity >= duplicate_threshold) are dropped
+## - a chunk that does not fit the budget is skipped, smaller ones may still fit
+def pack_context(
+        chunks: list[dict],
+        max_chunks: int,
+        token_budget: int = 0,
+        duplicate_threshold: float = 0.9,
+        min_overlap: int = 5
+    ) -> list[dict]:
+
+    packed = []  #{"filename", "words", "word_set", "tokens"}
+    used_tokens = 0
+    stats = {"merged": 0, "duplicate": 0, "over_budget": 0}
+
+    for chunk in chunks:
+
+        words = chunk["text"].split()
+        tokens = estimate_tokens(chunk["text"])
+
+        # merge with an overlapping chunk of the same source
+        merged = False
+        for item in packed:
+            if item["filename"] != chunk["filename"]:
+                continue
+            merged_words = merge_overlap(item["words"], words, min_overlap)
+            if merged_words is None:
+                continue
+            merged_tokens = estimate_tokens(" ".join(merged_words))
+            if token_budget and used_tokens - item["tokens"] + merged_tokens > token_budget:
+                continue
+            used_tokens += merged_tokens - item["tokens"]
+            item["words"], item["tokens"] = merged_words, merged_tokens
+            item["word_set"] = set(merged_words)
+            stats["merged"] += 1
+            merged = True
+            break
+        if merged:
+            continue
+
+        # when full, remaining chunks are only considered for merging
+        if len(packed) >= max_chunks:
+            continue
+
+        # drop near-duplicates of already selected chunks
+        word_set = set(words)
+        if any(similarity(word_set, item["word_set"]) >= duplicate_threshold for item in packed):
+            stats["duplicate"] += 1
+            continue
+
+        if token_budget and used_tokens + tokens > token_budget:
+            stats["over_budget"] += 1
+            continue
+
+        packed.append({
+            "filename": chunk["filename"],
+            "words": words,
+            "word_set": word_set,
+            "tokens": tokens,
+        })
+        used_tokens += tokens
+
+    logger.info(f"Context packed: chunks={len(packed)}, tokens~{used_tokens}, {stats}")
+    return [{"text": " ".join(item["words"]), "filename": item["filename"]} for item in packed]
+## end ##
+
+## merge two word windows when one continues the other, None when they do not overlap ##
+def merge_overlap(first: list[str], second: list[str], min_overlap: int = 5) -> list[str] | None:
+
+    overlap = find_overlap(first, second, min_overlap)
+    if overlap:
+        return first + second[overlap:]
+
+    overlap = find_overlap(second, first, min_overlap)
+    if overlap:
+        return second + first[overlap:]
+
+    return None
+## end ##
+
+## length of the longest suffix of first which is a prefix of second ##
+def find_overlap(first: list[str], second: list[str], min_overlap: int = 5) -> int:
+
+    if not first or not second:
+        return 0
+
+    # candidate starts are positions of the first word of second near the end of first
+    limit = min(len(first), len(second))
+    for start in range(len(first) - limit, len(first) - min_overlap + 1):
+        if first[start] == second[0] and first[start:] == second[:len(first) - start]:
+            return len(first) - start
+    return 0
+## end ##
+
+## jaccard similarity of word sets ##
+def similarity(first: set, second: set) -> float:
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+## end ##
+
+########## Function definition END ##########
@@ -58,3 +58,37 @@ def create_index(db_client):
     except Exception as e:
         logger.critical(f"❌ Creating index failed. Error -> {e}")
         raise
+
+## metadata index, holds knowledge base version markers written by ingestion service
+def create_meta_index(db_client, meta_index_name):
+
+    #check if index already exists
+    if db_client.indices.exists(index=meta_index_name):
+        logger.info(f"Index={meta_index_name} already exists.")
+        return
+
+    logger.info(f"Creating index={meta_index_name}")
+    index_body = {
+        "mappings": {
+            "properties": {
+                "updated_at": {
+                    "type": "long"
+                },
+                "source": {
+                    "type": "keyword"
+                }
+            }
+        }
+    }
+
+    try:
+
+        db_client.indices.create(
+            index=meta_index_name,
+            body=index_body
+        )
+        logger.info(f"✅Index: {meta_index_name} created successfully.")
+
+    except Exception as e:
+        logger.critical(f"❌ Creating index failed. Error -> {e}")
+        raise
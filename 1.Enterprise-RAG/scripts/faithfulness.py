@@ -0,0 +1,128 @@
+from langchain_core.messages import HumanMessage
+import re
+import logging
+logger = logging.getLogger(__name__)
+
+## local faithfulness check, used as fast path before LLM-as-a-Judge.
+## every answer sentence is compared with its best matching source clause
+## (context and user messages split on sentence and clause boundaries):
+## a sentence is supported when that single clause holds all of its
+## numbers/identifiers and every content word also found elsewhere in the
+## sources, and most of its content words overall. Facts spread over several
+## clauses ("employees get 20 days, contractors get 10 days") therefore can't
+## be recombined ("contractors get 20 days") without escalating to the judge.
+## Score is the ratio of supported sentences. Answers the check cannot vouch
+## for (no checkable sentence, negation differing from the closest source
+## clause) are uncertain and return None, so that they go to the judge
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9\-\./]*")
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+|\n+")
+# clause boundaries inside a source sentence
+CLAUSE_PATTERN = re.compile(r"[,;:]\s+|\s+(?:and|but|or|while|whereas)\s+", re.IGNORECASE)
+CITATION_PATTERN = re.compile(r"^\W*(citation|citations|source|sources)\s*:", re.IGNORECASE)
+CONTRACTION_PATTERN = re.compile(r"n['’]t\b")
+
+STOPWORDS = frozenset("""
+a an and are as at be been but by can could do does for from has have if in into is it its
+may might must of on or our shall should so such than that the their them then there
+these they this to was we were what when where which while who will with would you your
+also any all more most other some only very each per about above after before between
+""".split())
+
+# polarity words, a sentence and its source must agree on them
+NEGATIONS = frozenset("""
+no not never cannot none nor neither without nothing nobody nowhere
+""".split())
+
+########## Function definition BEGIN ##########
+
+## faithfulness score of answer against context and session, 0.0 to 1.0, None when uncertain ##
+def lexical_faithfulness(
+        answer: str,
+        context,
+        session: list | None = None,
+        sentence_threshold: float = 0.7
+    ) -> float | None:
+
+    sources = [context_text(context)]
+    if session:
+        sources += [str(message.content) for message in session if isinstance(message, HumanMessage)]
+
+    # source clauses as (content words, negated)
+    source_clauses = [
+        (set(content_words(tokens)), is_negated(tokens))
+        for tokens in map(tokenize, split_clauses(" \n".join(sources)))
+    ]
+    source_tokens = set().union(*(words for words, _ in source_clauses))
+
+    checked = supported = 0
+    for sentence in split_sentences(answer):
+        if CITATION_PATTERN.match(sentence):
+            continue
+        tokens = tokenize(sentence)
+        words = content_words(tokens)
+        # sentences without content words (for e.g. "Here is the summary:") are not claims
+        if len(words) < 3:
+            continue
+        checked += 1
+
+        # polarity must match the closest source clause ("is not eligible" vs "is eligible")
+        closest = max(source_clauses, key=lambda source: len(source[0].intersection(words)), default=None)
+        if closest is None or closest[1] != is_negated(tokens):
+            logger.info("Lexical faithfulness: negation differs from context, answer is uncertain")
+            return None
+        clause_words = closest[0]
+
+        # numbers/identifiers, and words the sources use elsewhere, must come from the same clause
+        if any(
+            word not in clause_words and (is_identifier(word) or word in source_tokens)
+            for word in words
+        ):
+            continue
+
+        if sum(word in clause_words for word in words) / len(words) >= sentence_threshold:
+            supported += 1
+
+    if not checked:
+        logger.info("Lexical faithfulness: no checkable sentence, answer is uncertain")
+        return None
+
+    score = supported / checked
+    logger.info(f"Lexical faithfulness: sentences={checked}, supported={supported}, score={score:.2f}")
+    return score
+## end ##
+
+## text of context chunks ##
+def context_text(context) -> str:
+
+    if isinstance(context, list):
+        return " \n".join(
+            chunk["text"] if isinstance(chunk, dict) else str(chunk)
+            for chunk in context
+        )
+    return str(context or "")
+## end ##
+
+def split_sentences(text: str) -> list[str]:
+    return [sentence for sentence in SENTENCE_PATTERN.split(text) if sentence.strip()]
+
+def split_clauses(text: str) -> list[str]:
+    return [
+        clause for sentence in split_sentences(text)
+        for clause in CLAUSE_PATTERN.split(sentence) if clause.strip()
+    ]
+
+def tokenize(text: str) -> list[str]:
+    text = CONTRACTION_PATTERN.sub(" not", text.lower())
+    return [token.strip("-./") for token in TOKEN_PATTERN.findall(text)]
+
+def content_words(tokens: list[str]) -> list[str]:
+    return [token for token in tokens if token not in STOPWORDS and token not in NEGATIONS]
+
+def is_negated(tokens: list[str]) -> bool:
+    return any(token in NEGATIONS for token in tokens)
+
+def is_identifier(word: str) -> bool:
+    return any(char.isdigit() for char in word)
+
+########## Function definition END ##########
@@ -1,22 +1,35 @@
+from metrics import record_tokens
+import asyncio
 import json
 import os
 import logging
 logger = logging.getLogger(__name__)
 
+EMBEDDING_DIMENSIONS = 512
+
 #Generate embeddings
-def generate_embedding(bedrock_client, chunk):
+def generate_embedding(bedrock_client, chunk, embedding_cache=None, model_id=None):
     
+    model_id = model_id or os.getenv("EMBEDDING_MODEL_ID", "amazon.titan-embed-text-v2:0")
+
+    # check embedding cache
+    if embedding_cache is not None:
+        embedding = embedding_cache.get(model_id, EMBEDDING_DIMENSIONS, chunk)
+        if embedding is not None:
+            logger.info("✅ Query embedding found in embedding cache.")
+            return embedding
+
     # Titan Embeddings V2 request body
     request_body = {
         "inputText": chunk, 
-        "dimensions": 512
+        "dimensions": EMBEDDING_DIMENSIONS
         }
     
     # Invoke Titan embedding model
     logger.info("ℹ️ Generating query embedding by using bedrock model.")
 
     response = bedrock_client.invoke_model(
-            modelId=os.getenv("EMBEDDING_MODEL_ID", "amazon.titan-embed-text-v2:0"),
+            modelId=model_id,
             body=json.dumps(request_body),
             contentType="application/json",
             accept="application/json"
@@ -26,6 +39,17 @@ def generate_embedding(bedrock_client, chunk):
     response_body = json.loads(response["body"].read())
 
     embedding = response_body["embedding"]
+    record_tokens("embedding", response_body.get("inputTextTokenCount", 0))
     logger.info("✅ Query embedding generated successfully.")
+
+    if embedding_cache is not None:
+        embedding_cache.set(model_id, EMBEDDING_DIMENSIONS, chunk, embedding)
+
     return embedding
+
+#Generate embeddings without blocking the event loop
+async def agenerate_embedding(bedrock_client, chunk, embedding_cache=None, model_id=None):
+
+    # boto3 client is blocking, hence the call is offloaded to the worker pool
+    return await asyncio.to_thread(generate_embedding, bedrock_client, chunk, embedding_cache, model_id)
 ###### END #####
\ No newline at end of file
@@ -4,8 +4,10 @@ from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import add_messages
 #langchain packages
 from langchain_core.messages import BaseMessage, SystemMessage
+from langchain_core.runnables import RunnableLambda
 #Annotations
 from typing import Annotated, TypedDict, Sequence
+from metrics import record_token_usage
 import logging
 logger = logging.getLogger(__name__)
 ####################### END  ###################################
@@ -24,11 +26,24 @@ def call_llm(state: AgentState, llm):
     
     return {"messages" : [response]}
 
+#Call LLM without blocking the event loop, used by app.ainvoke
+async def acall_llm(state: AgentState, llm):
+    """This function call AWS LLM asynchronously"""
+
+    response = await llm.ainvoke([SystemMessage(state['system_prompt'])] + state['messages'] )
+
+    return {"messages" : [response]}
+
 #Define graph
 def create_graph(llm):    
 
     graph = StateGraph(AgentState)
-    graph.add_node("llm_node", lambda state: call_llm(state,llm))
+    #node supports both sync (app.invoke) and async (app.ainvoke) execution
+    llm_node = RunnableLambda(
+        lambda state: call_llm(state, llm),
+        afunc=lambda state: acall_llm(state, llm)
+    )
+    graph.add_node("llm_node", llm_node)
     graph.add_edge(START, "llm_node") #Add start edge
     graph.add_edge("llm_node", END) #Add end edge
     app = graph.compile()    
@@ -43,11 +58,63 @@ def execute_graph(app, session, system_prompt):
     
     response = app.invoke({"messages": session, "system_prompt" : system_prompt})
     last_message = response["messages"] [-1]  # This is usually an AIMessage
+    record_token_usage(last_message)
 
     logger.info("Graph execution completed.")
     
     return last_message.content
 
+#Execute graph asynchronously
+async def aexecute_graph(app, session, system_prompt):
+    """This function execute the graph without blocking the event loop"""
+
+    logger.info("Executing graph (async)...")
+
+    response = await app.ainvoke({"messages": session, "system_prompt" : system_prompt})
+    last_message = response["messages"] [-1]  # This is usually an AIMessage
+    record_token_usage(last_message)
+
+    logger.info("Graph execution completed.")
+
+    return last_message.content
+
+#Stream graph execution
+async def astream_graph(app, session, system_prompt):
+    """This function execute the graph and yields llm tokens as they are generated"""
+
+    logger.info("Streaming graph execution...")
+
+    # stream_mode="messages" yields (message_chunk, metadata) for every llm token
+    async for chunk, metadata in app.astream(
+        {"messages": session, "system_prompt" : system_prompt},
+        stream_mode="messages"
+    ):
+        if metadata.get("langgraph_node") != "llm_node":
+            continue
+
+        # usage is reported on the last chunk of the stream
+        record_token_usage(chunk)
+
+        text = chunk_text(chunk.content)
+        if text:
+            yield text
+
+    logger.info("Graph streaming completed.")
+
+#extract text from message chunk content
+def chunk_text(content):
+
+    # bedrock converse returns content as list of blocks e.g. [{"type": "text", "text": "..."}]
+    # non text blocks (for e.g. reasoning) are not sent to the user
+    if isinstance(content, list):
+        return "".join(
+            block.get("text", "")
+            for block in content
+            if isinstance(block, dict) and block.get("type") == "text"
+        )
+
+    return content or ""
+
 ######################## END  ###################################
 
 
@@ -2,6 +2,7 @@ from pydantic import BaseModel, Field, ConfigDict
 from typing import List
 from dataclasses import dataclass
 from enum import Enum
+import asyncio
 
 #### Class definition BEGIN ####
 
@@ -76,6 +77,8 @@ class GuardrailResult:
     status: ValidationResult
     response: str
     score: float | None = None
+    #pending faithfulness audit (audit mode), resolves to the judge verdict or None
+    audit: asyncio.Future | None = None
     #reason: str | None = None
 
 #### Data Class definition END ####
@@ -1,18 +1,24 @@
+import asyncio
 import logging
 from langchain_core.messages import SystemMessage, HumanMessage
 from guardrails_classes import ClaimsStatus, GuardrailResult, ValidationResult
-import os
+from faithfulness import lexical_faithfulness
+from metrics import record_faithfulness
+from settings import Settings
 
 logger = logging.getLogger(__name__)
 
 #### Guardrail service definition BEGIN ####
 class GuardrailService:
     
-    def __init__(self, guardrail_type, judge_llm, bedrock_client):
+    def __init__(self, guardrail_type, judge_llm, bedrock_client, settings: Settings):
         self.guardrail_type = guardrail_type
         self.judge_llm = judge_llm
         self.bedrock_client = bedrock_client
-        self.guardrail_enabled = int(os.getenv("ENABLE_GUARDRAILS", "0"))
+        self.settings = settings
+        self.guardrail_enabled = settings.guardrails_enabled
+        # pending judge audits (audit mode), referenced so that they are not garbage collected
+        self._audits: set[asyncio.Task] = set()
         
 
     def apply(
@@ -22,44 +28,23 @@ class GuardrailService:
             session: list | None = None,
         ) ->GuardrailResult:
         
-        #guardrail is disabled
-        if self.guardrail_enabled == 0 :
-            logger.info("ENABLE_GUARDRAILS is disabled in .env, returning text without checks")
-            return GuardrailResult(
-                status=ValidationResult.PASS,
-                score=1.0,
-                response = candidate_text                    
-            )
-            
+        #guardrail is disabled for this type
+        verdict = self.bypass(candidate_text)
+        if verdict is not None:
+            return verdict
             
         match self.guardrail_type:
 
             case "INPUT": #apply input guardrails
-
-                if self.guardrail_enabled == 2: #input guardrails are disabled
-                    logger.info("Input Guardrails are disabled, returning text without checks")
-                    return GuardrailResult(
-                        status=ValidationResult.PASS,
-                        score=1.0,
-                        response = candidate_text
-                    ) 
-                
-                #input guardrails are enabled
                 logger.info("Applying input guardrails...")
-                verdict = input_guardrails(candidate_text, self.bedrock_client, self.judge_llm)                
+                verdict = input_guardrails(candidate_text, self.bedrock_client, self.settings)                
 
             case "OUTPUT": #apply output guardrails
-
-                if self.guardrail_enabled == 1: #output guardrails are disabled
-                    logger.info("Output Guardrails are disabled, returning text without checks")
-                    return GuardrailResult(
-                        status=ValidationResult.PASS,
-                        score=1.0,
-                        response = candidate_text
-                    ) 
-                
-                #output guardrails are enabled
                 logger.info("Applying output guardrails...")
+                # audit needs an event loop, hence sync apply treats audit as tiered
+                verdict = self.fast_path(candidate_text, context, session)
+                if verdict is not None:
+                    return verdict
                 claims_status = get_claims_status(
                     judge_llm = self.judge_llm,
                     generated_answer=candidate_text,
@@ -67,18 +52,161 @@ class GuardrailService:
                     session = session
                     )
                 faithfulness_score = get_faithfulness(claims_status)
-                verdict = hallucination_check(faithfulness_score, candidate_text)                
+                verdict = hallucination_check(
+                    faithfulness_score, candidate_text, self.settings.faithfulness_threshold
+                )                
+                record_faithfulness("judge", verdict.status.value)
         
         return verdict
+
+    ## async version of apply, does not block the event loop ##
+    async def aapply(
+            self,
+            candidate_text: str,
+            context: str | None = None,
+            session: list | None = None,
+        ) ->GuardrailResult:
+
+        #guardrail is disabled for this type
+        verdict = self.bypass(candidate_text)
+        if verdict is not None:
+            return verdict
+
+        match self.guardrail_type:
+
+            case "INPUT": #apply input guardrails
+                logger.info("Applying input guardrails...")
+                # boto3 client is blocking, hence the call is offloaded to the worker pool
+                verdict = await asyncio.to_thread(
+                    input_guardrails, candidate_text, self.bedrock_client, self.settings
+                )
+
+            case "OUTPUT": #apply output guardrails
+                logger.info("Applying output guardrails...")
+                verdict = self.fast_path(candidate_text, context, session)
+                if verdict is not None:
+                    return verdict
+
+                # audit mode, uncertain answers are returned and judged in background
+                if self.settings.faithfulness_mode == "audit":
+                    return GuardrailResult(
+                        status=ValidationResult.PASS,
+                        response=candidate_text,
+                        audit=self.schedule_audit(candidate_text, context, list(session or []))
+                    )
+
+                verdict = await self.judge(candidate_text, context, session)
+                record_faithfulness("judge", verdict.status.value)
+
+        return verdict
+    ## end ##
+
+    ## local lexical check, PASS verdict when the answer is clearly supported, None otherwise ##
+    def fast_path(self, candidate_text, context, session) -> GuardrailResult | None:
+
+        if self.settings.faithfulness_mode == "judge":
+            return None
+
+        # None: uncertain (for e.g. negation differs from context), always judged
+        score = lexical_faithfulness(candidate_text, context, session)
+        if score is None or score < self.settings.faithfulness_fast_pass:
+            logger.info("Answer is not clearly supported by context, escalating to LLM_as_Judge")
+            return None
+
+        logger.info("Answer is supported by context (lexical check), skipping LLM_as_Judge. Verdict=PASS")
+        record_faithfulness("fast_path", ValidationResult.PASS.value)
+        return GuardrailResult(
+            status=ValidationResult.PASS,
+            response=candidate_text,
+            score=score
+        )
+    ## end ##
+
+    ## LLM-as-a-Judge verdict ##
+    async def judge(self, candidate_text, context, session) -> GuardrailResult:
+
+        claims_status = await aget_claims_status(
+            judge_llm = self.judge_llm,
+            generated_answer=candidate_text,
+            context = context,
+            session = session
+            )
+        faithfulness_score = get_faithfulness(claims_status)
+        return hallucination_check(
+            faithfulness_score, candidate_text, self.settings.faithfulness_threshold
+        )
+    ## end ##
+
+    ## judge an answer after it is returned, verdict is logged and exported as metric ##
+    ## returns the audit, resolving to the verdict, None when the answer is not judged
+    def schedule_audit(self, candidate_text, context, session) -> asyncio.Future:
+
+        if len(self._audits) >= self.settings.faithfulness_max_audits:
+            logger.warning("Too many pending faithfulness audits, skipping audit of this answer")
+            record_faithfulness("audit", "SKIPPED")
+            skipped = asyncio.get_running_loop().create_future()
+            skipped.set_result(None)
+            return skipped
+
+        async def audit() -> GuardrailResult | None:
+            try:
+                verdict = await self.judge(candidate_text, context, session)
+                record_faithfulness("audit", verdict.status.value)
+                if verdict.status != ValidationResult.PASS:
+                    logger.warning(
+                        f"⚠️ Faithfulness audit: verdict={verdict.status.value}, score={verdict.score}, "
+                        f"answer={candidate_text[:200]!r}"
+                    )
+                return verdict
+            except Exception as e:
+                logger.error(f"❌ Faithfulness audit failed: {e}")
+                return None
+
+        task = asyncio.create_task(audit())
+        self._audits.add(task)
+        task.add_done_callback(self._audits.discard)
+        return task
+    ## end ##
+
+    ## returns PASS verdict when guardrail is disabled, None otherwise ##
+    def bypass(self, candidate_text: str) -> GuardrailResult | None:
+
+        #guardrail is disabled
+        if self.guardrail_enabled == 0 :
+            logger.info("ENABLE_GUARDRAILS is disabled in .env, returning text without checks")
+            return GuardrailResult(
+                status=ValidationResult.PASS,
+                score=1.0,
+                response = candidate_text                    
+            )
+
+        if self.guardrail_type == "INPUT" and self.guardrail_enabled == 2: #input guardrails are disabled
+            logger.info("Input Guardrails are disabled, returning text without checks")
+            return GuardrailResult(
+                status=ValidationResult.PASS,
+                score=1.0,
+                response = candidate_text
+            ) 
+
+        if self.guardrail_type == "OUTPUT" and self.guardrail_enabled == 1: #output guardrails are disabled
+            logger.info("Output Guardrails are disabled, returning text without checks")
+            return GuardrailResult(
+                status=ValidationResult.PASS,
+                score=1.0,
+                response = candidate_text
+            ) 
+
+        return None
+    ## end ##
 #### Guardrail service definition End ####
 
 ########## Functions BEGIN ##########
 
 ## input_guardrails ##
-def input_guardrails(candidate_text, bedrock_client, judge_llm) -> GuardrailResult:
+def input_guardrails(candidate_text, bedrock_client, settings: Settings) -> GuardrailResult:
     
-    GUARDRAIL_ID = os.getenv("AWS_GUARDRAIL_ID", "0")
-    GUARDRAIL_VERSION = os.getenv("AWS_GUARDRAIL_VERSION", "1")
+    GUARDRAIL_ID = settings.guardrail_id
+    GUARDRAIL_VERSION = settings.guardrail_version
 
     try:
         # Evaluate the input text standalone
@@ -166,6 +294,37 @@ def is_blocked(assessments):
 ## get supported/unsupported claims
 def get_claims_status(judge_llm, generated_answer, context, session) -> ClaimsStatus:
 
+    messages = build_judge_messages(generated_answer, context, session)
+
+    logger.info("Calling LLM_as_Judge to provide claims status...")
+    result = judge_llm.invoke(messages)
+    logger.info("Claims status is returned by LLM_as_Judge:")
+    #logger.info(result)
+    
+    if result and result.model_extra:
+        logger.info(f"LLM generated additional fields: {result.model_extra}")
+
+    return result
+#### End ####
+
+## get supported/unsupported claims without blocking the event loop
+async def aget_claims_status(judge_llm, generated_answer, context, session) -> ClaimsStatus:
+
+    messages = build_judge_messages(generated_answer, context, session)
+
+    logger.info("Calling LLM_as_Judge (async) to provide claims status...")
+    result = await judge_llm.ainvoke(messages)
+    logger.info("Claims status is returned by LLM_as_Judge:")
+
+    if result and result.model_extra:
+        logger.info(f"LLM generated additional fields: {result.model_extra}")
+
+    return result
+#### End ####
+
+## build the judge prompt
+def build_judge_messages(generated_answer, context, session) -> list:
+
     # select only user-provided facts, filter out AIMessage
     # this is done to avoid LLM-as-a-Judge to consider even AIMessage as ground truth
     filtered_session = [
@@ -211,15 +370,7 @@ def get_claims_status(judge_llm, generated_answer, context, session) -> ClaimsSt
         )
     ]
 
-    logger.info("Calling LLM_as_Judge to provide claims status...")
-    result = judge_llm.invoke(messages)
-    logger.info("Claims status is returned by LLM_as_Judge:")
-    #logger.info(result)
-    
-    if result and result.model_extra:
-        logger.info(f"LLM generated additional fields: {result.model_extra}")
-
-    return result
+    return messages
 #### End ####
 
 #get faithfulness score
@@ -250,11 +401,10 @@ def get_faithfulness(claims_status: ClaimsStatus):
 ### end ###
 
 ### check hallucination
-def hallucination_check(faithfulness_score, candidate_text) -> GuardrailResult:
+def hallucination_check(faithfulness_score, candidate_text, threshold) -> GuardrailResult:
     
     logger.info("Generating final verdict based on faithfulness score...")
     
-    threshold = float(os.getenv("FAITHFULNESS_THRESHOLD", "0.9"))
     logger.info(f"FAITHFULNESS_THRESHOLD={threshold}")
 
     ## No hallucination
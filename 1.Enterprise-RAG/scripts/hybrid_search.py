@@ -0,0 +1,82 @@
+import logging
+logger = logging.getLogger(__name__)
+
+########## Function definition BEGIN ##########
+
+## BM25 full-text query on the "text" field ##
+## embedding is excluded from the returned source, it is not used after retrieval
+def bm25_query(query: str, top_k: int) -> dict:
+
+    return {
+        "size": top_k,
+        "_source": {"excludes": ["embedding"]},
+        "query": {
+            "match": {
+                "text": {
+                    "query": query
+                }
+            }
+        }
+    }
+## end ##
+
+## reciprocal rank fusion of ranked hit lists ##
+## score(doc) = sum over lists of weight / (rrf_k + rank), rank starting at 1.
+## rank based, hence kNN (cosine) and BM25 scores need no normalization
+def reciprocal_rank_fusion(
+        ranked_lists: list[list[dict]],
+        weights: list[float],
+        rrf_k: int = 60,
+        size: int | None = None
+    ) -> list[dict]:
+
+    scores: dict[str, float] = {}
+    hits: dict[str, dict] = {}
+
+    for ranked, weight in zip(ranked_lists, weights):
+        for rank, hit in enumerate(ranked, start=1):
+            doc_id = hit["_id"]
+            scores[doc_id] = scores.get(doc_id, 0.0) + weight / (rrf_k + rank)
+            hits.setdefault(doc_id, hit)
+
+    fused = sorted(scores, key=scores.get, reverse=True)
+    if size is not None:
+        fused = fused[:size]
+
+    # fused score replaces the engine score so that downstream sorting uses it
+    return [{**hits[doc_id], "_score": scores[doc_id]} for doc_id in fused]
+## end ##
+
+## fuse knn and bm25 search responses into one search response ##
+## a failed sub-search degrades to the other one, both failing returns the error
+def fuse_hybrid(
+        knn_response: dict,
+        bm25_response: dict,
+        knn_weight: float = 1.0,
+        bm25_weight: float = 1.0,
+        rrf_k: int = 60,
+        size: int | None = None
+    ) -> dict:
+
+    ranked_lists, weights = [], []
+    for name, response, weight in (
+        ("knn", knn_response, knn_weight),
+        ("bm25", bm25_response, bm25_weight),
+    ):
+        if "error" in response:
+            logger.error(f"❌ Hybrid search: {name} search failed, using the other results: {response['error']}")
+            continue
+        ranked_lists.append(response["hits"]["hits"])
+        weights.append(weight)
+
+    if not ranked_lists:
+        return {"error": knn_response["error"]}
+
+    return {
+        "hits": {
+            "hits": reciprocal_rank_fusion(ranked_lists, weights, rrf_k, size)
+        }
+    }
+## end ##
+
+########## Function definition END ##########
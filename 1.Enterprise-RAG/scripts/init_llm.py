@@ -7,14 +7,16 @@ logger = logging.getLogger(__name__)
 ######################## END  ##################################
 
 ####################### Init LLM BEGIN #########################
-def init_llm(assumed_session, model_id):
+#config: botocore Config of the bedrock client, for e.g. connection pool size
+def init_llm(assumed_session, model_id, config=None):
     
     logger.info(f"Initializing LLM {model_id}")
 
     try:
         bedrock_agent = assumed_session.client(
             "bedrock-runtime",
-            region_name = assumed_session.region_name
+            region_name = assumed_session.region_name,
+            config = config
         )
         
         llm = ChatBedrockConverse(
@@ -0,0 +1,71 @@
+import threading
+import time
+import os
+import logging
+logger = logging.getLogger(__name__)
+
+########## Class definition BEGIN ##########
+
+## knowledge base version, used in cache keys so that cached answers are
+## invalidated as soon as the ingestion service adds or removes documents.
+## Ingestion lambda appends a marker document with "updated_at" (epoch ms) to the
+## metadata index after every ingestion, the latest marker is the kb version.
+## Version is re-read from opensearch at most once every ttl seconds.
+class KnowledgeBaseVersion:
+
+    def __init__(self, db_client, meta_index_name: str, ttl: int = 30):
+        self.db_client = db_client
+        self.meta_index_name = meta_index_name
+        self.ttl = ttl
+        self._version = "v0"
+        self._expiry = 0.0
+        self._lock = threading.Lock()
+
+    ## get current kb version ##
+    def get(self) -> str:
+        with self._lock:
+            if time.time() < self._expiry:
+                return self._version
+
+            try:
+                self._version = read_kb_version(self.db_client, self.meta_index_name)
+            except Exception as e:
+                # keep serving with last known version, opensearch call is retried after ttl
+                logger.error(f"❌ Reading kb version failed, using last known version. Error -> {e}")
+
+            self._expiry = time.time() + self.ttl
+            return self._version
+    ## end ##
+
+## end ##
+
+########## Class definition END ##########
+
+########## Functions BEGIN ##########
+
+## read latest kb version marker from metadata index ##
+def read_kb_version(db_client, meta_index_name) -> str:
+
+    response = db_client.search(
+        index=meta_index_name,
+        body={
+            "size": 0,
+            "aggs": {
+                "kb_version": {"max": {"field": "updated_at"}}
+            }
+        }
+    )
+
+    updated_at = response["aggregations"]["kb_version"]["value"]
+    version = f"v{int(updated_at)}" if updated_at else "v0"
+    logger.info(f"Knowledge base version={version}")
+    return version
+## end ##
+
+## name of the metadata index holding kb version markers ##
+def get_meta_index_name() -> str:
+    index_name = os.getenv("INDEX_NAME", "enterprise-rag-index")
+    return os.getenv("KB_META_INDEX_NAME", f"{index_name}-meta")
+## end ##
+
+########## Functions END ##########
@@ -0,0 +1,167 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+import threading
+import time
+import logging
+logger = logging.getLogger(__name__)
+
+#prometheus_client is optional, metrics are only recorded as timing logs without it
+try:
+    from prometheus_client import Counter, Gauge, Histogram, start_http_server
+except ImportError:
+    Counter = Gauge = Histogram = start_http_server = None
+
+########## Metrics definition BEGIN ##########
+
+## pipeline stages, recorded by stage()
+## cache_lookup, semantic_cache_lookup, input_guardrail, embedding, knn_search,
+## context_build, rerank, llm, output_guardrail, cache_write
+
+# bedrock calls take from tens of ms (embedding) to tens of seconds (llm)
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80)
+
+if Histogram is not None:
+    STAGE_DURATION = Histogram(
+        "rag_stage_duration_seconds",
+        "Duration of retrieval pipeline stages",
+        ["stage"],
+        buckets=STAGE_BUCKETS,
+    )
+    REQUEST_DURATION = Histogram(
+        "rag_request_duration_seconds",
+        "End to end duration of user query requests",
+        ["endpoint"],
+        buckets=STAGE_BUCKETS,
+    )
+    INFLIGHT_REQUESTS = Gauge(
+        "rag_inflight_requests",
+        "User query requests in progress",
+        ["endpoint"],
+    )
+    CACHE_REQUESTS = Counter(
+        "rag_cache_requests_total",
+        "Response cache lookups",
+        ["tier", "result"],  #tier: exact, semantic; result: hit, miss, near_miss (semantic miss within the margin)
+    )
+    CACHE_HIT_RATIO = Gauge(
+        "rag_cache_hit_ratio",
+        "Ratio of user queries answered from response cache (exact or semantic) since start",
+    )
+    FAITHFULNESS_VERDICTS = Counter(
+        "rag_faithfulness_verdicts_total",
+        "Output guardrail faithfulness verdicts",
+        ["path", "verdict"],  #path: fast_path, judge, audit
+    )
+    BEDROCK_TOKENS = Counter(
+        "rag_bedrock_tokens_total",
+        "Bedrock tokens reported in llm response metadata and embedding responses",
+        ["type"],  #type: input, output, embedding
+    )
+else:
+    logger.info("prometheus_client is not installed, metrics endpoint is disabled")
+
+######## END ###################################
+
+## counts for hit ratio, a query is a hit when answered by any cache tier
+_cache_counts = {"hit": 0, "lookup": 0}
+_cache_counts_lock = threading.Lock()  #semantic lookups are recorded from worker threads
+
+if Histogram is not None:
+    CACHE_HIT_RATIO.set_function(
+        lambda: _cache_counts["hit"] / _cache_counts["lookup"] if _cache_counts["lookup"] else 0.0
+    )
+
+## stage durations of the current request, set by track_request()
+_spans: ContextVar[dict | None] = ContextVar("rag_spans", default=None)
+
+########## Function definition BEGIN ##########
+
+## timing span of a pipeline stage ##
+## concurrent tasks of a request (for e.g. speculative search) share the request spans
+@contextmanager
+def stage(name: str):
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        if Histogram is not None:
+            STAGE_DURATION.labels(name).observe(elapsed)
+        spans = _spans.get()
+        if spans is not None:
+            spans[name] = spans.get(name, 0.0) + elapsed
+## end ##
+
+## request span, counts in-flight requests and logs stage durations on completion ##
+@contextmanager
+def track_request(endpoint: str):
+
+    spans = {}
+    token = _spans.set(spans)
+    if Histogram is not None:
+        INFLIGHT_REQUESTS.labels(endpoint).inc()
+    started = time.perf_counter()
+
+    try:
+        yield spans
+    finally:
+        elapsed = time.perf_counter() - started
+        _spans.reset(token)
+        if Histogram is not None:
+            INFLIGHT_REQUESTS.labels(endpoint).dec()
+            REQUEST_DURATION.labels(endpoint).observe(elapsed)
+        timings = ", ".join(f"{name}={duration:.3f}s" for name, duration in spans.items())
+        logger.info(f"Request timings: endpoint={endpoint}, total={elapsed:.3f}s, {timings}")
+## end ##
+
+## record response cache lookup, result is hit, miss or near_miss ##
+## final: the lookup decides the query, exact misses are followed by semantic lookup
+def record_cache(tier: str, result: str, final: bool = True):
+
+    if Histogram is not None:
+        CACHE_REQUESTS.labels(tier, result).inc()
+    hit = result == "hit"
+    if hit or final:
+        with _cache_counts_lock:
+            _cache_counts["lookup"] += 1
+            _cache_counts["hit"] += int(hit)
+## end ##
+
+## record faithfulness verdict of output guardrail ##
+def record_faithfulness(path: str, verdict: str):
+
+    if Histogram is not None:
+        FAITHFULNESS_VERDICTS.labels(path, verdict).inc()
+## end ##
+
+## record bedrock token usage ##
+def record_tokens(token_type: str, count: int):
+
+    if Histogram is not None and count:
+        BEDROCK_TOKENS.labels(token_type).inc(count)
+## end ##
+
+## record bedrock token usage from llm message metadata ##
+def record_token_usage(message):
+
+    usage = getattr(message, "usage_metadata", None)
+    if not usage:
+        return
+    record_tokens("input", usage.get("input_tokens", 0))
+    record_tokens("output", usage.get("output_tokens", 0))
+## end ##
+
+## serve /metrics in prometheus text format on a separate port ##
+## the port is not part of the k8s service, hence it is not reachable through
+## NLB / API Gateway and only scraped from inside the cluster
+def start_metrics_server(port: int):
+
+    if start_http_server is None:
+        logger.warning("prometheus_client is not installed, metrics endpoint is not started")
+        return
+    start_http_server(port)
+    logger.info(f"Metrics endpoint started on port {port}")
+## end ##
+
+########## Function definition END ##########
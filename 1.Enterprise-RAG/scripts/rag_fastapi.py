@@ -1,6 +1,6 @@
 ########## Import packages BEGIN ##########
-from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi import FastAPI, Request, HTTPException
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
 import httpx
 import jwt
 from urllib.parse import urlencode
@@ -9,8 +9,15 @@ import uvicorn
 from contextlib import asynccontextmanager
 from startup import startup
 from retrieval_service import RetrievalService
+from cache_warmer import CacheWarmer
+from cache import RedisSemanticIndex
+from metrics import track_request, start_metrics_server
+from settings import Settings
 from ui_layout import ui_login, ui_logout, ui_access_denied
 from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import json
 import os
 import logging
 ########## Import packages END ##########
@@ -27,14 +34,14 @@ logger = logging.getLogger(__name__)
 ## load .env file
 load_dotenv()
 
-## conversation_store
-conversation_store = {}
-## end ##
-
 #### Class Definition ####
 # Request model, used for fastapi
 class UserQuery(BaseModel):
     text: str
+
+# Request model for batch endpoint
+class BatchQuery(BaseModel):
+    texts: list[str]
 #### END ####
 
 ## check env params
@@ -74,6 +81,10 @@ def check_env():
         if not guardrail_version:
             raise RuntimeError("AWS_GUARDRAIL_VERSION is not configured")
     
+    # shared-state mode keeps all per-user state in redis so that any replica can serve any request
+    if os.getenv("SHARED_STATE", "0") == "1" and int(os.getenv("CACHE_TYPE","0")) != 1:
+        raise RuntimeError("SHARED_STATE=1 requires CACHE_TYPE=1 (redis)")
+
     if int(os.getenv("CACHE_TYPE","0")) == 1:
         
         redis_host = os.getenv("REDIS_HOST")
@@ -96,6 +107,9 @@ def check_env():
 async def lifespan(app: FastAPI):
 
     logger.info("ℹ️ Initiating FastAPI app (lifespan)")
+    warm_task = None
+    semantic_refresh_task = None
+    frequency_flush_task = None
 
     try:
 
@@ -115,10 +129,71 @@ async def lifespan(app: FastAPI):
             graph,
             judge_llm,
             cache,
+            embedding_cache,
+            kb_version,
+            single_flight,
+            query_frequency,
+            session_store,
+            reranker,
         ) = startup()
 
         logger.info("✅ system resources are created successfully.")
 
+        # settings and retrieval service are resolved once and shared by all requests
+        settings = Settings.from_env()
+        retrieval_service = RetrievalService(
+            db_client,
+            graph,
+            judge_llm,
+            cache,
+            bedrock_client,
+            settings,
+            embedding_cache=embedding_cache,
+            kb_version=kb_version,
+            single_flight=single_flight,
+            reranker=reranker,
+            query_frequency=query_frequency
+        )
+        logger.info("✅ Retrieval service created.")
+
+        # bounded worker pool for blocking clients (boto3, opensearch, redis)
+        # offloaded by the async retrieval pipeline via asyncio.to_thread
+        worker_threads = int(os.getenv("WORKER_THREADS", "32"))
+        executor = ThreadPoolExecutor(max_workers=worker_threads, thread_name_prefix="rag-worker")
+        asyncio.get_running_loop().set_default_executor(executor)
+        logger.info(f"Worker pool created with WORKER_THREADS={worker_threads}")
+
+        # metrics are served on their own port, the public app port does not expose them
+        metrics_port = int(os.getenv("METRICS_PORT", "9100"))
+        if metrics_port > 0:
+            start_metrics_server(metrics_port)
+
+        # shared semantic cache index is refreshed from redis in background
+        if isinstance(getattr(cache, "semantic_index", None), RedisSemanticIndex):
+            semantic_refresh_task = asyncio.create_task(cache.semantic_index.run())
+
+        # cache warming, first run before serving traffic then periodically in background
+        if query_frequency is not None:
+            # counted queries are merged into the shared redis counts in background
+            frequency_flush_task = asyncio.create_task(query_frequency.run())
+            cache_warmer = CacheWarmer(
+                retrieval_service,
+                query_frequency,
+                top_n=int(os.getenv("CACHE_WARM_TOP_N", "100")),
+                min_count=int(os.getenv("CACHE_WARM_MIN_COUNT", "2")),
+                concurrency=int(os.getenv("CACHE_WARM_CONCURRENCY", "4")),
+                interval=int(os.getenv("CACHE_WARM_INTERVAL_SECONDS", "3600")),
+            )
+            # bounded so that a slow warm up does not hold the startup
+            try:
+                await asyncio.wait_for(
+                    cache_warmer.warm(),
+                    timeout=float(os.getenv("CACHE_WARM_STARTUP_TIMEOUT", "60"))
+                )
+            except Exception as e:
+                logger.error(f"❌ Cache warming at startup did not complete: {e!r}")
+            warm_task = asyncio.create_task(cache_warmer.run())
+
         app.state.config = {
             "cognito_domain_uri": cognito_domain_uri,
             "client_id": client_id,
@@ -129,6 +204,13 @@ async def lifespan(app: FastAPI):
             "graph": graph,
             "judge_llm": judge_llm,
             "cache": cache,
+            "embedding_cache": embedding_cache,
+            "kb_version": kb_version,
+            "single_flight": single_flight,
+            "settings": settings,
+            "retrieval_service": retrieval_service,
+            "query_frequency": query_frequency,
+            "session_store": session_store,
         }
 
         logger.info("✅ Application startup successful")
@@ -142,6 +224,12 @@ async def lifespan(app: FastAPI):
 
     finally:
         logger.info("🛑 Shutting down resources...")
+        if warm_task is not None:
+            warm_task.cancel()
+        if semantic_refresh_task is not None:
+            semantic_refresh_task.cancel()
+        if frequency_flush_task is not None:
+            frequency_flush_task.cancel()
 ## end ##
 
 #Since aws API Gateway appends a stage prefix (e.g., /production) to URL string
@@ -307,7 +395,7 @@ async def user_query(query: UserQuery, request: Request):
     logger.info(f"'/userquery' (POST /userquery) endpoint invoked.")
     user_prompt = query.text
     
-    logger.info("ℹ️ Received user query. Creating retrieval service...")
+    logger.info("ℹ️ Received user query.")
     
     #getting optional headers, api gateway adds these
     x_user_id = request.headers.get("X-User-Id")
@@ -326,21 +414,20 @@ async def user_query(query: UserQuery, request: Request):
             status_code=302
         )
 
-    #create retrieval service    
-    db_client = request.app.state.config['db_client']
-    graph = request.app.state.config['graph']
-    judge_llm = request.app.state.config['judge_llm']
-    bedrock_client = request.app.state.config['bedrock_client']
-    cache = request.app.state.config['cache']
+    #shared retrieval service, created at startup
+    service = request.app.state.config['retrieval_service']
 
     # session conversation handling
     session_id = x_user_id
-    if session_id not in conversation_store:
-        conversation_store[session_id] = []
-
-    service = RetrievalService(db_client, graph, judge_llm, cache)
-    logger.info("ℹ️ Retrieval service created. Executing the service...")
-    response = service.retrieve(bedrock_client, user_prompt, conversation_store[session_id])
+    session_store = request.app.state.config['session_store']
+
+    logger.info("ℹ️ Executing the retrieval service...")
+    with track_request("userquery"):
+        session = await session_store.get(session_id)
+        history_length = len(session)
+        response = await service.retrieve(user_prompt, session)
+        # messages added by this turn are appended to the stored history
+        await session_store.append(session_id, session[history_length:])
     logger.info("ℹ️ Execution of Retrieval service completed. Returning the response to user")
 
     
@@ -348,6 +435,103 @@ async def user_query(query: UserQuery, request: Request):
     return response
 ## end ##
 
+# userquery stream endpoint, streams the response as server-sent events (SSE)
+@app.post("/userquery/stream")
+async def user_query_stream(query: UserQuery, request: Request):
+
+    logger.info(f"'/userquery/stream' (POST /userquery/stream) endpoint invoked.")
+    user_prompt = query.text
+
+    #getting optional headers, api gateway adds these
+    x_user_id = request.headers.get("X-User-Id")
+    x_username = request.headers.get("X-Username")
+
+    logger.info(f"from X-User-Id header={x_user_id}")
+    logger.info(f"from X-Username header={x_username}")
+
+    # checking user_id received in header ensures that request actually came through API Gateway
+    if not x_user_id:
+        logger.error("User_id is not present, the request directly landed to app instead of via apigateway.")
+        logger.error("Redirecting to access denied page")
+        return RedirectResponse(
+            url=f"{request.app.state.config['redirect_uri']}/access-denied?reason=unauthorized-access",
+            status_code=302
+        )
+
+    #shared retrieval service, created at startup
+    service = request.app.state.config['retrieval_service']
+
+    # session conversation handling
+    session_id = x_user_id
+    session_store = request.app.state.config['session_store']
+
+    logger.info("ℹ️ Streaming the retrieval service response...")
+
+    # SSE frames: "event: <token|final|blocked>" followed by json encoded data.
+    # tokens are streamed before the output guardrail, "blocked" tells the client
+    # to discard them and show the guardrail response instead
+    async def event_stream():
+        with track_request("userquery_stream"):
+            session = await session_store.get(session_id)
+            history_length = len(session)
+            async for event, data in service.retrieve_stream(user_prompt, session):
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+            # messages added by this turn are appended to the stored history
+            await session_store.append(session_id, session[history_length:])
+        logger.info("ℹ️ Streaming of Retrieval service response completed.")
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # disable proxy buffering so tokens are flushed immediately
+        },
+    )
+## end ##
+
+# userquery batch endpoint, answers independent queries in one request
+# results are returned in the order of the queries, a failed query does not fail the batch
+@app.post("/userquery/batch")
+async def user_query_batch(query: BatchQuery, request: Request):
+
+    logger.info(f"'/userquery/batch' (POST /userquery/batch) endpoint invoked.")
+
+    #getting optional headers, api gateway adds these
+    x_user_id = request.headers.get("X-User-Id")
+    x_username = request.headers.get("X-Username")
+
+    logger.info(f"from X-User-Id header={x_user_id}")
+    logger.info(f"from X-Username header={x_username}")
+
+    # checking user_id received in header ensures that request actually came through API Gateway
+    if not x_user_id:
+        logger.error("User_id is not present, the request directly landed to app instead of via apigateway.")
+        logger.error("Redirecting to access denied page")
+        return RedirectResponse(
+            url=f"{request.app.state.config['redirect_uri']}/access-denied?reason=unauthorized-access",
+            status_code=302
+        )
+
+    #shared retrieval service, created at startup
+    service = request.app.state.config['retrieval_service']
+
+    batch_max_queries = request.app.state.config['settings'].batch_max_queries
+    if not query.texts or len(query.texts) > batch_max_queries:
+        logger.error(f"Invalid batch size={len(query.texts)}, allowed 1..{batch_max_queries}")
+        raise HTTPException(
+            status_code=400,
+            detail=f"texts must contain between 1 and {batch_max_queries} queries"
+        )
+
+    logger.info(f"ℹ️ Executing the retrieval service for a batch of {len(query.texts)} queries...")
+    with track_request("userquery_batch"):
+        results = await service.retrieve_batch(query.texts)
+    logger.info("ℹ️ Execution of Retrieval service batch completed. Returning the response to user")
+
+    return {"results": results}
+## end ##
+
 # logout endpoint
 @app.get("/logout")
 async def logout(request: Request):
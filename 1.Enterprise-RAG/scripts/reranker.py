@@ -0,0 +1,247 @@
+from abc import ABC, abstractmethod
+from collections import Counter, OrderedDict
+import hashlib
+import math
+import re
+import threading
+import time
+import logging
+logger = logging.getLogger(__name__)
+
+#sentence-transformers is optional, only needed by CrossEncoderReranker
+try:
+    from sentence_transformers import CrossEncoder
+except ImportError:
+    CrossEncoder = None
+
+########## Class definition BEGIN ##########
+
+## rerank stage of context builder, rescores the knowledge search hits against the query.
+## scores are cached per (query, chunk), or per (query, chunk, candidate set) for
+## scorers whose scores depend on the other candidates. When the average rerank latency exceeds
+## the latency budget, reranking is skipped (search order is kept) except for a
+## periodic probe request that re-measures the latency
+class Reranker(ABC):
+
+    def __init__(
+            self,
+            latency_budget: float = 0.2,
+            cache_size: int = 10000,
+            probe_every: int = 20
+        ):
+        self.latency_budget = latency_budget  #seconds, 0: no budget
+        self.cache_size = cache_size
+        self.probe_every = probe_every
+        self._cache: OrderedDict[str, float] = OrderedDict()
+        self._lock = threading.Lock()
+        self.avg_latency = 0.0  #moving average of rerank latency
+        self._skipped = 0
+        self.stats = {"reranked": 0, "skipped": 0, "cache_hit": 0}
+
+    ## scores of texts for the query, one batch ##
+    @abstractmethod
+    def score(self, query: str, texts: list[str]) -> list[float]:
+        pass
+    ## end ##
+
+    ## cache scope of a candidate set, "": scores of (query, chunk) pairs are independent ##
+    def cache_scope(self, texts: list[str]) -> str:
+        return ""
+
+    ## final scores from the scores of the hits in search order ##
+    def blend(self, scores: list[float]) -> list[float]:
+        return scores
+
+    ## rerank hits, returns hits sorted by rerank score with "_score" replaced ##
+    def rerank(self, query: str, hits: list[dict]) -> list[dict]:
+
+        if not hits:
+            return hits
+
+        if self.over_budget():
+            self.stats["skipped"] += 1
+            logger.info(f"Rerank skipped, average latency={self.avg_latency:.3f}s exceeds budget")
+            return hits
+
+        started = time.perf_counter()
+
+        # cached scores, remaining hits are scored in one batch
+        texts = [hit["_source"]["text"] for hit in hits]
+        scope = self.cache_scope(texts)
+        keys = [self.cache_key(query, text, scope) for text in texts]
+        scores = self.get_cached(keys)
+        missing = [i for i, score in enumerate(scores) if score is None]
+        self.stats["cache_hit"] += len(hits) - len(missing)
+
+        if missing:
+            # scores depending on the candidate set are computed for the whole set
+            if scope:
+                missing = list(range(len(hits)))
+            new_scores = self.score(query, [texts[i] for i in missing])
+            for i, score in zip(missing, new_scores):
+                scores[i] = float(score)
+            self.set_cached([keys[i] for i in missing], [scores[i] for i in missing])
+
+        scores = self.blend(scores)
+        self.record_latency(time.perf_counter() - started)
+        self.stats["reranked"] += 1
+
+        reranked = sorted(
+            ({**hit, "_score": score} for hit, score in zip(hits, scores)),
+            key=lambda hit: hit["_score"],
+            reverse=True
+        )
+        return reranked
+    ## end ##
+
+    ## helper functions ##
+
+    ## skip reranking when over budget, every probe_every-th request is still reranked ##
+    def over_budget(self) -> bool:
+
+        if not self.latency_budget or self.avg_latency <= self.latency_budget:
+            return False
+
+        with self._lock:
+            self._skipped += 1
+            if self._skipped >= self.probe_every:
+                self._skipped = 0
+                return False
+        return True
+
+    def record_latency(self, elapsed: float):
+        with self._lock:
+            self.avg_latency = elapsed if not self.avg_latency else 0.8 * self.avg_latency + 0.2 * elapsed
+
+    ## chunk text is part of the key so that re-ingested chunks are scored again ##
+    def cache_key(self, query: str, text: str, scope: str = "") -> str:
+        normalized = " ".join(query.lower().split())
+        return hashlib.sha256(f"{normalized}\0{text}\0{scope}".encode()).hexdigest()
+
+    def get_cached(self, keys: list[str]) -> list[float | None]:
+        with self._lock:
+            scores = []
+            for key in keys:
+                score = self._cache.get(key)
+                if score is not None:
+                    self._cache.move_to_end(key)
+                scores.append(score)
+            return scores
+
+    def set_cached(self, keys: list[str], scores: list[float]):
+        with self._lock:
+            for key, score in zip(keys, scores):
+                self._cache[key] = score
+                self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    ## end ##
+
+## end ##
+
+## lightweight lexical reranker, BM25 of the query terms over the candidate hits.
+## lexical score is blended with the rank of the search so that semantic
+## matches without shared terms are not pushed out
+class LexicalReranker(Reranker):
+
+    TOKEN_PATTERN = re.compile(r"\w+")
+
+    def __init__(self, lexical_weight: float = 0.5, k1: float = 1.2, b: float = 0.75, **kwargs):
+        super().__init__(**kwargs)
+        self.lexical_weight = lexical_weight
+        self.k1 = k1
+        self.b = b
+
+    def tokenize(self, text: str) -> list[str]:
+        return self.TOKEN_PATTERN.findall(text.lower())
+
+    ## document frequencies come from the candidate set, scores are cached per set ##
+    def cache_scope(self, texts: list[str]) -> str:
+        return hashlib.sha256("\0".join(texts).encode()).hexdigest()
+
+    ## blend normalized lexical score with search rank (1 for first hit, 0 for last) ##
+    def blend(self, scores: list[float]) -> list[float]:
+
+        top = max(scores) or 1.0
+        n = len(scores)
+        return [
+            self.lexical_weight * (score / top)
+            + (1 - self.lexical_weight) * ((n - rank) / n)
+            for rank, score in enumerate(scores)
+        ]
+
+    ## BM25 with document frequencies of the candidate set ##
+    def score(self, query: str, texts: list[str]) -> list[float]:
+
+        docs = [Counter(self.tokenize(text)) for text in texts]
+        lengths = [sum(doc.values()) for doc in docs]
+        avg_length = (sum(lengths) / len(lengths)) or 1.0
+        terms = set(self.tokenize(query))
+
+        idf = {}
+        for term in terms:
+            df = sum(1 for doc in docs if term in doc)
+            idf[term] = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+
+        scores = []
+        for doc, length in zip(docs, lengths):
+            score = 0.0
+            for term in terms:
+                tf = doc.get(term, 0)
+                if tf:
+                    score += idf[term] * tf * (self.k1 + 1) / (
+                        tf + self.k1 * (1 - self.b + self.b * length / avg_length)
+                    )
+            scores.append(score)
+        return scores
+
+## end ##
+
+## cross-encoder reranker, scores all (query, chunk) pairs in one forward pass on CPU
+class CrossEncoderReranker(Reranker):
+
+    DEFAULT_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+    def __init__(self, model_name: str | None = None, max_length: int = 512, **kwargs):
+        super().__init__(**kwargs)
+        if CrossEncoder is None:
+            raise RuntimeError("sentence-transformers is not installed, cross-encoder reranker is unavailable")
+        model_name = model_name or self.DEFAULT_MODEL
+        logger.info(f"Loading cross-encoder model={model_name}...")
+        self.model = CrossEncoder(model_name, max_length=max_length, device="cpu")
+        logger.info("Cross-encoder model loaded.")
+
+    def score(self, query: str, texts: list[str]) -> list[float]:
+        pairs = [(query, text) for text in texts]
+        return list(self.model.predict(pairs, batch_size=len(pairs), show_progress_bar=False))
+
+## end ##
+
+########## Class definition END ##########
+
+########## Function definition BEGIN ##########
+
+## create reranker, none: disabled, lexical or cross-encoder ##
+## cross-encoder falls back to lexical reranker when it cannot be loaded
+def create_reranker(
+        reranker_type: str,
+        model_name: str | None = None,
+        lexical_weight: float = 0.5,
+        **kwargs
+    ) -> Reranker | None:
+
+    if reranker_type == "cross-encoder":
+        try:
+            return CrossEncoderReranker(model_name=model_name, **kwargs)
+        except Exception as e:
+            logger.error(f"❌ Cross-encoder reranker could not be created, using lexical reranker: {e}")
+            return LexicalReranker(lexical_weight=lexical_weight, **kwargs)
+
+    if reranker_type == "lexical":
+        return LexicalReranker(lexical_weight=lexical_weight, **kwargs)
+
+    return None
+## end ##
+
+########## Function definition END ##########
@@ -1,108 +1,502 @@
-from gen_embedding import generate_embedding
+from gen_embedding import agenerate_embedding
 from guardrails_service import GuardrailService
-from guardrails_classes import ValidationResult
-from graph import execute_graph
-from cache import Cache
+from guardrails_classes import ValidationResult, GuardrailResult
+from graph import aexecute_graph, astream_graph
+from cache import Cache, EmbeddingCache
+from cache_warmer import QueryFrequency
+from kb_version import KnowledgeBaseVersion
+from single_flight import SingleFlight, single_flight_key
+from settings import Settings
+from metrics import stage, record_cache
+from hybrid_search import bm25_query, fuse_hybrid
+from reranker import Reranker
+from context_packer import pack_context
 from langchain_core.messages import HumanMessage, AIMessage
-import os
+from dataclasses import dataclass
+import asyncio
+import time
 import logging
 import re
 
 
 logger = logging.getLogger(__name__)
 
+######## Class definition ######################
+
+#result of the steps before llm generation
+#response is set when the query is answered from cache or blocked by input guardrails
+@dataclass
+class PreparedQuery:
+    response: dict | None = None
+    kb_version: str | None = None
+    query: str | None = None
+    embedding: list[float] | None = None
+    context: list | None = None
+    system_prompt: str | None = None
+
+######## END ###################################
+
 ######## Service Definition ###################
 
 #retrival service to handle user query
 class RetrievalService:
 
-    def __init__(self, db_client, app, llm, cache: Cache):
+    def __init__(
+            self,
+            db_client,
+            app,
+            llm,
+            cache: Cache,
+            bedrock_client,
+            settings: Settings,
+            embedding_cache: EmbeddingCache | None = None,
+            kb_version: KnowledgeBaseVersion | None = None,
+            single_flight: SingleFlight | None = None,
+            reranker: Reranker | None = None,
+            query_frequency: QueryFrequency | None = None
+        ):
         self.db_client = db_client        
         self.graph = app
         self.judge_llm = llm
         self.cache = cache
-
-    def retrieve(self, bedrock_client, query, user_session):
+        self.bedrock_client = bedrock_client
+        self.settings = settings
+        self.embedding_cache = embedding_cache
+        self.kb_version = kb_version
+        self.single_flight = single_flight
+        self.reranker = reranker
+        self.query_frequency = query_frequency  #counts user queries for cache warming
+
+        # guardrail services are stateless per request, built once and shared
+        self.input_guardrail = GuardrailService("INPUT", llm, bedrock_client, settings)
+        self.output_guardrail = GuardrailService("OUTPUT", llm, bedrock_client, settings)
+
+    # async pipeline, blocking clients are awaited or offloaded to the worker pool
+    # so that the event loop keeps serving other requests meanwhile
+    # count_query: count the query for cache warming, False for warm up queries
+    async def retrieve(self, query, user_session, count_query: bool = True):
+
+        # kb version is part of cache keys, read once so lookup and update use the same version
+        kb_version = await self.get_kb_version()
+
+        if self.single_flight is None:
+            return await self.run_pipeline(query, user_session, kb_version, count_query)
+
+        # identical queries in flight share one pipeline execution, like a cache hit
+        # the shared response is not added to the follower's session
+        response, shared = await self.single_flight.do(
+            single_flight_key(query, kb_version),
+            lambda: self.run_pipeline(query, user_session, kb_version, count_query),
+            cache=self.cache,
+            query=query,
+            kb_version=kb_version
+        )
+        if shared:
+            logger.info("Response shared from identical in-flight query")
+        return response
+
+    # runs the full pipeline for one query
+    async def run_pipeline(self, query, user_session, kb_version, count_query: bool = True):
         
-        index_name = os.getenv("INDEX_NAME", "enterprise-rag-index")
-        vector_top_k = int(os.getenv("VECTOR_TOP_K", "10"))
-        reranked_top_k = int(os.getenv("RE_RANKED_TOP_K", "5"))
+        try:
+            # cache lookup, input guardrails and context retrieval
+            prepared = await self.prepare(query, user_session, kb_version, count_query)
+            if prepared.response is not None:
+                return prepared.response
+
+            # call llm
+            with stage("llm"):
+                generated_response = await call_llm(self, user_session, prepared.system_prompt)
+            
+            # output guardrails, session and cache update
+            return await self.finalize(prepared, generated_response, user_session)
+
+        except Exception as e:
+            logger.error(f"❌ Error! Retrieval Service Execution failed.")
+            logger.error(f"❌ Exception: {e}")
+            response = "Oops! An unexcepted error happened during response processing, please try later"
+            return gen_structured_resp(response)
+
+    # streaming pipeline, yields (event, data) tuples
+    # "token" events carry generated text as soon as LLM produces it and
+    # a single "final" event carries the structured response with citations.
+    # Tokens are sent before the output guardrail runs, when the guardrail blocks
+    # or rewrites the answer the last event is "blocked" instead of "final" and
+    # the client must discard the tokens already rendered
+    async def retrieve_stream(self, query, user_session):
+
+        try:
+            # cache lookup, input guardrails and context retrieval
+            kb_version = await self.get_kb_version()
+            prepared = await self.prepare(query, user_session, kb_version)
+            if prepared.response is not None:
+                yield "token", prepared.response["answer"]
+                yield "final", prepared.response
+                return
+
+            # stream llm tokens
+            logger.info("Calling LLM to stream response...")
+            tokens = []
+            with stage("llm"):
+                async for token in astream_graph(self.graph, user_session, prepared.system_prompt):
+                    tokens.append(token)
+                    yield "token", token
+            logger.info("Response streaming completed.")
+
+            # output guardrails, session and cache update
+            generated_response = "".join(tokens)
+            result = await self.guard_output(prepared, generated_response, user_session)
+            structure_resp = await self.complete(prepared, result, user_session)
+            if result.status is ValidationResult.FAIL or result.response != generated_response:
+                logger.info("Streamed answer is blocked by output guardrail")
+                yield "blocked", structure_resp
+            else:
+                yield "final", structure_resp
+
+        except Exception as e:
+            logger.error(f"❌ Error! Retrieval Service (stream) Execution failed.")
+            logger.error(f"❌ Exception: {e}")
+            response = "Oops! An unexcepted error happened during response processing, please try later"
+            yield "final", gen_structured_resp(response)
+
+    # count a query for cache warming
+    def count_query(self, query):
+        if self.query_frequency is not None:
+            self.query_frequency.record(query)
+
+    # current knowledge base version
+    async def get_kb_version(self) -> str:
+        if self.kb_version is None:
+            return "v0"
+        return await asyncio.to_thread(self.kb_version.get)
+
+    # steps before llm generation
+    async def prepare(self, query, user_session, kb_version, count_query: bool = True) -> PreparedQuery:
+
+        index_name = self.settings.index_name
+        vector_top_k = self.settings.vector_top_k
+        reranked_top_k = self.settings.reranked_top_k
 
         logger.info("ℹ️ Parameters for knowledge docs processing are following...")
         logger.info(f"Index_Name={index_name}, Vector_Top_K={vector_top_k}, Reranked_top_k={reranked_top_k} ")
+
+        # check cache
+        cache_response = None
+        if self.cache is not None:
+            with stage("cache_lookup"):
+                cache_response = await self.cache.aquery_cache(query, kb_version)
+            record_cache(
+                "exact", "miss" if cache_response is None else "hit",
+                final=self.cache.semantic_index is None
+            )
+        if cache_response is not None:
+            logger.info("Response found in response cache, skipping rest of the processing")
+            # only answers of queries which passed input guardrail are cached
+            if count_query:
+                self.count_query(query)
+            return PreparedQuery(response=cache_response)
+
+        # apply input guardrails and search knowledge store
+        # in speculative mode both run concurrently, see guarded_search
+        if self.settings.speculative_retrieval:
+            result, (embedding, docs, cache_response) = await self.guarded_search(query, kb_version)
+        else:
+            with stage("input_guardrail"):
+                result = await self.input_guardrail.aapply(candidate_text=query)
+            if result.status != ValidationResult.FAIL:
+                embedding, docs, cache_response = await self.search(result.response, kb_version)
+
+        if result.status == ValidationResult.FAIL:
+            logger.info("Input guardrail has blocked the query")
+            return PreparedQuery(response=gen_structured_resp(result.response))
+
+        # sanitized text is counted, blocked queries are never warmed
+        if count_query:
+            self.count_query(result.response)
+
+        if cache_response is not None:
+            logger.info("Response found in semantic cache, skipping rest of the processing")
+            return PreparedQuery(response=cache_response)
         
-        try:
-            # check cache
+        return await self.assemble(result.response, embedding, docs, kb_version, user_session)
+
+    # context and prompt assembly from the retrieved docs
+    async def assemble(self, updated_query, embedding, docs, kb_version, user_session) -> PreparedQuery:
+
+        with stage("context_build"):
+            # build context, reranking is cpu bound hence offloaded to the worker pool
+            if self.reranker is not None:
+                context = await asyncio.to_thread(
+                    context_builder, updated_query, docs, self.settings, self.reranker
+                )
+            else:
+                context = context_builder(updated_query, docs, self.settings)
             
+            # prompt assembly
+            system_prompt = prompt_assembly(context)
         
-            cache_response = self.cache.query_cache(query) if self.cache is not None else None
-            if cache_response is not None:
-                logger.info("Response found in response cache, skipping rest of the processing")
-                return cache_response 
+        #append the user query in session
+        user_session.append(HumanMessage(content=updated_query))
+
+        return PreparedQuery(
+            kb_version=kb_version,
+            query=updated_query,
+            embedding=embedding,
+            context=context,
+            system_prompt=system_prompt
+        )
+
+    # embedding, semantic cache lookup and knowledge search for a query
+    # returns (embedding, docs, cache_response), docs is None on semantic cache hit
+    async def search(self, query, kb_version):
+
+        # generate embedding
+        with stage("embedding"):
+            embedding = await agenerate_embedding(
+                self.bedrock_client, query, self.embedding_cache, self.settings.embedding_model_id
+            )
 
-            # apply input guardrails
-            input_guardrail = GuardrailService("INPUT", self.judge_llm, bedrock_client)
-            result = input_guardrail.apply(candidate_text=query)
-            if result.status == ValidationResult.FAIL:
-                logger.info("Input guardrail has blocked the query")
-                return gen_structured_resp(result.response)
-            
-            updated_query = result.response
-            # generate embedding
-            embedding = generate_embedding(bedrock_client, updated_query)
-            
-            # retrieve knowledge
-            docs = retrieve_knowledge(self, embedding, index_name, vector_top_k)
+        # check semantic cache, paraphrases of a cached query are answered from cache
+        cache_response = await self.semantic_lookup(embedding, kb_version)
+        if cache_response is not None:
+            return embedding, None, cache_response
 
-            # build context
-            context = context_builder(updated_query, docs, reranked_top_k)
-            
-            # prompt assembly
-            system_prompt = prompt_assembly(context)
-            
-            #append the user query in session
-            user_session.append(HumanMessage(content=updated_query))
+        # retrieve knowledge
+        with stage("knn_search"):
+            docs = await aretrieve_knowledge(
+                self, embedding, self.settings.index_name, self.settings.vector_top_k, query
+            )
+        return embedding, docs, None
 
-            # call llm
-            generated_response = call_llm(self, user_session, system_prompt)
-            
-            ## apply output guardrails
-            output_guardrail = GuardrailService("OUTPUT", self.judge_llm, bedrock_client)
-            result = output_guardrail.apply(
+    # semantic cache lookup, None on miss or when semantic cache is disabled
+    async def semantic_lookup(self, embedding, kb_version):
+
+        if self.cache is None or self.cache.semantic_index is None:
+            return None
+
+        # lookup result (hit, near miss, miss) is recorded by the cache
+        with stage("semantic_cache_lookup"):
+            return await asyncio.to_thread(
+                self.cache.semantic_query_cache, embedding, kb_version
+            )
+
+    # speculative execution, search on the raw query runs while input guardrail is applied
+    # blocked query: search result is discarded
+    # redacted query: search is re-run on the redacted text
+    async def guarded_search(self, query, kb_version):
+
+        # search duration is measured inside the task to compute saved wall time
+        async def timed_search():
+            search_started = time.perf_counter()
+            search_result = await self.search(query, kb_version)
+            return search_result, time.perf_counter() - search_started
+
+        started = time.perf_counter()
+        search_task = asyncio.create_task(timed_search())
+        # avoid "exception was never retrieved" warning when search is discarded
+        search_task.add_done_callback(lambda task: task.cancelled() or task.exception())
+
+        with stage("input_guardrail"):
+            result = await self.input_guardrail.aapply(candidate_text=query)
+        guardrail_time = time.perf_counter() - started
+
+        if result.status == ValidationResult.FAIL:
+            search_task.cancel()
+            return result, (None, None, None)
+
+        if result.response != query:
+            logger.info("Query is redacted by input guardrail, re-running search on redacted text")
+            search_task.cancel()
+            return result, await self.search(result.response, kb_version)
+
+        search_result, search_time = await search_task
+        wall_time = time.perf_counter() - started
+        logger.info(
+            f"Speculative retrieval timings: guardrail={guardrail_time:.3f}s, search={search_time:.3f}s, "
+            f"wall={wall_time:.3f}s, saved={max(0.0, guardrail_time + search_time - wall_time):.3f}s"
+        )
+        return result, search_result
+
+    # batched pipeline for independent queries, results are returned in input order
+    # each item is {"status": "ok", "response": ...} or {"status": "error", "error": ...}
+    # batch queries are stateless, they are not part of any conversation session
+    async def retrieve_batch(self, queries: list[str]) -> list[dict]:
+
+        kb_version = await self.get_kb_version()
+        results = [None] * len(queries)
+
+        # bounded concurrency for bedrock calls (guardrail, embedding, llm)
+        semaphore = asyncio.Semaphore(self.settings.batch_concurrency)
+
+        async def bounded(coro):
+            async with semaphore:
+                return await coro
+
+        # exact cache lookup for all queries in one round trip
+        cached = [None] * len(queries)
+        if self.cache is not None:
+            with stage("cache_lookup"):
+                cached = await asyncio.to_thread(self.cache.query_cache_many, queries, kb_version)
+            for cache_response in cached:
+                record_cache(
+                    "exact", "miss" if cache_response is None else "hit",
+                    final=self.cache.semantic_index is None
+                )
+        pending = []
+        for i, cache_response in enumerate(cached):
+            if cache_response is not None:
+                results[i] = {"status": "ok", "response": cache_response}
+            else:
+                pending.append(i)
+        logger.info(f"Batch of {len(queries)} queries, {len(queries) - len(pending)} answered from cache")
+
+        # input guardrails, embeddings and semantic cache lookup per query
+        async def guard_and_embed(query):
+            with stage("input_guardrail"):
+                result = await self.input_guardrail.aapply(candidate_text=query)
+            if result.status == ValidationResult.FAIL:
+                return result, None, gen_structured_resp(result.response)
+            with stage("embedding"):
+                embedding = await agenerate_embedding(
+                    self.bedrock_client, result.response, self.embedding_cache, self.settings.embedding_model_id
+                )
+            cache_response = await self.semantic_lookup(embedding, kb_version)
+            return result, embedding, cache_response
+
+        guarded = await asyncio.gather(
+            *(bounded(guard_and_embed(queries[i])) for i in pending),
+            return_exceptions=True
+        )
+
+        to_search = []
+        for i, outcome in zip(pending, guarded):
+            if isinstance(outcome, Exception):
+                results[i] = batch_error(queries[i], outcome)
+            elif outcome[2] is not None:
+                results[i] = {"status": "ok", "response": outcome[2]}
+            else:
+                to_search.append((i, outcome[0].response, outcome[1]))
+
+        if not to_search:
+            return results
+
+        # one msearch request for all remaining queries instead of one search per query
+        try:
+            with stage("knn_search"):
+                responses = await asyncio.to_thread(
+                    retrieve_knowledge_many,
+                    self,
+                    [embedding for _, _, embedding in to_search],
+                    self.settings.index_name,
+                    self.settings.vector_top_k,
+                    [updated_query for _, updated_query, _ in to_search]
+                )
+        except Exception as e:
+            for i, _, _ in to_search:
+                results[i] = batch_error(queries[i], e)
+            return results
+
+        # llm generation and output guardrails per query
+        async def generate(updated_query, embedding, docs):
+            user_session = []
+            prepared = await self.assemble(updated_query, embedding, docs, kb_version, user_session)
+            with stage("llm"):
+                generated_response = await call_llm(self, user_session, prepared.system_prompt)
+            return await self.finalize(prepared, generated_response, user_session)
+
+        jobs = []
+        for (i, updated_query, embedding), docs in zip(to_search, responses):
+            if "error" in docs:
+                results[i] = batch_error(queries[i], RuntimeError(docs["error"]))
+            else:
+                jobs.append((i, bounded(generate(updated_query, embedding, docs))))
+
+        generated = await asyncio.gather(*(job for _, job in jobs), return_exceptions=True)
+        for (i, _), outcome in zip(jobs, generated):
+            if isinstance(outcome, Exception):
+                results[i] = batch_error(queries[i], outcome)
+            else:
+                results[i] = {"status": "ok", "response": outcome}
+
+        return results
+
+    # steps after llm generation
+    async def finalize(self, prepared: PreparedQuery, generated_response, user_session):
+
+        result = await self.guard_output(prepared, generated_response, user_session)
+        return await self.complete(prepared, result, user_session)
+
+    # output guardrails of the generated answer
+    async def guard_output(self, prepared: PreparedQuery, generated_response, user_session) -> GuardrailResult:
+
+        with stage("output_guardrail"):
+            return await self.output_guardrail.aapply(
                 candidate_text=generated_response,
-                context=context,
+                context=prepared.context,
                 session=user_session
             )
-            
-            #append the AI response in session
-            user_session.append(AIMessage(content=result.response))
-            
-            # generate structure response
-            structure_resp = gen_structured_resp(result.response)
 
-            # load response in cache for queries which are answered by a valid context
-            if (result.status is not ValidationResult.FAIL 
-                and len(structure_resp["sources"]) > 0
-            ):
-                self.cache.update_cache(updated_query, structure_resp)
+    # session and cache update with the guarded answer, returns the structured response
+    async def complete(self, prepared: PreparedQuery, result: GuardrailResult, user_session):
 
-            return structure_resp
-
-        except Exception as e:
-            logger.error(f"❌ Error! Retrieval Service Execution failed.")
-            logger.error(f"❌ Exception: {e}")
-            response = "Oops! An unexcepted error happened during response processing, please try later"
-            return gen_structured_resp(response)
+        #append the AI response in session
+        user_session.append(AIMessage(content=result.response))
+        
+        # generate structure response
+        structure_resp = gen_structured_resp(result.response)
+
+        # load response in cache for queries which are answered by a valid context
+        if (self.cache is not None
+            and result.status is not ValidationResult.FAIL 
+            and len(structure_resp["sources"]) > 0
+        ):
+            if result.audit is not None:
+                # answer is not verified yet, it is cached only once its audit passes
+                result.audit.add_done_callback(
+                    lambda audit: self.cache_after_audit(audit, prepared, structure_resp)
+                )
+            else:
+                with stage("cache_write"):
+                    await asyncio.to_thread(
+                        self.cache.update_cache,
+                        prepared.query,
+                        structure_resp,
+                        prepared.kb_version,
+                        prepared.embedding
+                    )
+
+        return structure_resp
+
+    ## cache an audited answer, answers failing (or missing) the audit are not cached ##
+    def cache_after_audit(self, audit: asyncio.Future, prepared: PreparedQuery, structure_resp):
+
+        verdict = audit.result() if not audit.cancelled() else None
+        if verdict is None or verdict.status is not ValidationResult.PASS:
+            logger.info("Answer did not pass faithfulness audit, not caching it")
+            return
+
+        def write():
+            try:
+                self.cache.update_cache(
+                    prepared.query, structure_resp, prepared.kb_version, prepared.embedding
+                )
+            except Exception as e:
+                logger.error(f"❌ Caching audited answer failed: {e}")
+
+        # callback runs on the event loop, redis call is offloaded to the worker pool
+        asyncio.get_running_loop().run_in_executor(None, write)
 
 ######## Retrieval Service Definition END ##########
 
 ########### Functions block BEGIN #################
 
-# search vector db for similarity
-def retrieve_knowledge(self, embedding, index_name, vector_top_k):
+# knn query body for an embedding
+# embedding is excluded from the returned source, it is not used after retrieval
+def knn_query(embedding, vector_top_k):
 
-    search_query = {
+    return {
         "size": vector_top_k,
+        "_source": {"excludes": ["embedding"]},
         "query": {
             "knn": {
                 "embedding": {
@@ -112,6 +506,19 @@ def retrieve_knowledge(self, embedding, index_name, vector_top_k):
             }
         }
     }
+#### END #######
+
+# search vector db for similarity
+# in hybrid mode the query text is also searched with BM25, see retrieve_knowledge_many
+def retrieve_knowledge(self, embedding, index_name, vector_top_k, query=None):
+
+    if query is not None and self.settings.retrieval_mode == "hybrid":
+        response = retrieve_knowledge_many(self, [embedding], index_name, vector_top_k, [query])[0]
+        if "error" in response:
+            raise RuntimeError(f"Hybrid search failed: {response['error']}")
+        return response
+
+    search_query = knn_query(embedding, vector_top_k)
 
     logger.info("Getting similarities from knowledge store...")
     response = self.db_client.search(body=search_query, index=index_name)
@@ -119,13 +526,67 @@ def retrieve_knowledge(self, embedding, index_name, vector_top_k):
     return response
 #### END #######
 
+# search vector db for several embeddings in one msearch request
+# returns one response per embedding in the same order, failed searches carry an "error" key
+# hybrid mode: knn and BM25 searches of each query are sent in the same msearch
+# and merged with reciprocal rank fusion
+def retrieve_knowledge_many(self, embeddings, index_name, vector_top_k, queries=None):
+
+    settings = self.settings
+    hybrid = queries is not None and settings.retrieval_mode == "hybrid"
+
+    body = []
+    for i, embedding in enumerate(embeddings):
+        body.append({"index": index_name})
+        body.append(knn_query(embedding, vector_top_k))
+        if hybrid:
+            body.append({"index": index_name})
+            body.append(bm25_query(queries[i], vector_top_k))
+
+    logger.info(f"Getting similarities from knowledge store for {len(embeddings)} queries (hybrid={hybrid})...")
+    responses = self.db_client.msearch(body=body)["responses"]
+    logger.info("Multi search completed. Proceeding further...")
+
+    if not hybrid:
+        return responses
+
+    return [
+        fuse_hybrid(
+            responses[i],
+            responses[i + 1],
+            knn_weight=settings.hybrid_knn_weight,
+            bm25_weight=settings.hybrid_bm25_weight,
+            rrf_k=settings.hybrid_rrf_k,
+            size=vector_top_k
+        )
+        for i in range(0, len(responses), 2)
+    ]
+#### END #######
+
+# search vector db for similarity without blocking the event loop
+async def aretrieve_knowledge(self, embedding, index_name, vector_top_k, query=None):
+
+    # opensearch client is blocking, hence the call is offloaded to the worker pool
+    return await asyncio.to_thread(retrieve_knowledge, self, embedding, index_name, vector_top_k, query)
+#### END #######
+
 # build context from retrived knowledge 
-def context_builder(query, docs, reranked_top_k):
+def context_builder(query, docs, settings: Settings, reranker=None):
 
     logger.info("Building context...")
-    #currently reranking is not handled hence query is not used
-    #reranked = rerank(query, hits)
-    context = get_top_k(docs, reranked_top_k)
+    if reranker is not None:
+        with stage("rerank"):
+            docs = {"hits": {"hits": reranker.rerank(query, docs["hits"]["hits"])}}
+
+    # all hits in rank order, packer selects up to reranked_top_k within the token budget
+    # merging overlapping chunks frees room for the next ranked chunks
+    ranked = get_top_k(docs, len(docs["hits"]["hits"]))
+    context = pack_context(
+        ranked,
+        max_chunks=settings.reranked_top_k,
+        token_budget=settings.context_token_budget,
+        duplicate_threshold=settings.context_duplicate_threshold
+    )
     logger.info("Context building completed. Proceeding further...")
     return context
 #### END #######
@@ -165,11 +626,10 @@ def get_top_k(docs, top_k):
 #assembling system_prompt based on context
 def prompt_assembly(context):
     
-    context_text = ""
     logger.info("Assembling prompt...")
-    for doc_id, chunk in enumerate(context, start=1):
-
-        context_text += f"""
+    # sections are joined once instead of repeated string concatenation
+    context_text = "".join(
+        f"""
         Context {doc_id}:
         Source: {chunk['filename']}
         
@@ -177,6 +637,8 @@ def prompt_assembly(context):
         {chunk['text']}
 
         """
+        for doc_id, chunk in enumerate(context, start=1)
+    )
 
     system_prompt = f"""
     You are a helpful assistant. Answer the user's question using ONLY the provided context..
@@ -210,15 +672,26 @@ def prompt_assembly(context):
 #### END #######
 
 #call llm by invoking graph
-def call_llm(self, user_session, system_prompt):
+async def call_llm(self, user_session, system_prompt):
 
     logger.info("Calling LLM to generate response...")
-    answer = execute_graph(self.graph, user_session, system_prompt)
+    answer = await aexecute_graph(self.graph, user_session, system_prompt)
     logger.info("Response generation completed.")
     return answer 
 #### END #######
 
 
+#per item error of a batch, details are logged and not returned to the caller
+def batch_error(query, error):
+
+    logger.error(f"❌ Batch query failed: {query[:80]!r}")
+    logger.error(f"❌ Exception: {error}")
+    return {
+        "status": "error",
+        "error": "An unexcepted error happened during processing of this query, please try later"
+    }
+#### END #######
+
 #generated structured response
 def gen_structured_resp(generated_answer):
 
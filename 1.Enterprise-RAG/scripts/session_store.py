@@ -0,0 +1,392 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage
+from redis.exceptions import RedisError, WatchError
+from cache_codec import CacheCodec
+from cache import CircuitBreaker
+from tokens import estimate_tokens
+import asyncio
+import threading
+import time
+import logging
+logger = logging.getLogger(__name__)
+
+########## Class definition BEGIN ##########
+
+## conversation history of users, keyed by session id (X-User-Id).
+## history is kept within a token budget by a sliding window, turns that fall
+## out of the window are dropped or, when a summarizer is given, folded into a
+## summary kept as a SystemMessage at the start of the history
+class SessionStore(ABC):
+
+    def __init__(
+            self,
+            max_tokens: int = 3000,
+            low_watermark: float = 0.5,
+            summarizer=None
+        ):
+        self.max_tokens = max_tokens
+        # history is trimmed down to low_watermark * max_tokens, so that
+        # trimming (and summarization) does not happen on every turn
+        self.low_watermark = low_watermark
+        self.summarizer = summarizer
+
+    ## abstract methods, history is stored as a list of messages ##
+    @abstractmethod
+    def load(self, session_id: str) -> list[BaseMessage] | None:
+        pass
+
+    @abstractmethod
+    def store(self, session_id: str, messages: list[BaseMessage]):
+        pass
+    ## end ##
+
+    ## load without blocking the event loop, backends with network i/o override it ##
+    async def aload(self, session_id: str) -> list[BaseMessage] | None:
+        return self.load(session_id)
+
+    async def astore(self, session_id: str, messages: list[BaseMessage]):
+        self.store(session_id, messages)
+    ## end ##
+
+    ## history of a session, new list is returned and can be modified by the caller ##
+    async def get(self, session_id: str) -> list[BaseMessage]:
+
+        messages = await self.aload(session_id)
+        return list(messages) if messages else []
+    ## end ##
+
+    ## append messages of a turn to the history of a session, applies the token window ##
+    ## the turn is appended to the latest stored history, so that concurrent turns
+    ## of the same user are all kept
+    async def append(self, session_id: str, turn: list[BaseMessage]):
+
+        current = await self.aload(session_id) or []
+        await self.astore(session_id, await self.window(list(current) + turn))
+    ## end ##
+
+    ## sliding window over the history within max_tokens, dropped turns are summarized ##
+    async def window(self, messages: list[BaseMessage]) -> list[BaseMessage]:
+
+        messages, dropped = self.trim(messages)
+        if dropped and self.summarizer is not None:
+            messages = await self.fold(messages, dropped)
+        return messages
+    ## end ##
+
+    ## drop oldest turns beyond max_tokens, returns (history, dropped messages) ##
+    ## the summary of the history is kept as is, no llm call is made
+    def trim(self, messages: list[BaseMessage]) -> tuple[list[BaseMessage], list[BaseMessage]]:
+
+        summary = leading_summary(messages)
+        turns = messages[1:] if summary is not None else messages
+
+        tokens = [estimate_tokens(message.content) for message in turns]
+        total = sum(tokens)
+        if total <= self.max_tokens:
+            return messages, []
+
+        # latest turn (from the last user message) is always kept
+        last_turn = max(
+            (i for i, message in enumerate(turns) if isinstance(message, HumanMessage)),
+            default=len(turns) - 1
+        )
+
+        # drop oldest messages
+        target = self.max_tokens * self.low_watermark
+        drop = 0
+        while total > target and drop < last_turn:
+            total -= tokens[drop]
+            drop += 1
+
+        # window starts with a user message as expected by the llm
+        while drop < last_turn and not isinstance(turns[drop], HumanMessage):
+            drop += 1
+
+        dropped, kept = turns[:drop], turns[drop:]
+        if not dropped:
+            return messages, []
+        logger.info(f"Session history trimmed, dropped {len(dropped)} messages, kept {len(kept)}")
+        return ([summary] if summary is not None else []) + kept, dropped
+    ## end ##
+
+    ## fold dropped turns into the summary at the start of the history ##
+    async def fold(self, messages: list[BaseMessage], dropped: list[BaseMessage]) -> list[BaseMessage]:
+
+        summary = leading_summary(messages)
+        try:
+            content = await self.summarizer.summarize(summary, dropped)
+        except Exception as e:
+            # previous summary is kept, dropped turns are lost
+            logger.error(f"❌ Session summarization failed: {e}")
+            return messages
+        return [SystemMessage(content=content)] + (messages[1:] if summary is not None else messages)
+    ## end ##
+
+## end ##
+
+## in-process session store, bounded by number of sessions (LRU) and idle ttl
+class LocalSessionStore(SessionStore):
+
+    def __init__(self, max_sessions: int = 10000, idle_ttl: int = 3600, **kwargs):
+        super().__init__(**kwargs)
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        # session_id -> (messages, expires_at), ordered by last access
+        self._sessions: OrderedDict[str, tuple[list[BaseMessage], float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    ## get history, refreshes idle ttl ##
+    def load(self, session_id: str) -> list[BaseMessage] | None:
+
+        with self._lock:
+            self._expire()
+            item = self._sessions.get(session_id)
+            if item is None:
+                return None
+            self._sessions[session_id] = (item[0], time.time() + self.idle_ttl)
+            self._sessions.move_to_end(session_id)
+            return item[0]
+    ## end ##
+
+    ## put history, evicts least recently used sessions ##
+    def store(self, session_id: str, messages: list[BaseMessage]):
+
+        with self._lock:
+            self._sessions[session_id] = (messages, time.time() + self.idle_ttl)
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+    ## end ##
+
+    ## remove idle sessions, oldest are at the front as sessions are ordered by access ##
+    def _expire(self):
+
+        now = time.time()
+        while self._sessions:
+            session_id, (_, expires_at) = next(iter(self._sessions.items()))
+            if expires_at > now:
+                break
+            del self._sessions[session_id]
+    ## end ##
+
+## end ##
+
+## redis session store, sessions survive restarts and are shared by replicas
+## idle ttl is the expiry of the key, refreshed on every save.
+## With an async client, concurrent turns of the same user (possibly on
+## different replicas) are appended using optimistic concurrency (WATCH/MULTI).
+## The transaction only trims the window, dropped turns are summarized by a
+## background task, so that the llm call is neither retried nor waited for
+class RedisSessionStore(SessionStore):
+
+    KEY_PREFIX = "session:"
+
+    def __init__(
+            self,
+            client,
+            idle_ttl: int = 3600,
+            codec: CacheCodec | None = None,
+            async_client=None,
+            max_retries: int = 3,
+            breaker: CircuitBreaker | None = None,
+            **kwargs
+        ):
+        super().__init__(**kwargs)
+        self.client = client  #sync redis client
+        self.async_client = async_client  #redis.asyncio client
+        self.idle_ttl = idle_ttl
+        #messages are stored as [[type, content], ...] encoded by the codec
+        self.codec = codec or CacheCodec()
+        self.max_retries = max_retries
+        self.breaker = breaker or CircuitBreaker()
+        # pending summarizations, referenced so that they are not garbage collected
+        self._summaries: set[asyncio.Task] = set()
+
+    ## get history, redis failure is served as a new conversation ##
+    def load(self, session_id: str) -> list[BaseMessage] | None:
+
+        key = self.KEY_PREFIX + session_id
+        data = self.breaker.call(self.client.get, key)
+
+        messages = self.decode(data)
+        if messages is None and data is not None:
+            # corrupt session is removed, so that following turns start a new conversation
+            self.breaker.call(self.client.delete, key)
+        return messages
+    ## end ##
+
+    ## decode stored history, None when missing or undecodable (corrupt) ##
+    def decode(self, data) -> list[BaseMessage] | None:
+
+        if data is None:
+            return None
+        try:
+            return from_pairs(self.codec.decode(data))
+        except Exception as e:
+            logger.error(f"❌ Session is not readable, starting a new conversation: {e}")
+            return None
+    ## end ##
+
+    ## put history ##
+    def store(self, session_id: str, messages: list[BaseMessage]):
+
+        self.breaker.call(
+            self.client.set,
+            self.KEY_PREFIX + session_id, self.codec.encode(to_pairs(messages)), ex=self.idle_ttl
+        )
+    ## end ##
+
+    ## redis client is blocking, calls are offloaded to the worker pool ##
+    async def aload(self, session_id: str) -> list[BaseMessage] | None:
+        return await asyncio.to_thread(self.load, session_id)
+
+    async def astore(self, session_id: str, messages: list[BaseMessage]):
+        await asyncio.to_thread(self.store, session_id, messages)
+    ## end ##
+
+    ## append a turn, retried when the session is modified by a concurrent turn ##
+    async def append(self, session_id: str, turn: list[BaseMessage]):
+
+        if self.async_client is None:
+            return await super().append(session_id, turn)
+
+        if not self.breaker.allow():
+            logger.error("❌ Redis is unavailable, turn is not kept")
+            return
+
+        key = self.KEY_PREFIX + session_id
+        for attempt in range(self.max_retries):
+            try:
+                async with self.async_client.pipeline(transaction=True) as pipe:
+                    # commands are executed immediately until multi()
+                    await pipe.watch(key)
+                    data = await pipe.get(key)
+                    self.breaker.record_success()
+                    # corrupt session is overwritten by the new turn
+                    current = self.decode(data) or []
+                    messages, dropped = self.trim(current + turn)
+
+                    pipe.multi()
+                    pipe.set(key, self.codec.encode(to_pairs(messages)), ex=self.idle_ttl)
+                    # fails with WatchError if the key was modified after watch
+                    await pipe.execute()
+                break
+            except WatchError:
+                logger.info(f"Session was modified by a concurrent turn, retrying (attempt {attempt + 1})")
+            except (RedisError, OSError) as e:
+                self.breaker.record_failure()
+                logger.error(f"❌ Saving session to redis failed: {e}")
+                return
+            except Exception as e:
+                logger.error(f"❌ Saving session to redis failed: {e}")
+                return
+        else:
+            logger.error(f"❌ Saving session failed after {self.max_retries} attempts, turn is not kept")
+            return
+
+        if dropped and self.summarizer is not None:
+            task = asyncio.create_task(self.summarize(key, leading_summary(messages), dropped))
+            self._summaries.add(task)
+            task.add_done_callback(self._summaries.discard)
+    ## end ##
+
+    ## summarize dropped turns and replace the summary of the stored session ##
+    ## skipped when the summary was replaced in the meantime (concurrent summarization)
+    async def summarize(self, key: str, summary: SystemMessage | None, dropped: list[BaseMessage]):
+
+        folded = await self.fold([summary] if summary is not None else [], dropped)
+        if not folded or folded[0] is summary:
+            return  #summarization failed, logged by fold
+
+        for attempt in range(self.max_retries):
+            try:
+                async with self.async_client.pipeline(transaction=True) as pipe:
+                    await pipe.watch(key)
+                    current = self.decode(await pipe.get(key))
+                    if current is None:
+                        return  #session expired or was reset
+                    head = leading_summary(current)
+                    if (head and head.content) != (summary and summary.content):
+                        logger.warning("Session summary was replaced by a concurrent turn, summary is dropped")
+                        return
+
+                    messages = folded + (current[1:] if head is not None else current)
+                    pipe.multi()
+                    pipe.set(key, self.codec.encode(to_pairs(messages)), ex=self.idle_ttl)
+                    await pipe.execute()
+                    return
+            except WatchError:
+                logger.info(f"Session was modified by a concurrent turn, retrying summary (attempt {attempt + 1})")
+            except (RedisError, OSError) as e:
+                self.breaker.record_failure()
+                logger.error(f"❌ Saving session summary to redis failed: {e}")
+                return
+            except Exception as e:
+                logger.error(f"❌ Saving session summary to redis failed: {e}")
+                return
+    ## end ##
+
+## end ##
+
+## folds turns dropped from the window into a running summary
+class SessionSummarizer:
+
+    def __init__(self, llm, max_words: int = 150):
+        self.llm = llm
+        self.max_words = max_words
+
+    ## summary of previous summary and dropped turns ##
+    async def summarize(self, summary: SystemMessage | None, dropped: list[BaseMessage]) -> str:
+
+        logger.info("Summarizing older turns of the session...")
+        previous = summary.content if summary is not None else ""
+        turns = "\n".join(
+            f"{'User' if isinstance(message, HumanMessage) else 'Assistant'}: {message.content}"
+            for message in dropped
+        )
+
+        response = await self.llm.ainvoke([
+            SystemMessage(
+                content=f"""
+                Summarize the earlier part of a conversation between a user and an assistant.
+                Keep facts, names and preferences stated by the user and the topics discussed.
+                Do not add information that is not present. Use at most {self.max_words} words.
+                """
+            ),
+            HumanMessage(
+                content=f"""
+                Previous summary:
+                {previous}
+
+                Conversation:
+                {turns}
+                """
+            )
+        ])
+        logger.info("Session summarization completed.")
+        return f"Summary of the earlier conversation: {response.content}"
+    ## end ##
+
+## end ##
+
+########## Class definition END ##########
+
+########## Function definition BEGIN ##########
+
+## summary message at the start of a history, None when there is none ##
+def leading_summary(messages: list[BaseMessage]) -> SystemMessage | None:
+    return messages[0] if messages and isinstance(messages[0], SystemMessage) else None
+## end ##
+
+## compact form of messages for serialization, [[type, content], ...] ##
+MESSAGE_TYPES = {"h": HumanMessage, "a": AIMessage, "s": SystemMessage}
+
+def to_pairs(messages: list[BaseMessage]) -> list[list]:
+    return [[message.type[0], message.content] for message in messages]
+
+def from_pairs(pairs: list[list]) -> list[BaseMessage]:
+    return [MESSAGE_TYPES[kind](content=content) for kind, content in pairs]
+## end ##
+
+########## Function definition END ##########
@@ -0,0 +1,81 @@
+from dataclasses import dataclass
+from tokens import context_token_budget
+import os
+import logging
+logger = logging.getLogger(__name__)
+
+########## Class definition BEGIN ##########
+
+## settings of the retrieval path, resolved once at startup (lifespan)
+## frozen so that shared services cannot modify them while serving requests
+@dataclass(frozen=True)
+class Settings:
+    index_name: str = "enterprise-rag-index"
+    vector_top_k: int = 10
+    reranked_top_k: int = 5
+    embedding_model_id: str = "amazon.titan-embed-text-v2:0"
+    llm_model_id: str = "openai.gpt-oss-120b-1:0"
+    #0: disable, 1: input guardrail, 2: output guardrail, 3: both
+    guardrails_enabled: int = 0
+    guardrail_id: str = "0"
+    guardrail_version: str = "1"
+    faithfulness_threshold: float = 0.9
+    #judge: LLM-as-a-Judge for every answer
+    #tiered: local lexical check first, judge only when the answer is not clearly supported
+    #audit: as tiered, but the judge runs after the response is returned (not a gate)
+    faithfulness_mode: str = "judge"
+    #lexical score at or above which the judge is skipped
+    faithfulness_fast_pass: float = 0.9
+    #max background judge audits in flight, further audits are skipped
+    faithfulness_max_audits: int = 100
+    #run embedding + knn search concurrently with input guardrail
+    speculative_retrieval: bool = False
+    #max queries accepted by /userquery/batch and concurrent llm calls per batch
+    batch_max_queries: int = 20
+    batch_concurrency: int = 4
+    #knn: vector search only, hybrid: knn + BM25 merged with reciprocal rank fusion
+    retrieval_mode: str = "knn"
+    hybrid_knn_weight: float = 1.0
+    hybrid_bm25_weight: float = 1.0
+    hybrid_rrf_k: int = 60
+    #approx. token budget of the context in the prompt, 0: no budget
+    #from_env derives it from the context window of llm_model_id unless it is set
+    context_token_budget: int = 2500
+    #chunks with word set similarity above threshold are dropped as near-duplicates
+    context_duplicate_threshold: float = 0.9
+
+    ## read settings from env ##
+    @classmethod
+    def from_env(cls) -> "Settings":
+        llm_model_id = os.getenv("LLM_MODEL_ID", "openai.gpt-oss-120b-1:0")
+        context_budget = os.getenv("CONTEXT_TOKEN_BUDGET", "")
+        settings = cls(
+            index_name=os.getenv("INDEX_NAME", "enterprise-rag-index"),
+            vector_top_k=int(os.getenv("VECTOR_TOP_K", "10")),
+            reranked_top_k=int(os.getenv("RE_RANKED_TOP_K", "5")),
+            embedding_model_id=os.getenv("EMBEDDING_MODEL_ID", "amazon.titan-embed-text-v2:0"),
+            llm_model_id=llm_model_id,
+            guardrails_enabled=int(os.getenv("ENABLE_GUARDRAILS", "0")),
+            guardrail_id=os.getenv("AWS_GUARDRAIL_ID", "0"),
+            guardrail_version=os.getenv("AWS_GUARDRAIL_VERSION", "1"),
+            faithfulness_threshold=float(os.getenv("FAITHFULNESS_THRESHOLD", "0.9")),
+            faithfulness_mode=os.getenv("FAITHFULNESS_MODE", "judge"),
+            faithfulness_fast_pass=float(os.getenv("FAITHFULNESS_FAST_PASS", "0.9")),
+            faithfulness_max_audits=int(os.getenv("FAITHFULNESS_MAX_AUDITS", "100")),
+            speculative_retrieval=os.getenv("SPECULATIVE_RETRIEVAL", "0") == "1",
+            batch_max_queries=int(os.getenv("BATCH_MAX_QUERIES", "20")),
+            batch_concurrency=int(os.getenv("BATCH_CONCURRENCY", "4")),
+            retrieval_mode=os.getenv("RETRIEVAL_MODE", "knn"),
+            hybrid_knn_weight=float(os.getenv("HYBRID_KNN_WEIGHT", "1.0")),
+            hybrid_bm25_weight=float(os.getenv("HYBRID_BM25_WEIGHT", "1.0")),
+            hybrid_rrf_k=int(os.getenv("HYBRID_RRF_K", "60")),
+            context_token_budget=int(context_budget) if context_budget else context_token_budget(llm_model_id),
+            context_duplicate_threshold=float(os.getenv("CONTEXT_DUPLICATE_THRESHOLD", "0.9")),
+        )
+        logger.info(f"Settings resolved: {settings}")
+        return settings
+    ## end ##
+
+## end ##
+
+########## Class definition END ##########
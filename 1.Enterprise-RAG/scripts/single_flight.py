@@ -0,0 +1,147 @@
+import asyncio
+import hashlib
+import time
+import uuid
+import logging
+from cache import CircuitBreaker
+logger = logging.getLogger(__name__)
+
+########## Class definition BEGIN ##########
+
+## request coalescing, concurrent calls with the same key share one execution.
+## first caller (leader) runs the pipeline, callers arriving while it is in
+## flight (followers) await the leader's result instead of running it again
+class SingleFlight:
+
+    def __init__(self):
+        self._inflight: dict[str, asyncio.Future] = {}
+        self.stats = {"leader": 0, "shared": 0}
+
+    ## run func once per key, returns (result, shared) ##
+    async def do(self, key: str, func, cache=None, query: str | None = None, kb_version: str | None = None):
+
+        future = self._inflight.get(key)
+        if future is not None:
+            self.stats["shared"] += 1
+            logger.info("Identical query is in flight, waiting for its result")
+            # shield so that a cancelled follower does not cancel the leader
+            return await asyncio.shield(future), True
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        self.stats["leader"] += 1
+
+        try:
+            result = await self.run(key, func, cache, query, kb_version)
+            future.set_result(result)
+            return result, False
+        except BaseException as e:
+            future.set_exception(e)
+            # mark exception as retrieved when there are no followers
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+    ## end ##
+
+    ## execute leader function ##
+    async def run(self, key: str, func, cache, query, kb_version):
+        return await func()
+    ## end ##
+
+## end ##
+
+## cross-pod request coalescing using a redis lock.
+## leader of a pod takes the lock, leaders of other pods wait until the lock
+## is released and read the result from response cache. If the result was not
+## cached (for e.g. answer without sources) or waiting times out, they run it themselves
+class RedisSingleFlight(SingleFlight):
+
+    LOCK_PREFIX = "single-flight:"
+
+    #delete lock only if it is still owned by this caller
+    RELEASE_SCRIPT = """
+    if redis.call("get", KEYS[1]) == ARGV[1] then
+        return redis.call("del", KEYS[1])
+    end
+    return 0
+    """
+
+    #returned by guarded redis calls when redis is unavailable
+    UNAVAILABLE = object()
+
+    def __init__(
+            self,
+            client,
+            lock_ttl: int = 60,
+            poll_interval: float = 0.1,
+            breaker: CircuitBreaker | None = None
+        ):
+        super().__init__()
+        self.client = client  #redis.asyncio client
+        self.lock_ttl = lock_ttl
+        self.poll_interval = poll_interval
+        self.breaker = breaker or CircuitBreaker()
+
+    ## execute leader function ##
+    async def run(self, key: str, func, cache, query, kb_version):
+
+        lock_key = self.LOCK_PREFIX + key
+        token = uuid.uuid4().hex
+
+        acquired = await self.breaker.acall(
+            self.client.set, lock_key, token, nx=True, ex=self.lock_ttl, default=self.UNAVAILABLE
+        )
+        if acquired is self.UNAVAILABLE:
+            # coalescing is best effort, run locally when redis is unavailable
+            logger.error("❌ Acquiring single-flight lock failed, running locally")
+            return await func()
+
+        if not acquired:
+            result = await self.wait_for_result(lock_key, cache, query, kb_version)
+            if result is not None:
+                self.stats["shared"] += 1
+                return result
+            return await func()
+
+        try:
+            return await func()
+        finally:
+            # lock expires after lock_ttl when it cannot be released
+            await self.breaker.acall(self.client.eval, self.RELEASE_SCRIPT, 1, lock_key, token)
+    ## end ##
+
+    ## wait until other pod releases the lock, then read its result from cache ##
+    async def wait_for_result(self, lock_key, cache, query, kb_version):
+
+        if cache is None:
+            return None
+
+        logger.info("Identical query is in flight on another pod, waiting for its result")
+        deadline = time.time() + self.lock_ttl
+
+        while time.time() < deadline:
+            exists = await self.breaker.acall(self.client.exists, lock_key, default=self.UNAVAILABLE)
+            if exists is self.UNAVAILABLE:
+                logger.error("❌ Waiting for single-flight lock failed")
+                return None
+            if not exists:
+                break
+            await asyncio.sleep(self.poll_interval)
+
+        return await cache.aquery_cache(query, kb_version)
+    ## end ##
+
+## end ##
+
+########## Class definition END ##########
+
+########## Functions BEGIN ##########
+
+## coalescing key, same normalization as response cache key ##
+def single_flight_key(query: str, kb_version: str) -> str:
+    normalized = " ".join(query.lower().strip().split())
+    return hashlib.sha256(f"{normalized}:{kb_version}".encode()).hexdigest()
+## end ##
+
+########## Functions END ##########
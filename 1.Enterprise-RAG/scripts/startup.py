@@ -1,12 +1,19 @@
 import os
 import boto3
+from botocore.config import Config
 from aws_utilities import get_opensearch_client
 from aws_utilities import AwsCredentials, get_tempSession_assumeRole
 from init_llm import init_llm
 from graph import create_graph
-from create_index import create_index
+from create_index import create_index, create_meta_index
 from guardrails_classes import ClaimsStatus
-from cache import Cache, CacheType, RedisCache, LocalCache
+from cache import Cache, CacheType, RedisCache, LocalCache, EmbeddingCache, CircuitBreaker
+from cache_codec import CacheCodec
+from kb_version import KnowledgeBaseVersion, get_meta_index_name
+from single_flight import SingleFlight, RedisSingleFlight
+from cache_warmer import QueryFrequency
+from session_store import SessionStore, LocalSessionStore, RedisSessionStore, SessionSummarizer
+from reranker import create_reranker
 import logging
 logger = logging.getLogger(__name__)
 
@@ -34,17 +41,26 @@ def startup():
     assumed_session = boto3.Session()
     logger.info("✅boto3.Session created")
 
+    # blocking clients are called from the worker pool, connection pools are sized
+    # to WORKER_THREADS so that threads do not queue for a connection (default is 10)
+    worker_threads = int(os.getenv("WORKER_THREADS", "32"))
+    client_config = Config(max_pool_connections=worker_threads)
     
     #get vector db client
     logger.info("Creating Opensearch serverless client...")
-    db_client = get_opensearch_client(assumed_session, os.environ["VECTOR_DB_HOSTNAME"].replace("https://", ""))
+    db_client = get_opensearch_client(
+        assumed_session,
+        os.environ["VECTOR_DB_HOSTNAME"].replace("https://", ""),
+        pool_maxsize=worker_threads
+    )
     logger.info("Opensearch serverless client created.")
 
     #create index
     create_index(db_client)
+    create_meta_index(db_client, get_meta_index_name())
 
     #get llm
-    llm = init_llm(assumed_session, os.getenv("LLM_MODEL_ID", "openai.gpt-oss-120b-1:0"))
+    llm = init_llm(assumed_session, os.getenv("LLM_MODEL_ID", "openai.gpt-oss-120b-1:0"), client_config)
 
     #create graph
     logger.info("Creating langgraph graph...")
@@ -54,28 +70,168 @@ def startup():
     #initialize llm_as_judge
     if (int(os.getenv("ENABLE_GUARDRAILS", "0")) > 0):
         logger.info("Guardrails are enabled")
-        judge_llm = init_llm(assumed_session, os.getenv("LLM_AS_JUDGE_MODEL_ID", "qwen.qwen3-32b-v1:0"))
+        judge_llm = init_llm(assumed_session, os.getenv("LLM_AS_JUDGE_MODEL_ID", "qwen.qwen3-32b-v1:0"), client_config)
         judge_llm = judge_llm.with_structured_output(ClaimsStatus)
         logger.info("LLM_AS_JUDGE initialized.")
 
-    bedrock_client = assumed_session.client("bedrock-runtime")
+    bedrock_client = assumed_session.client("bedrock-runtime", config=client_config)
 
     # initialize cache
     cache_type = CacheType(os.getenv("CACHE_TYPE", "0"))
+    cache_ttl = int(os.getenv("CACHE_TTL_SECONDS", "86400"))
+    codec = CacheCodec(
+        codec=os.getenv("CACHE_CODEC", "json"),
+        compression_threshold=int(os.getenv("CACHE_COMPRESSION_THRESHOLD", "0")),
+    )
+
+    # semantic cache settings, None when semantic cache is disabled
+    semantic_cache = None
+    if int(os.getenv("SEMANTIC_CACHE_ENABLED", "0")):
+        semantic_cache = {
+            "threshold": float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92")),
+            "near_miss_margin": float(os.getenv("SEMANTIC_CACHE_NEAR_MISS_MARGIN", "0.05")),
+            "max_entries": int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "5000")),
+        }
+        logger.info(f"Semantic cache is enabled, settings={semantic_cache}")
     
     if cache_type == CacheType.REDIS:
         logger.info("Redis cache is enabled, initializing cache...")
         host = os.environ["REDIS_HOST"]
         port = int(os.getenv("REDIS_PORT", "6379")) 
-        cache: Cache = RedisCache(host, port)
+        if semantic_cache:
+            semantic_cache["refresh_interval"] = int(os.getenv("SEMANTIC_CACHE_REFRESH_SECONDS", "30"))
+        cache: Cache = RedisCache(
+            host,
+            port,
+            semantic_cache=semantic_cache,
+            ttl=cache_ttl,
+            codec=codec,
+            max_connections=int(os.getenv("REDIS_MAX_CONNECTIONS", "50")),
+            socket_timeout=float(os.getenv("REDIS_SOCKET_TIMEOUT", "0.5")),
+            socket_connect_timeout=float(os.getenv("REDIS_CONNECT_TIMEOUT", "0.5")),
+            health_check_interval=int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", "30")),
+            breaker=CircuitBreaker(
+                failure_threshold=int(os.getenv("REDIS_BREAKER_FAILURES", "5")),
+                reset_timeout=int(os.getenv("REDIS_BREAKER_RESET_SECONDS", "30")),
+            ),
+        )
         logger.info("Redis initialized.")
         
     elif cache_type == CacheType.LOCAL:
-        cache: Cache = LocalCache()
+        cache: Cache = LocalCache(
+            semantic_cache=semantic_cache,
+            max_entries=int(os.getenv("LOCAL_CACHE_MAX_ENTRIES", "10000")),
+            max_bytes=int(os.getenv("LOCAL_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+            ttl=cache_ttl,
+            codec=codec,
+        )
         logger.info("Local cache initialized.")
     else: 
         cache = None
         logger.info("Cache is disabled")
 
-    return bedrock_client, db_client, app, judge_llm, cache
+    # initialize embedding cache, backed by redis when redis cache is enabled
+    embedding_cache_size = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+    if embedding_cache_size > 0:
+        embedding_cache = EmbeddingCache(
+            max_entries=embedding_cache_size,
+            client=cache.client if isinstance(cache, RedisCache) else None,
+            breaker=cache.breaker if isinstance(cache, RedisCache) else None
+        )
+        logger.info(f"Embedding cache initialized, EMBEDDING_CACHE_SIZE={embedding_cache_size}")
+    else:
+        embedding_cache = None
+        logger.info("Embedding cache is disabled")
+
+    # knowledge base version used in cache keys, bumped by ingestion service
+    kb_version = KnowledgeBaseVersion(
+        db_client,
+        get_meta_index_name(),
+        ttl=int(os.getenv("KB_VERSION_TTL_SECONDS", "30"))
+    )
+
+    # shared-state mode, conversation history, response cache and request coalescing
+    # are kept in redis so that the deployment can run several replicas
+    shared_state = os.getenv("SHARED_STATE", "0") == "1" and isinstance(cache, RedisCache)
+    if shared_state:
+        logger.info("Shared-state mode enabled, per-user state is kept in redis")
+
+    # request coalescing, 0: disable, 1: within pod, 2: across pods using redis lock
+    single_flight_mode = "2" if shared_state else os.getenv("SINGLE_FLIGHT", "1")
+    if single_flight_mode == "2" and isinstance(cache, RedisCache):
+        single_flight = RedisSingleFlight(
+            cache.async_client,
+            lock_ttl=int(os.getenv("SINGLE_FLIGHT_LOCK_TTL", "60")),
+            breaker=cache.breaker
+        )
+        logger.info("Single-flight request coalescing enabled across pods (redis)")
+    elif single_flight_mode in ("1", "2"):
+        single_flight = SingleFlight()
+        logger.info("Single-flight request coalescing enabled within pod")
+    else:
+        single_flight = None
+        logger.info("Single-flight request coalescing is disabled")
+
+    # query frequency for cache warming, shared across pods when redis cache is enabled
+    query_frequency = None
+    if cache is not None and int(os.getenv("CACHE_WARM_ENABLED", "0")):
+        query_frequency = QueryFrequency(
+            client=cache.client if isinstance(cache, RedisCache) else None,
+            max_entries=int(os.getenv("QUERY_FREQUENCY_MAX_ENTRIES", "10000")),
+            max_pending=int(os.getenv("QUERY_FREQUENCY_MAX_PENDING", "1000")),
+            flush_interval=int(os.getenv("QUERY_FREQUENCY_FLUSH_SECONDS", "60")),
+            ttl=int(os.getenv("QUERY_FREQUENCY_TTL_SECONDS", str(7 * 86400))),
+            breaker=cache.breaker if isinstance(cache, RedisCache) else None
+        )
+        query_log = os.getenv("CACHE_WARM_QUERY_LOG")
+        if query_log and os.path.exists(query_log):
+            query_frequency.load_log(query_log)
+        logger.info("Query frequency tracking enabled for cache warming")
+
+    # conversation history store, 1: redis (requires CACHE_TYPE=1), 2: local
+    session_window = {
+        "max_tokens": int(os.getenv("SESSION_MAX_TOKENS", "3000")),
+        "low_watermark": float(os.getenv("SESSION_LOW_WATERMARK", "0.5")),
+    }
+    summary_model_id = os.getenv("SESSION_SUMMARY_MODEL_ID")
+    if summary_model_id:
+        session_window["summarizer"] = SessionSummarizer(init_llm(assumed_session, summary_model_id, client_config))
+        logger.info("Session summarization enabled")
+
+    idle_ttl = int(os.getenv("SESSION_IDLE_TTL_SECONDS", "3600"))
+    session_store_type = "1" if shared_state else os.getenv("SESSION_STORE_TYPE", "2")
+    if session_store_type == "1" and isinstance(cache, RedisCache):
+        session_store: SessionStore = RedisSessionStore(
+            cache.client,
+            idle_ttl=idle_ttl,
+            codec=codec,
+            async_client=cache.async_client,
+            breaker=cache.breaker,
+            **session_window
+        )
+        logger.info("Redis session store initialized.")
+    else:
+        if session_store_type == "1":
+            logger.warning("Redis session store requires CACHE_TYPE=1, using local session store")
+        session_store = LocalSessionStore(
+            max_sessions=int(os.getenv("SESSION_MAX_SESSIONS", "10000")),
+            idle_ttl=idle_ttl,
+            **session_window
+        )
+        logger.info("Local session store initialized.")
+
+    # rerank stage of context builder, none: disable, lexical, cross-encoder
+    reranker = create_reranker(
+        os.getenv("RERANKER", "none"),
+        model_name=os.getenv("RERANK_MODEL") or None,
+        lexical_weight=float(os.getenv("RERANK_LEXICAL_WEIGHT", "0.5")),
+        latency_budget=int(os.getenv("RERANK_LATENCY_BUDGET_MS", "200")) / 1000,
+        cache_size=int(os.getenv("RERANK_CACHE_SIZE", "10000")),
+    )
+    logger.info(f"Reranker: {type(reranker).__name__ if reranker else 'disabled'}")
+
+    return (
+        bedrock_client, db_client, app, judge_llm, cache, embedding_cache, kb_version, single_flight,
+        query_frequency, session_store, reranker
+    )
 ########## END ##########
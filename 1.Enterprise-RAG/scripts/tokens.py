@@ -0,0 +1,52 @@
+import logging
+logger = logging.getLogger(__name__)
+
+## approximate context windows (tokens) of bedrock generation models, by model id prefix.
+## the longest matching prefix wins, cross-region inference prefixes (us., eu., ...) are ignored
+MODEL_CONTEXT_WINDOWS = {
+    "openai.gpt-oss": 128000,
+    "anthropic.claude": 200000,
+    "amazon.nova-micro": 128000,
+    "amazon.nova": 300000,
+    "amazon.titan-text-lite": 4000,
+    "amazon.titan-text-express": 8000,
+    "amazon.titan-text-premier": 32000,
+    "meta.llama3-8b": 8000,
+    "meta.llama3-70b": 8000,
+    "meta.llama3": 128000,
+    "mistral.mistral-large": 128000,
+    "mistral": 32000,
+    "cohere.command-r": 128000,
+    "ai21.jamba": 256000,
+}
+DEFAULT_CONTEXT_WINDOW = 8000  #unknown models, kept small to be safe
+REGION_PREFIXES = ("us.", "eu.", "apac.", "global.")
+
+# share of the context window given to retrieved context, the rest is left to
+# instructions, session history and the answer
+CONTEXT_WINDOW_SHARE = 0.25
+
+########## Function definition BEGIN ##########
+
+## approximate number of tokens of a message content, ~4 characters per token ##
+def estimate_tokens(content) -> int:
+    return len(str(content)) // 4 + 1
+## end ##
+
+## context window of a generation model ##
+def context_window(model_id: str) -> int:
+
+    model_id = model_id.removeprefix(next((p for p in REGION_PREFIXES if model_id.startswith(p)), ""))
+    prefixes = [prefix for prefix in MODEL_CONTEXT_WINDOWS if model_id.startswith(prefix)]
+    if not prefixes:
+        logger.warning(f"Context window of model={model_id} is unknown, assuming {DEFAULT_CONTEXT_WINDOW} tokens")
+        return DEFAULT_CONTEXT_WINDOW
+    return MODEL_CONTEXT_WINDOWS[max(prefixes, key=len)]
+## end ##
+
+## token budget of retrieved context in the prompt of a generation model ##
+def context_token_budget(model_id: str) -> int:
+    return int(context_window(model_id) * CONTEXT_WINDOW_SHARE)
+## end ##
+
+########## Function definition END ##########
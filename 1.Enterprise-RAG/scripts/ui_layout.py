@@ -330,7 +330,7 @@ def ui_login(user_email, root_path):
 
                 try {
 
-                    const response = await fetch("__USER_QUERY__", {
+                    const response = await fetch("__USER_QUERY_STREAM__", {
 
                         method: "POST",
 
@@ -350,11 +350,11 @@ def ui_login(user_email, root_path):
                         return;
                     }
 
-                    const data = await response.json();
+                    // REPLACE LOADING CARD WITH STREAMING RESPONSE CARD
 
-                    // REPLACE LOADING CARD WITH ACTUAL RESPONSE
+                    const card = document.getElementById(loadingId);
 
-                    document.getElementById(loadingId).innerHTML = `
+                    card.innerHTML = `
 
                         <div style="
                             font-size: 13px;
@@ -365,32 +365,95 @@ def ui_login(user_email, root_path):
                             Query: ${text}
                         </div>
 
-                        <div class="result-content" >
-                            ${data.answer}
-                        </div>
+                        <div class="result-content" style="white-space: pre-wrap;"></div>
 
-                        <div class="response-footer" >
+                        <div class="response-footer" ></div>
+                    `;
 
-                            ${data.sources && data.sources.length > 0 ? `
-                                <div class="citation-text">
-                                    Citation: ${data.sources.join(", ")}
-                                </div>
-                            ` : ``}
+                    const content = card.querySelector(".result-content");
 
-                            <button
-                                class="copy-icon-button"
-                                onclick="copyResponse(this)"
-                                title="Copy response"
-                            >
-                                ⧉
-                            </button>
+                    const footer = card.querySelector(".response-footer");
 
-                        </div>
-                    `;
+                    // READ SERVER-SENT EVENTS, RENDER TOKENS AS THEY ARRIVE
+
+                    const reader = response.body.getReader();
+
+                    const decoder = new TextDecoder();
+
+                    let buffer = "";
+
+                    let streamed = "";
+
+                    while (true) {
+
+                        const { value, done } = await reader.read();
+
+                        if (done) break;
+
+                        buffer += decoder.decode(value, { stream: true });
+
+                        // SSE frames are separated by a blank line
+
+                        const frames = buffer.split("\\n\\n");
+
+                        buffer = frames.pop();
+
+                        for (const frame of frames) {
+
+                            let eventName = "message";
 
-                    // AUTO SCROLL AFTER RESPONSE
+                            let eventData = "";
 
-                    resultsContainer.scrollTop = resultsContainer.scrollHeight;
+                            for (const line of frame.split("\\n")) {
+
+                                if (line.startsWith("event: ")) eventName = line.slice(7);
+
+                                else if (line.startsWith("data: ")) eventData += line.slice(6);
+                            }
+
+                            if (!eventData) continue;
+
+                            const data = JSON.parse(eventData);
+
+                            if (eventName === "token") {
+
+                                streamed += data;
+
+                                content.textContent = streamed;
+                            }
+
+                            else if (eventName === "final" || eventName === "blocked") {
+
+                                // FINAL ANSWER (AFTER OUTPUT GUARDRAILS) REPLACES STREAMED TEXT,
+                                // ON "blocked" THE STREAMED TOKENS WERE REJECTED AND ARE DISCARDED
+
+                                content.style.whiteSpace = "";
+
+                                content.innerHTML = data.answer;
+
+                                footer.innerHTML = `
+
+                                    ${data.sources && data.sources.length > 0 ? `
+                                        <div class="citation-text">
+                                            Citation: ${data.sources.join(", ")}
+                                        </div>
+                                    ` : ``}
+
+                                    <button
+                                        class="copy-icon-button"
+                                        onclick="copyResponse(this)"
+                                        title="Copy response"
+                                    >
+                                        ⧉
+                                    </button>
+                                `;
+                            }
+                        }
+
+                        // AUTO SCROLL WHILE STREAMING
+
+                        resultsContainer.scrollTop = resultsContainer.scrollHeight;
+                    }
                 }
 
                 catch (error) {
@@ -439,6 +502,7 @@ def ui_login(user_email, root_path):
 
     replacements = {
         "__USER_EMAIL__": user_email,
+        "__USER_QUERY_STREAM__": f"{root_path}/userquery/stream",
         "__USER_QUERY__": f"{root_path}/userquery",
         "__LOGOUT__": f"{root_path}/logout"
     }
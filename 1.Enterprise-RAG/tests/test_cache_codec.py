@@ -0,0 +1,54 @@
+import json
+import pytest
+import cache_codec
+from cache_codec import CacheCodec
+
+## representative gen_structured_resp payload, long markdown answer with sources
+RESPONSE = {
+    "answer": "\n".join(
+        f"- **Policy {i}**: employees are entitled to {i} days of leave, requests go through the HR portal."
+        for i in range(60)
+    ),
+    "sources": ["leave-policy.pdf", "hr-handbook.docx", "benefits-2025.pdf"],
+}
+
+FORMATS = [
+    "json",
+    pytest.param("msgpack", marks=pytest.mark.skipif(cache_codec.msgpack is None, reason="msgpack not installed")),
+]
+COMPRESSION = [
+    0,
+    pytest.param(64, marks=pytest.mark.skipif(cache_codec.zstandard is None, reason="zstandard not installed")),
+]
+
+@pytest.mark.parametrize("codec", FORMATS)
+@pytest.mark.parametrize("threshold", COMPRESSION)
+@pytest.mark.parametrize("value", [RESPONSE, {"answer": "short", "sources": []}, "text", [1, 2.5, None]])
+def test_round_trip(codec, threshold, value):
+    c = CacheCodec(codec=codec, compression_threshold=threshold)
+    raw = c.encode(value)
+    assert c.decode(raw) == value
+
+@pytest.mark.skipif(cache_codec.zstandard is None, reason="zstandard not installed")
+@pytest.mark.parametrize("codec", FORMATS)
+def test_large_values_are_compressed(codec):
+    c = CacheCodec(codec=codec, compression_threshold=1024)
+    raw = c.encode(RESPONSE)
+    assert raw[0] & CacheCodec.COMPRESSED
+    assert c.decode(raw) == RESPONSE
+
+## entries written by one codec configuration are readable by another
+@pytest.mark.parametrize("writer", FORMATS)
+@pytest.mark.parametrize("threshold", COMPRESSION)
+def test_decode_is_independent_of_configuration(writer, threshold):
+    raw = CacheCodec(codec=writer, compression_threshold=threshold).encode(RESPONSE)
+    assert CacheCodec().decode(raw) == RESPONSE
+
+## plain json written before the codec existed ##
+@pytest.mark.parametrize("legacy", [json.dumps(RESPONSE), json.dumps(RESPONSE).encode(), b" [1]", b"\n{}"])
+def test_legacy_json(legacy):
+    assert CacheCodec(codec="msgpack", compression_threshold=64).decode(legacy) == json.loads(legacy)
+
+def test_unknown_header():
+    with pytest.raises(ValueError):
+        CacheCodec().decode(bytes([0x83]) + b"payload")
@@ -0,0 +1,85 @@
+import asyncio
+import pytest
+
+pytest.importorskip("langchain_core")
+
+import redis
+from langchain_core.messages import HumanMessage, AIMessage
+from cache import CircuitBreaker, EmbeddingCache, RedisSemanticIndex
+from cache_warmer import QueryFrequency
+from session_store import RedisSessionStore
+from single_flight import RedisSingleFlight
+
+## redis client which fails every call and counts the attempts ##
+class DownRedis:
+    def __init__(self):
+        self.calls = 0
+    def __getattr__(self, name):
+        def fail(*args, **kwargs):
+            self.calls += 1
+            raise redis.ConnectionError("redis is down")
+        return fail
+    def pipeline(self, transaction=True):
+        return DownPipeline(self)
+
+## pipeline buffers commands, redis is reached on execute ##
+class DownPipeline:
+    def __init__(self, client):
+        self.client = client
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+    def execute(self):
+        return self.client.execute()
+
+class DownAsyncRedis(DownRedis):
+    def __getattr__(self, name):
+        async def fail(*args, **kwargs):
+            self.calls += 1
+            raise redis.ConnectionError("redis is down")
+        return fail
+
+def test_breaker_opens_after_threshold_and_serves_default():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    client = DownRedis()
+    assert breaker.call(client.get, "k", default="miss") == "miss"
+    assert breaker.call(client.get, "k", default="miss") == "miss"
+    assert breaker.call(client.get, "k", default="miss") == "miss"
+    assert client.calls == 2
+
+def test_breaker_closes_after_successful_probe():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.call(DownRedis().get, "k")
+    assert breaker.call(lambda: "value") == "value"
+    assert breaker._opened_at is None
+
+def test_outage_seen_by_one_component_short_circuits_the_others():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    client, async_client = DownRedis(), DownAsyncRedis()
+
+    embeddings = EmbeddingCache(client=client, breaker=breaker)
+    assert embeddings.get("model", 3, "text") is None
+    embeddings.set("model", 3, "text", [1.0, 0.0, 0.0])
+    assert client.calls == 2
+
+    # breaker is open, none of the components reach redis
+    index = RedisSemanticIndex(client, breaker=breaker, max_entries=10)
+    index.add("key", [1.0, 0.0], "v1")
+    with pytest.raises(RuntimeError):
+        index.refresh()
+
+    frequency = QueryFrequency(client=client, breaker=breaker)
+    frequency.record("what is rag")
+    assert frequency.top(5) == [("what is rag", 1)]
+
+    sessions = RedisSessionStore(client, async_client=async_client, breaker=breaker)
+    assert sessions.load("user") is None
+    sessions.store("user", [HumanMessage(content="q"), AIMessage(content="a")])
+    asyncio.run(sessions.append("user", [HumanMessage(content="q")]))
+
+    single_flight = RedisSingleFlight(async_client, breaker=breaker)
+
+    async def answer():
+        return "answer"
+
+    assert asyncio.run(single_flight.do("key", answer)) == ("answer", False)
+    assert client.calls == 2 and async_client.calls == 0
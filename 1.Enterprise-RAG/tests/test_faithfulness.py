@@ -0,0 +1,59 @@
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from langchain_core.messages import HumanMessage
+from faithfulness import lexical_faithfulness
+
+CONTEXT = [
+    {"text": "Employees get 20 days of annual leave per year. Leave requests go through the HR portal.", "filename": "a.pdf"},
+    {"text": "Contractors are not eligible for paid parental leave.", "filename": "b.pdf"},
+]
+
+def test_supported_answer():
+    answer = "Employees get 20 days of annual leave per year.\nRequests go through the HR portal.\nCitation: a.pdf"
+    assert lexical_faithfulness(answer, CONTEXT) == 1.0
+
+def test_wrong_number_is_not_supported():
+    assert lexical_faithfulness("Employees get 35 days of annual leave per year.", CONTEXT) == 0.0
+
+@pytest.mark.parametrize("answer", [
+    "Contractors are eligible for paid parental leave.",
+    "Employees do not get 20 days of annual leave per year.",
+    "Employees don't get 20 days of annual leave per year.",
+    "Employees never get 20 days of annual leave per year.",
+    "Leave requests cannot go through the HR portal.",
+])
+def test_negation_mismatch_is_uncertain(answer):
+    assert lexical_faithfulness(answer, CONTEXT) is None
+
+def test_negation_matching_context_is_supported():
+    assert lexical_faithfulness("Contractors aren't eligible for paid parental leave.", CONTEXT) == 1.0
+
+@pytest.mark.parametrize("answer", ["", "Yes.", "Here is the summary:\nCitation: a.pdf"])
+def test_nothing_checked_is_uncertain(answer):
+    assert lexical_faithfulness(answer, CONTEXT) is None
+
+def test_user_messages_are_sources():
+    session = [HumanMessage(content="My employee id is EMP-4821.")]
+    answer = "Your employee id is EMP-4821."
+    assert lexical_faithfulness(answer, CONTEXT) == 0.0
+    assert lexical_faithfulness(answer, CONTEXT, session) == 1.0
+
+## facts of different clauses or sentences recombined, every word is in the context ##
+@pytest.mark.parametrize("context, answer", [
+    ("Annual leave: employees receive 20 days, contractors receive 10 days.",
+     "Contractors receive 20 days of annual leave."),
+    ("Employees receive 20 days of annual leave and contractors receive 10 days of annual leave.",
+     "Contractors receive 20 days of annual leave."),
+    ("The basic plan costs 20 USD per month. The premium plan costs 50 USD per month.",
+     "The basic plan costs 50 USD."),
+    ("Employee EMP-4821 is based in Berlin. Employee EMP-9313 is based in Paris.",
+     "Employee EMP-4821 is based in Paris."),
+])
+def test_swapped_facts_are_not_supported(context, answer):
+    assert lexical_faithfulness(answer, [{"text": context, "filename": "a.pdf"}]) == 0.0
+
+def test_fact_from_single_clause_is_supported():
+    context = [{"text": "Annual leave: employees receive 20 days, contractors receive 10 days.", "filename": "a.pdf"}]
+    assert lexical_faithfulness("Contractors receive 10 days.", context) == 1.0
@@ -0,0 +1,51 @@
+import asyncio
+import dataclasses
+import pytest
+
+for module in ("langchain_core", "langgraph", "redis", "pydantic"):
+    pytest.importorskip(module)
+
+from guardrails_classes import GuardrailResult, ValidationResult
+from retrieval_service import RetrievalService, PreparedQuery
+from settings import Settings
+
+CONTEXT = [{"text": "Contractors are not eligible for paid parental leave.", "filename": "b.pdf"}]
+# negation differs from context, hence uncertain for the lexical check and audited
+ANSWER = "Contractors are eligible for paid parental leave.\nCitation: b.pdf"
+
+class FakeCache:
+    semantic_index = None
+    def __init__(self):
+        self.writes = []
+    def update_cache(self, query, response, kb_version, embedding=None):
+        self.writes.append(query)
+
+def build(verdict: ValidationResult):
+    settings = dataclasses.replace(Settings.from_env(), guardrails_enabled=3, faithfulness_mode="audit")
+    cache = FakeCache()
+    service = RetrievalService(None, None, None, cache, None, settings)
+
+    async def judge(candidate_text, context, session):
+        await asyncio.sleep(0.01)
+        return GuardrailResult(status=verdict, response=candidate_text, score=0.0)
+    service.output_guardrail.judge = judge
+    return service, cache
+
+async def answer_and_wait_for_audit(service):
+    prepared = PreparedQuery(query="q", kb_version="v1", embedding=[0.1], context=CONTEXT)
+    response = await service.finalize(prepared, ANSWER, [])
+    # answer is returned before the audit completes
+    assert response["sources"] == ["b.pdf"]
+    await asyncio.gather(*service.output_guardrail._audits)
+    await asyncio.sleep(0.05)
+
+@pytest.mark.parametrize("verdict", [ValidationResult.REGENERATE, ValidationResult.FAIL])
+def test_failed_audit_is_not_cached(verdict):
+    service, cache = build(verdict)
+    asyncio.run(answer_and_wait_for_audit(service))
+    assert cache.writes == []
+
+def test_passed_audit_is_cached():
+    service, cache = build(ValidationResult.PASS)
+    asyncio.run(answer_and_wait_for_audit(service))
+    assert cache.writes == ["q"]
@@ -0,0 +1,64 @@
+import json
+import sys
+from pathlib import Path
+import pytest
+
+pytest.importorskip("opensearchpy")
+pytest.importorskip("boto3")
+
+# ingestion lambda is not part of the scripts folder
+sys.path.insert(
+    0, str(Path(__file__).resolve().parent.parent / "deployment-package" / "lambda-package" / "ingestion_service")
+)
+import ingestion_service_lambda  # noqa: E402
+
+## lambda context, every processed message takes `cost` ms ##
+class FakeContext:
+    def __init__(self, remaining: int, cost: int):
+        self.remaining = remaining
+        self.cost = cost
+
+    def get_remaining_time_in_millis(self):
+        return self.remaining
+
+def sqs_event(keys):
+    return {"Records": [
+        {
+            "eventSource": "aws:sqs",
+            "messageId": f"msg-{key}",
+            "body": json.dumps({"Records": [{"s3": {"object": {"key": key}}}]}),
+        }
+        for key in keys
+    ]}
+
+@pytest.fixture
+def processed(monkeypatch):
+    keys = []
+    monkeypatch.setattr(ingestion_service_lambda, "get_ingestion_service", lambda: None)
+    monkeypatch.setattr(ingestion_service_lambda, "import_success", True)
+    monkeypatch.setattr(ingestion_service_lambda, "MESSAGE_TIME_RESERVE_MS", 120_000)
+    return keys
+
+def test_failed_messages_are_reported(monkeypatch, processed):
+    def process(service, record):
+        key = record["s3"]["object"]["key"]
+        if key == "bad.pdf":
+            raise ValueError("corrupt document")
+        processed.append(key)
+    monkeypatch.setattr(ingestion_service_lambda, "process_s3_record", process)
+
+    result = ingestion_service_lambda.lambda_handler(sqs_event(["a.pdf", "bad.pdf", "c.pdf"]), FakeContext(300_000, 0))
+    assert processed == ["a.pdf", "c.pdf"]
+    assert result == {"batchItemFailures": [{"itemIdentifier": "msg-bad.pdf"}]}
+
+def test_messages_left_when_time_runs_short_are_reported(monkeypatch, processed):
+    context = FakeContext(300_000, 100_000)
+    def process(service, record):
+        processed.append(record["s3"]["object"]["key"])
+        context.remaining -= context.cost
+    monkeypatch.setattr(ingestion_service_lambda, "process_s3_record", process)
+
+    result = ingestion_service_lambda.lambda_handler(sqs_event(["a.pdf", "b.pdf", "c.pdf", "d.pdf"]), context)
+    # 300s, 200s left: started; 100s left: below the 120s reserve
+    assert processed == ["a.pdf", "b.pdf"]
+    assert result == {"batchItemFailures": [{"itemIdentifier": "msg-c.pdf"}, {"itemIdentifier": "msg-d.pdf"}]}
@@ -0,0 +1,54 @@
+import sys
+from pathlib import Path
+import pytest
+
+pytest.importorskip("opensearchpy")
+pytest.importorskip("boto3")
+
+# ingestion lambda is not part of the scripts folder
+sys.path.insert(
+    0, str(Path(__file__).resolve().parent.parent / "deployment-package" / "lambda-package" / "ingestion_service")
+)
+from ingestion_service_lambda import load_manifest, delete_chunk_copies  # noqa: E402
+
+## opensearch client holding (_id, doc_id) pairs, supports the manifest queries ##
+class FakeOpenSearch:
+    def __init__(self, docs):
+        self.docs = list(docs)
+        self.searches = 0
+
+    def search(self, index, body):
+        self.searches += 1
+        prefix = body["query"]["prefix"]["doc_id"]
+        after = body.get("search_after", [None])[0]
+        hits = sorted(
+            (doc_id, _id) for _id, doc_id in self.docs
+            if doc_id.startswith(prefix) and (after is None or doc_id > after)
+        )[:body["size"]]
+        return {"hits": {"hits": [{"_id": _id, "_source": {"doc_id": doc_id}} for doc_id, _id in hits]}}
+
+    def delete_by_query(self, index, body):
+        ids = set(body["query"]["ids"]["values"])
+        before = len(self.docs)
+        self.docs = [(_id, doc_id) for _id, doc_id in self.docs if _id not in ids]
+        return {"deleted": before - len(self.docs)}
+
+def test_manifest_is_paged_and_keeps_copies_across_page_boundaries():
+    docs = [(f"os-{i}", f"key_{i:04d}") for i in range(25)]
+    # copies of chunk 9 straddle the boundary of the first page
+    docs += [("copy-9a", "key_0009"), ("copy-9b", "key_0009"), ("other", "other_0001")]
+    client = FakeOpenSearch(docs)
+
+    manifest = load_manifest(client, "index", "key", page_size=10)
+
+    assert set(manifest) == {f"key_{i:04d}" for i in range(25)}
+    assert sorted(manifest["key_0009"]) == ["copy-9a", "copy-9b", "os-9"]
+    assert client.searches == 3
+
+def test_extra_copies_are_deleted_by_id():
+    client = FakeOpenSearch([("a", "key_1"), ("b", "key_1"), ("c", "key_2")])
+    manifest = load_manifest(client, "index", "key")
+    copies = [_id for ids in manifest.values() for _id in ids[1:]]
+
+    assert delete_chunk_copies(client, "index", copies) == 1
+    assert sorted(doc_id for _, doc_id in client.docs) == ["key_1", "key_2"]
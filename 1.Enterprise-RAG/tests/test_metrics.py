@@ -0,0 +1,39 @@
+import socket
+import urllib.request
+import pytest
+
+pytest.importorskip("prometheus_client")
+pytest.importorskip("fastapi")
+
+import metrics
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def test_public_app_does_not_serve_metrics():
+    rag_fastapi = pytest.importorskip("rag_fastapi")
+    assert "/metrics" not in {route.path for route in rag_fastapi.app.routes}
+
+def test_metrics_are_served_on_separate_port():
+    port = free_port()
+    metrics.start_metrics_server(port)
+    with metrics.track_request("userquery"):
+        pass
+    body = urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5).read().decode()
+    assert 'rag_request_duration_seconds_count{endpoint="userquery"}' in body
+
+def test_semantic_lookups_are_recorded_with_near_miss():
+    from cache import LocalCache
+    cache = LocalCache(semantic_cache={"threshold": 0.9, "near_miss_margin": 0.1, "max_entries": 10})
+    cache.semantic_index.add("cached", [1.0, 0.0], "v1")
+    cache.set("cached", {"answer": "20 days"})
+
+    def count(result):
+        return metrics.CACHE_REQUESTS.labels("semantic", result)._value.get()
+    before = {result: count(result) for result in ("hit", "near_miss", "miss")}
+    assert cache.semantic_query_cache([1.0, 0.0], "v1") is not None
+    assert cache.semantic_query_cache([0.85, 0.53], "v1") is None  #similarity 0.85
+    assert cache.semantic_query_cache([0.0, 1.0], "v1") is None
+    assert {result: count(result) - before[result] for result in before} == {"hit": 1, "near_miss": 1, "miss": 1}
@@ -0,0 +1,100 @@
+import asyncio
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from cache_warmer import QueryFrequency
+from guardrails_classes import GuardrailResult, ValidationResult
+from retrieval_service import RetrievalService
+from settings import Settings
+
+## sync redis client, pipeline calls are applied on execute ##
+class FakeRedis:
+    def __init__(self):
+        self.counts = {}
+        self.ttl = None
+    def pipeline(self, transaction=False):
+        return FakePipeline(self)
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+    def zincrby(self, key, count, query):
+        self.commands.append(("zincrby", query, count))
+    def zremrangebyrank(self, key, start, end):
+        self.commands.append(("zremrangebyrank", start, end))
+    def expire(self, key, ttl):
+        self.commands.append(("expire", ttl, None))
+    def execute(self):
+        counts = self.client.counts
+        for command, first, second in self.commands:
+            if command == "zincrby":
+                counts[first] = counts.get(first, 0) + second
+            elif command == "zremrangebyrank":
+                ranked = sorted(counts, key=counts.get)
+                for query in ranked[first:len(ranked) + second + 1]:
+                    del counts[query]
+            else:
+                self.client.ttl = first
+        return [True] * len(self.commands)
+
+## input guardrail blocking queries with "card", redacting digits ##
+class StubGuardrail:
+    async def aapply(self, candidate_text, context=None, session=None):
+        if "card" in candidate_text:
+            return GuardrailResult(status=ValidationResult.FAIL, response="Query is blocked.")
+        return GuardrailResult(
+            status=ValidationResult.PASS,
+            response="".join("#" if c.isdigit() else c for c in candidate_text)
+        )
+
+def test_pending_counts_are_bounded_between_flushes():
+    frequency = QueryFrequency(client=FakeRedis(), max_pending=10)
+    frequency.record("popular query", 100)
+    for i in range(1000):
+        frequency.record(f"one-off query {i}")
+    assert len(frequency._pending) <= 20
+    assert frequency._pending["popular query"] == 100
+
+def test_periodic_flush_merges_pending_counts():
+    client = FakeRedis()
+    frequency = QueryFrequency(client=client, flush_interval=0)
+
+    async def run():
+        frequency.record("leave policy")
+        task = asyncio.create_task(frequency.run())
+        await asyncio.sleep(0.05)
+        task.cancel()
+
+    asyncio.run(run())
+    assert client.counts == {"leave policy": 1}
+
+def test_shared_counts_are_trimmed_and_expire():
+    client = FakeRedis()
+    frequency = QueryFrequency(client=client, max_entries=5, ttl=3600)
+    frequency.record("popular query", 100)
+    for i in range(20):
+        frequency.record(f"one-off query {i}")
+    frequency.flush()
+    assert len(client.counts) == 5
+    assert client.counts["popular query"] == 100
+    assert client.ttl == 3600
+    assert not frequency._pending
+
+def test_only_guarded_sanitized_queries_are_counted():
+    frequency = QueryFrequency()
+    service = RetrievalService(None, None, None, None, None, Settings(), query_frequency=frequency)
+    service.input_guardrail = StubGuardrail()
+
+    async def search(query, kb_version):
+        return None, None, {"answer": "cached", "sources": []}
+    service.search = search
+
+    async def run():
+        await service.prepare("what is my card number", [], "v1")
+        await service.prepare("Leave policy 2024", [], "v1")
+        await service.prepare("leave policy 2024", [], "v1", count_query=False)
+
+    asyncio.run(run())
+    assert frequency.top(10) == [("leave policy ####", 1)]
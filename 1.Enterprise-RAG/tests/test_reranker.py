@@ -0,0 +1,34 @@
+from reranker import LexicalReranker
+
+def hits(*texts):
+    return [{"_score": 1.0, "_source": {"text": text}} for text in texts]
+
+CANDIDATES = hits(
+    "Office opening hours and building access.",
+    "Annual leave policy: employees get 20 days of annual leave.",
+    "Expense claims are submitted through the finance portal.",
+)
+
+def test_lexical_rerank_orders_by_query_terms_and_search_rank():
+    reranker = LexicalReranker(lexical_weight=0.5)
+    ranked = reranker.rerank("annual leave days", CANDIDATES)
+    assert ranked[0]["_source"]["text"].startswith("Annual leave policy")
+    # no shared term, search order is kept
+    assert [hit["_source"]["text"][:6] for hit in ranked[1:]] == ["Office", "Expens"]
+
+def test_lexical_scores_are_cached_per_candidate_set():
+    reranker = LexicalReranker()
+    first = reranker.rerank("annual leave days", CANDIDATES)
+    assert reranker.rerank("annual leave days", CANDIDATES) == first
+    assert reranker.stats["cache_hit"] == len(CANDIDATES)
+
+    # another candidate set changes document frequencies, scores are not reused
+    reranker.rerank("annual leave days", CANDIDATES[:2])
+    assert reranker.stats["cache_hit"] == len(CANDIDATES)
+
+def test_lexical_rerank_is_skipped_over_latency_budget():
+    reranker = LexicalReranker(latency_budget=0.001, probe_every=3)
+    reranker.avg_latency = 1.0
+    skipped = [reranker.rerank("annual leave", CANDIDATES) == CANDIDATES for _ in range(3)]
+    assert skipped == [True, True, False]  #every third request probes the latency
+    assert reranker.stats["skipped"] == 2
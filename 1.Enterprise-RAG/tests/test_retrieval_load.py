@@ -0,0 +1,67 @@
+## load test of the async retrieval pipeline against stubbed bedrock, opensearch and llm
+## backends with fixed latency. Throughput must scale with concurrency up to the worker pool
+import asyncio
+import io
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+
+pytest.importorskip("langchain_core")
+pytest.importorskip("opensearchpy")
+
+from langchain_core.messages import AIMessage
+from retrieval_service import RetrievalService
+from settings import Settings
+
+LATENCY = 0.05  #seconds per backend call
+WORKER_THREADS = 32
+
+## blocking bedrock-runtime client, embeddings only ##
+class StubBedrock:
+    def invoke_model(self, **kwargs):
+        time.sleep(LATENCY)
+        return {"body": io.BytesIO(json.dumps({"embedding": [0.1] * 8}).encode())}
+
+## blocking opensearch client ##
+class StubOpenSearch:
+    def search(self, body, index):
+        time.sleep(LATENCY)
+        return {"hits": {"hits": [
+            {"_score": 1.0, "_source": {"text": "Leave policy allows 20 days.", "source": "hr.pdf"}}
+        ]}}
+
+## compiled langgraph graph, llm call is async ##
+class StubGraph:
+    async def ainvoke(self, state):
+        await asyncio.sleep(LATENCY)
+        return {"messages": [AIMessage(content="20 days.\nCitation: hr.pdf")]}
+
+def build_service() -> RetrievalService:
+    return RetrievalService(
+        StubOpenSearch(), StubGraph(), None, None, StubBedrock(), Settings()
+    )
+
+## requests per second with the given number of concurrent users ##
+def throughput(concurrency: int, requests: int) -> float:
+
+    async def user(service, count):
+        for i in range(count):
+            response = await service.retrieve(f"leave policy {i}", [])
+            assert response["answer"].startswith("20 days")
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=WORKER_THREADS))
+        service = build_service()
+        started = time.perf_counter()
+        await asyncio.gather(*(user(service, requests // concurrency) for _ in range(concurrency)))
+        return requests / (time.perf_counter() - started)
+
+    return asyncio.run(run())
+
+def test_throughput_scales_with_concurrency():
+    sequential = throughput(1, 8)
+    concurrent = throughput(16, 64)
+    # three backend calls per request: ~6.7 req/s sequential, ~16x with 16 users
+    assert concurrent > 8 * sequential
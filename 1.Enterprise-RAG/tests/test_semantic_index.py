@@ -0,0 +1,100 @@
+import asyncio
+import json
+import time
+import numpy as np
+import pytest
+
+from cache import SemanticIndex, RedisSemanticIndex, encode_vector, normalize_vector
+
+def unit(*values):
+    return list(values)
+
+def test_closest_entry_of_kb_version():
+    index = SemanticIndex(max_entries=10)
+    index.add("a", unit(1, 0, 0), "v1")
+    index.add("b", unit(0.9, 0.1, 0), "v1")
+    index.add("c", unit(1, 0, 0), "v2")
+    key, score = index.search(unit(0.8, 0.2, 0), "v1")
+    assert key == "b" and score == pytest.approx(0.99, abs=0.01)
+    assert index.search(unit(1, 0, 0), "v3") == (None, -1.0)
+
+def test_expired_and_removed_entries_are_not_returned():
+    index = SemanticIndex(max_entries=10)
+    index.add("old", unit(1, 0), "v1", ex=1)
+    index.add("gone", unit(0, 1), "v1")
+    index.remove("gone")
+    assert index.search(unit(1, 0), "v1")[0] == "old"
+    index._expiry[index._rows["old"]] = time.time() - 1
+    assert index.search(unit(1, 0), "v1") == (None, -1.0)
+    assert len(index._rows) == 0
+
+def test_oldest_entry_is_evicted_when_full():
+    index = SemanticIndex(max_entries=2)
+    index.add("a", unit(1, 0), "v1")
+    index.add("b", unit(0, 1), "v1")
+    index.add("c", unit(1, 1), "v1")
+    assert set(index._rows) == {"b", "c"}
+    assert index.search(unit(1, 0), "v1")[0] == "c"
+
+def test_dimension_change_resets_index():
+    index = SemanticIndex(max_entries=4)
+    index.add("a", unit(1, 0), "v1")
+    assert index.search(unit(1, 0, 0), "v1") == (None, -1.0)
+    index.add("b", unit(1, 0, 0), "v1")
+    assert list(index._rows) == ["b"]
+
+## stand-in for the sync redis client, hash commands only ##
+class FakeRedis:
+    def __init__(self, fail=False):
+        self.hash = {}
+        self.fail = fail
+    def hset(self, name, key, value):
+        self.hash[key.encode()] = value.encode()
+    def hdel(self, name, *keys):
+        for key in keys:
+            self.hash.pop(key.encode(), None)
+    def hscan_iter(self, name, count=None):
+        if self.fail:
+            raise ConnectionError("redis is down")
+        return iter(list(self.hash.items()))
+
+def test_refresh_loads_shared_entries_and_purges_expired():
+    client = FakeRedis()
+    writer = RedisSemanticIndex(client, max_entries=10)
+    writer.add("a", unit(1, 0), "v1")
+    client.hset("", "expired", json.dumps({"e": time.time() - 1, "k": "v1", "v": encode_vector(normalize_vector([0, 1]))}))
+
+    reader = RedisSemanticIndex(client, max_entries=10)
+    assert reader.search(unit(1, 0), "v1") == (None, -1.0)
+    reader.refresh()
+    key, score = reader.search(unit(1, 0), "v1")
+    assert key == "a" and score == pytest.approx(1.0)
+    assert b"expired" not in client.hash
+
+def test_search_does_not_touch_redis():
+    index = RedisSemanticIndex(FakeRedis(fail=True), max_entries=10)
+    assert index.search(unit(1, 0), "v1") == (None, -1.0)
+
+def test_failed_refresh_backs_off(monkeypatch):
+    index = RedisSemanticIndex(FakeRedis(fail=True), refresh_interval=30, max_backoff=300, max_entries=10)
+    delays = []
+
+    async def sleep(delay):
+        delays.append(delay)
+        if len(delays) > 5:
+            raise asyncio.CancelledError
+
+    monkeypatch.setattr(asyncio, "sleep", sleep)
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(index.run())
+    assert delays == [0, 60, 120, 240, 300, 300]
+
+def test_matches_brute_force():
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(200, 16))
+    index = SemanticIndex(max_entries=200)
+    for i, vector in enumerate(vectors):
+        index.add(str(i), vector.tolist(), "v1")
+    query = rng.normal(size=16)
+    expected = max(range(200), key=lambda i: np.dot(normalize_vector(vectors[i]), normalize_vector(query)))
+    assert index.search(query.tolist(), "v1")[0] == str(expected)
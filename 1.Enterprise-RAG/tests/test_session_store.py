@@ -0,0 +1,134 @@
+import asyncio
+import pytest
+
+pytest.importorskip("langchain_core")
+pytest.importorskip("redis")
+
+from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+import cache_codec
+from cache_codec import CacheCodec
+from redis.exceptions import WatchError
+from session_store import RedisSessionStore
+
+CORRUPT = bytes([0x82]) + b"not a valid payload"
+
+## stand-in for the sync redis client ##
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+    def get(self, key):
+        return self.data.get(key)
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+    def delete(self, key):
+        self.data.pop(key, None)
+
+## stand-in for the redis.asyncio client, transaction pipeline without concurrency ##
+class FakeAsyncRedis:
+    def __init__(self, sync: FakeRedis):
+        self.sync = sync
+    def pipeline(self, transaction=True):
+        return FakePipeline(self.sync)
+
+class FakePipeline:
+    def __init__(self, sync):
+        self.sync = sync
+        self.commands = []
+    async def __aenter__(self):
+        return self
+    async def __aexit__(self, *args):
+        return False
+    async def watch(self, key):
+        pass
+    async def get(self, key):
+        return self.sync.get(key)
+    def multi(self):
+        pass
+    def set(self, key, value, ex=None):
+        self.commands.append((key, value))
+    async def execute(self):
+        for key, value in self.commands:
+            self.sync.set(key, value)
+
+def turn(i: int) -> list:
+    # long turns so that the stored session exceeds the compression threshold
+    return [HumanMessage(content=f"question {i} " + "x" * 400), AIMessage(content=f"answer {i} " + "y" * 400)]
+
+def stores():
+    codecs = [CacheCodec()]
+    if cache_codec.zstandard is not None:
+        codecs.append(CacheCodec(compression_threshold=1024))
+    for codec in codecs:
+        yield RedisSessionStore(FakeRedis(), codec=codec, max_tokens=100000)
+        client = FakeRedis()
+        yield RedisSessionStore(client, codec=codec, async_client=FakeAsyncRedis(client), max_tokens=100000)
+
+@pytest.mark.parametrize("store", list(stores()))
+def test_session_survives_past_compression_threshold(store):
+    for i in range(4):
+        asyncio.run(store.append("user", turn(i)))
+    messages = asyncio.run(store.get("user"))
+    assert [m.content for m in messages] == [m.content for i in range(4) for m in turn(i)]
+
+@pytest.mark.parametrize("store", list(stores()))
+def test_corrupt_session_is_reset(store):
+    store.client.set("session:user", CORRUPT)
+    assert asyncio.run(store.get("user")) == []
+
+    # later turns are kept again
+    asyncio.run(store.append("user", turn(1)))
+    asyncio.run(store.append("user", turn(2)))
+    messages = asyncio.run(store.get("user"))
+    assert [m.content for m in messages] == [m.content for m in turn(1) + turn(2)]
+
+## pipeline whose first transactions fail as if a concurrent turn modified the session ##
+class ConflictingAsyncRedis(FakeAsyncRedis):
+    def __init__(self, sync: FakeRedis, conflicts: int):
+        super().__init__(sync)
+        self.conflicts = conflicts
+    def pipeline(self, transaction=True):
+        client = self
+        class Pipeline(FakePipeline):
+            async def execute(self):
+                if client.conflicts:
+                    client.conflicts -= 1
+                    raise WatchError("session was modified")
+                await super().execute()
+        return Pipeline(self.sync)
+
+## summarizer blocked until released, counts llm calls ##
+class GatedSummarizer:
+    def __init__(self):
+        self.calls = 0
+        self.release = asyncio.Event()
+    async def summarize(self, summary, dropped):
+        self.calls += 1
+        await self.release.wait()
+        return f"summary of {len(dropped)} messages"
+
+def test_summarization_runs_once_outside_the_transaction():
+    client = FakeRedis()
+    summarizer = GatedSummarizer()
+    store = RedisSessionStore(
+        client, async_client=ConflictingAsyncRedis(client, conflicts=0),
+        max_tokens=500, summarizer=summarizer
+    )
+
+    async def run():
+        for i in range(2):
+            await store.append("user", turn(i))
+        # history is over the window, the retried append returns while the summary is pending
+        store.async_client.conflicts = 2
+        await store.append("user", turn(2))
+        messages = await store.get("user")
+        assert [m.content for m in messages] == [m.content for m in turn(2)]
+
+        summarizer.release.set()
+        await asyncio.gather(*store._summaries)
+        return await store.get("user")
+
+    messages = asyncio.run(run())
+    assert summarizer.calls == 1
+    assert isinstance(messages[0], SystemMessage)
+    assert messages[0].content == "summary of 4 messages"
+    assert [m.content for m in messages[1:]] == [m.content for m in turn(2)]
@@ -0,0 +1,46 @@
+import asyncio
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from langchain_core.messages import AIMessageChunk
+from guardrails_classes import GuardrailResult, ValidationResult
+from retrieval_service import RetrievalService, PreparedQuery
+from settings import Settings
+
+BLOCKED = "The answer could not be verified against the documents."
+
+## compiled graph streaming two llm tokens ##
+class StubGraph:
+    async def astream(self, state, stream_mode):
+        for token in ("Leave is ", "20 days."):
+            yield AIMessageChunk(content=token), {"langgraph_node": "llm_node"}
+
+## output guardrail with a fixed verdict ##
+class StubGuardrail:
+    def __init__(self, status, response=None):
+        self.status, self.response = status, response
+    async def aapply(self, candidate_text, context=None, session=None):
+        return GuardrailResult(status=self.status, response=self.response or candidate_text)
+
+def stream(guardrail) -> list:
+    service = RetrievalService(None, StubGraph(), None, None, None, Settings())
+    service.output_guardrail = guardrail
+
+    async def prepare(query, user_session, kb_version):
+        return PreparedQuery(query=query, context=[], system_prompt="")
+    service.prepare = prepare
+
+    async def run():
+        return [event async for event in service.retrieve_stream("leave policy", [])]
+    return asyncio.run(run())
+
+def test_passed_answer_ends_with_final_event():
+    events = stream(StubGuardrail(ValidationResult.PASS))
+    assert [event for event, _ in events] == ["token", "token", "final"]
+    assert events[-1][1]["answer"] == "Leave is 20 days."
+
+def test_blocked_answer_ends_with_blocked_event():
+    events = stream(StubGuardrail(ValidationResult.FAIL, BLOCKED))
+    assert [event for event, _ in events] == ["token", "token", "blocked"]
+    assert events[-1][1]["answer"] == BLOCKED
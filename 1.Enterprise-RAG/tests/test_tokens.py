@@ -0,0 +1,23 @@
+import pytest
+from settings import Settings
+from tokens import context_token_budget, context_window, DEFAULT_CONTEXT_WINDOW
+
+@pytest.mark.parametrize("model_id, window", [
+    ("openai.gpt-oss-120b-1:0", 128000),
+    ("us.anthropic.claude-3-5-haiku-20241022-v1:0", 200000),
+    ("meta.llama3-8b-instruct-v1:0", 8000),
+    ("meta.llama3-1-70b-instruct-v1:0", 128000),  #longest prefix wins
+    ("amazon.titan-text-lite-v1", 4000),
+    ("unknown.model-v1", DEFAULT_CONTEXT_WINDOW),
+])
+def test_context_window_by_model(model_id, window):
+    assert context_window(model_id) == window
+
+def test_budget_follows_the_configured_model(monkeypatch):
+    monkeypatch.setenv("LLM_MODEL_ID", "amazon.titan-text-lite-v1")
+    monkeypatch.setenv("CONTEXT_TOKEN_BUDGET", "")
+    assert Settings.from_env().context_token_budget == context_token_budget("amazon.titan-text-lite-v1") == 1000
+
+    # explicit budget overrides the model budget
+    monkeypatch.setenv("CONTEXT_TOKEN_BUDGET", "2500")
+    assert Settings.from_env().context_token_budget == 2500